@@ -0,0 +1,172 @@
+# analytics.py
+
+from array import array
+from itertools import chain
+from operator import attrgetter
+
+from indexes import SCORE_RANGES
+import metrics
+import utils
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; everything below falls back to pure Python
+    np = None
+
+HAVE_NUMPY = np is not None
+
+# Percentiles reported by course_statistics() unless others are requested
+DEFAULT_PERCENTILES = (25, 50, 75, 90)
+
+# (name, low, high) of the half-open score ranges, matching indexes.score_range()
+_RANGE_EDGES = (("60-69", 60, 70), ("70-79", 70, 80), ("80-89", 80, 90))
+
+
+def grade_array(students, course, default=None):
+    """
+    Pull one course's grades into a contiguous float array.
+
+    Args:
+        students (iterable): Student objects.
+        course (str): The course to read.
+        default (float, optional): Grade used for students without the course.
+                                   None (the default) skips those students.
+
+    Returns:
+        tuple: (students, grades) where students is the list of students kept and
+               grades a numpy float64 array (or array('d') without NumPy) in the same order.
+    """
+    kept = []
+    values = array('d')
+    for student in students:
+        grade = student.grades.get(course, default)
+        if grade is not None:
+            kept.append(student)
+            values.append(grade)
+    if np is not None:
+        # Shares the array('d') buffer instead of copying it element by element
+        values = np.frombuffer(values, dtype=np.float64) if len(values) else np.empty(0)
+    return kept, values
+
+
+def _percentile(sorted_values, p):
+    """Linear-interpolated percentile of already sorted values (numpy.percentile's default)."""
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def _summarize(grades, percentiles):
+    """Statistics for a non-empty float array of grades."""
+    if np is None:
+        stats = utils.summarize_grades(grades)
+        if percentiles:
+            ordered = sorted(grades)
+            stats['percentiles'] = {p: _percentile(ordered, p) for p in percentiles}
+        stats['count'] = len(grades)
+        return stats
+
+    # One sort serves every figure below; nothing re-sorts or partitions the grades again
+    ordered = np.sort(grades)
+    n = len(ordered)
+    run_starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+    run_lengths = np.diff(np.append(run_starts, n))
+    # Bucket counts from the sorted grades: each bounded range is two binary searches
+    score_ranges = dict.fromkeys(SCORE_RANGES, 0)
+    score_ranges["90-100"] = int(np.searchsorted(ordered, 100, side='right') - np.searchsorted(ordered, 90, side='left'))
+    for name, low, high in _RANGE_EDGES:
+        score_ranges[name] = int(np.searchsorted(ordered, high, side='left') - np.searchsorted(ordered, low, side='left'))
+    score_ranges["Below 60"] = n - sum(score_ranges.values())
+    stats = {
+        'average': float(ordered.mean()),
+        'median': float(ordered[n // 2] if n % 2 else (ordered[n // 2 - 1] + ordered[n // 2]) / 2),
+        # Runs are in ascending order and argmax returns the first maximum, so ties go to the lowest grade
+        'mode': float(ordered[run_starts[run_lengths.argmax()]]),
+        'score_ranges': score_ranges,
+        'count': n
+    }
+    if percentiles:
+        stats['percentiles'] = {p: float(_percentile(ordered, p)) for p in percentiles}
+    return stats
+
+
+@metrics.timed('analytics.course_statistics')
+def course_statistics(students, course, percentiles=DEFAULT_PERCENTILES):
+    """
+    Vectorized counterpart of utils.grade_statistics with percentiles added.
+
+    Args:
+        students (iterable): Student objects.
+        course (str): The course name to calculate statistics for.
+        percentiles (tuple, optional): Percentiles (0-100) to report.
+
+    Returns:
+        dict: average, median, mode, score_ranges, count and, when any are asked for,
+              percentiles ({p: value}); {} if no student has a grade for the course.
+    """
+    _, grades = grade_array(students, course)
+    if not len(grades):
+        return {}
+    return _summarize(grades, tuple(percentiles))
+
+
+def _course_columns(students, courses=None):
+    """
+    Gather every course's grades into float64 arrays without a Python-level step per grade.
+
+    The gradebooks' keys and values are flattened with C-level iterators,
+    each course name is mapped to a small integer code, and one stable
+    argsort on the codes groups the grades by course.
+
+    Returns:
+        dict: course -> float64 array of its grades, for the wanted courses that have any.
+    """
+    gradebooks = list(map(attrgetter('grades'), students))
+    total = sum(map(len, gradebooks))
+    if not total:
+        return {}
+    distinct = sorted(set(chain.from_iterable(gradebooks)))
+    code_of = {course: code for code, course in enumerate(distinct)}
+    # Sixteen-bit codes let NumPy's stable sort use a radix sort
+    dtype = np.uint16 if len(distinct) <= 1 << 16 else np.intp
+    codes = np.fromiter(map(code_of.__getitem__, chain.from_iterable(gradebooks)), dtype=dtype, count=total)
+    # Keys and values of a dict come out in the same order, so grades line up with codes
+    grades = np.fromiter(chain.from_iterable(map(dict.values, gradebooks)), dtype=np.float64, count=total)
+    grouped = grades[np.argsort(codes, kind='stable')]
+    ends = np.cumsum(np.bincount(codes, minlength=len(distinct))).tolist()
+    wanted = None if courses is None else set(courses)
+    columns = {}
+    start = 0
+    for course, end in zip(distinct, ends):
+        if wanted is None or course in wanted:
+            columns[course] = grouped[start:end]
+        start = end
+    return columns
+
+
+@metrics.timed('analytics.statistics_by_course')
+def statistics_by_course(students, courses=None, percentiles=DEFAULT_PERCENTILES):
+    """
+    Compute course_statistics() for many courses in a single pass over the students.
+
+    utils.grade_statistics_all(), the GUI's all-courses report and
+    'cli.py stats' go through here.
+
+    Args:
+        students (iterable): Objects with a grades dict, e.g. a table's iter_students()
+                             or the rows of utils.iter_student_rows().
+        courses (iterable, optional): Courses to report. Defaults to every course seen.
+        percentiles (tuple, optional): Percentiles (0-100) to report; () reports none.
+
+    Returns:
+        dict: course -> statistics dict, sorted by course name, for every course
+              with at least one grade.
+    """
+    percentiles = tuple(percentiles)
+    if np is None:
+        columns = utils.collect_course_grades(students, courses)
+    else:
+        columns = _course_columns(students, courses)
+    return {course: _summarize(columns[course], percentiles) for course in sorted(columns) if len(columns[course])}
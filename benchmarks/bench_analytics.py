@@ -0,0 +1,62 @@
+# benchmarks/bench_analytics.py
+"""
+Compare utils.grade_statistics with the analytics module.
+
+Usage:
+    python benchmarks/bench_analytics.py [--students 1000000] [--courses 100]
+
+Reports the nightly-report workload (statistics for every course) done
+course by course with utils.grade_statistics(), in one pure-Python pass
+(utils.collect_course_grades() + summarize_courses()), and with
+analytics.statistics_by_course(). Without NumPy installed the analytics
+figures are for its pure-Python fallback.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics  # noqa: E402
+from student import Student  # noqa: E402
+from utils import collect_course_grades, grade_statistics, summarize_courses  # noqa: E402
+
+
+def build_students(n, course_count, per_student=5):
+    rng = random.Random(11)
+    courses = [f"Course{i:03d}" for i in range(course_count)]
+    students = []
+    for i in range(n):
+        student = Student(f"S{i:08d}", f"Student {i}", 'Female', 20)
+        student.grades = {course: float(rng.randint(30, 100)) for course in rng.sample(courses, per_student)}
+        students.append(student)
+    return students, courses
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1_000_000)
+    parser.add_argument('--courses', type=int, default=100)
+    args = parser.parse_args()
+
+    students, courses = build_students(args.students, args.courses)
+    print(f"NumPy available: {analytics.HAVE_NUMPY}")
+
+    baseline = timed(lambda: [grade_statistics(students, course) for course in courses])
+    one_pass = timed(lambda: summarize_courses(collect_course_grades(students, courses)))
+    vectorized = timed(lambda: analytics.statistics_by_course(students, courses))
+    print(f"stats, all courses: utils {baseline:7.2f}s  one pass {one_pass:7.2f}s  analytics {vectorized:7.2f}s  "
+          f"({baseline / vectorized:5.1f}x, {one_pass / vectorized:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
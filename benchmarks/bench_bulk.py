@@ -0,0 +1,71 @@
+# benchmarks/bench_bulk.py
+"""
+Compare per-row insert()/delete() with the bulk table APIs.
+
+Usage:
+    python benchmarks/bench_bulk.py [--students 1000000]
+
+For each backend: filling an empty table row by row, with insert_many()
+and with insert_many(unique=True); then purging half of it with delete()
+and with delete_many(). The garbage collector is paused while timing, as
+load_from_file() does.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hash_table import HashTable  # noqa: E402
+from student import Student  # noqa: E402
+
+
+def timed(fn):
+    # The collector's passes over the growing heap would otherwise swamp the difference
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def fill_rows(ht, items):
+    for key, student in items:
+        ht.insert(key, student)
+
+
+def delete_rows(ht, keys):
+    for key in keys:
+        ht.delete(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    items = [(f"S{i:08d}", Student(f"S{i:08d}", "name", "Male", 20)) for i in range(args.students)]
+    purge = [key for key, _ in items[::2]]
+    print(f"{args.students:,} students")
+    for backend in ('chained', 'open'):
+        results = {}
+        ht = HashTable(backend=backend)
+        results['insert()'] = timed(lambda: fill_rows(ht, items))
+        results['delete()'] = timed(lambda: delete_rows(ht, purge))
+        ht = HashTable(backend=backend)
+        results['insert_many()'] = timed(lambda: ht.insert_many(items))
+        results['delete_many()'] = timed(lambda: ht.delete_many(purge))
+        ht = HashTable(backend=backend)
+        results['insert_many(unique)'] = timed(lambda: ht.insert_many(items, unique=True))
+        print(f"  {backend}:")
+        for label, seconds in results.items():
+            print(f"    {label:<20} {seconds:6.2f}s  {len(purge if 'delete' in label else items) / seconds:12,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
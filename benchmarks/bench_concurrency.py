@@ -0,0 +1,137 @@
+# benchmarks/bench_concurrency.py
+"""
+Stress-test ConcurrentHashTable and report throughput for 1, 4 and 8 threads.
+
+Usage:
+    python benchmarks/bench_concurrency.py [--threads 1 4 8] [--ops 50000] [--keys 20000]
+
+Writer threads run a mix of retrieve/insert/add_grade/delete while a
+checker thread keeps taking snapshots and saving the table to a file. Every
+stored student carries two grades that are only ever changed together
+(by insert, or two add_grade calls inside batch()), so a torn read shows
+up as a student whose two grades differ. The run fails if any snapshot
+or saved file is inconsistent.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent_table import ConcurrentHashTable  # noqa: E402
+from hash_table import HashTable  # noqa: E402
+from student import Student  # noqa: E402
+from utils import load_from_file, save_to_file  # noqa: E402
+
+
+def make_student(key, version):
+    student = Student(key, f"Student {key}", 'Female', 20)
+    student.grades = {'v': version, 'w': version}
+    return student
+
+
+def check(students, where, pause_every=None):
+    torn = []
+    for i, student in enumerate(students):
+        if student.grades['v'] != student.grades['w']:
+            torn.append(student.student_id)
+        if pause_every and i % pause_every == 0:
+            # Let the writers run mid-check: a snapshot must not change underneath us
+            time.sleep(0)
+    if torn:
+        raise AssertionError(f"{where}: {len(torn)} torn student(s), e.g. {torn[0]}")
+
+
+def writer(table, keys, ops, seed, counter):
+    rng = random.Random(seed)
+    done = 0
+    for i in range(ops):
+        key = keys[rng.randrange(len(keys))]
+        roll = rng.random()
+        if roll < 0.6:
+            table.retrieve(key)
+        elif roll < 0.85:
+            table.insert(key, make_student(key, i))
+        elif roll < 0.95:
+            # Two in-place edits made atomic by batch(); snapshots must never see just one
+            with table.batch():
+                table.add_grade(key, 'v', i)
+                time.sleep(0)  # invite a thread switch between the two edits
+                table.add_grade(key, 'w', i)
+        else:
+            table.delete(key)
+        done += 1
+    counter.append(done)
+
+
+def checker(table, stop, path, stats):
+    while not stop.is_set():
+        snapshot = table.snapshot()
+        check(snapshot.iter_students(), "snapshot", pause_every=50)
+        stats['snapshots'] += 1
+        if stats['snapshots'] % 10 == 1:
+            save_to_file(table, path)
+            loaded = HashTable()
+            load_from_file(loaded, path)
+            check(loaded.iter_students(), "saved file")
+            stats['saves'] += 1
+
+
+def run(threads, ops, key_count, path):
+    keys = [f"S{i:06d}" for i in range(key_count)]
+    table = ConcurrentHashTable()
+    for key in keys:
+        table.insert(key, make_student(key, 0))
+
+    counter = []
+    stop = threading.Event()
+    stats = {'snapshots': 0, 'saves': 0}
+    failures = []
+
+    def guarded(fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:  # surfaced after the run
+            failures.append(e)
+            stop.set()
+
+    workers = [threading.Thread(target=guarded, args=(writer, table, keys, ops, seed, counter))
+               for seed in range(threads)]
+    check_thread = threading.Thread(target=guarded, args=(checker, table, stop, path, stats))
+    start = time.perf_counter()
+    check_thread.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    check_thread.join()
+    if failures:
+        raise failures[0]
+    check(table.snapshot().iter_students(), "final table")
+    return sum(counter) / elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--ops', type=int, default=50_000, help="Operations per writer thread.")
+    parser.add_argument('--keys', type=int, default=20_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), 'bench_concurrency.txt')
+    for threads in args.threads:
+        throughput, stats = run(threads, args.ops, args.keys, path)
+        print(f"{threads:2d} thread(s): {throughput:10,.0f} ops/s  "
+              f"({stats['snapshots']} consistent snapshots, {stats['saves']} consistent saves)")
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_hash_table.py
+"""
+Compare the old fixed-size HashTable against the auto-resizing backends.
+
+Usage:
+    python benchmarks/bench_hash_table.py [--sizes 10000 100000 1000000] [--ops 2000]
+
+Each table is populated with N synthetic students and then timed over a
+fixed sample of retrieve / insert / delete operations. Populating a fixed
+100-bucket table through insert() is quadratic, so the fixed table is
+filled by appending to its buckets directly; the resulting layout is the
+same one insert() would produce for unique keys.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hash_table import HashTable  # noqa: E402
+from student import Student  # noqa: E402
+
+
+def make_keys(n):
+    return [f"S{i:08d}" for i in range(n)]
+
+
+def populate_fixed(keys):
+    ht = HashTable(max_load_factor=None)
+    ht.table = [[] for _ in range(ht.size)]
+    for key in keys:
+        ht.table[ht._hash(key)].append((key, Student(key, "name", "Male", 20)))
+    ht.count = len(keys)
+    return ht
+
+
+def populate_resizing(keys, backend='chained'):
+    ht = HashTable(backend=backend)
+    for key in keys:
+        ht.insert(key, Student(key, "name", "Male", 20))
+    return ht
+
+
+def time_ops(ht, keys, ops):
+    sample = random.sample(keys, min(ops, len(keys)))
+    results = {}
+
+    start = time.perf_counter()
+    for key in sample:
+        ht.retrieve(key)
+    results['retrieve'] = len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for key in sample:
+        ht.delete(key)
+    results['delete'] = len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for key in sample:
+        ht.insert(key, None)
+    results['insert'] = len(sample) / (time.perf_counter() - start)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--ops', type=int, default=2000, help="Operations timed per kind.")
+    args = parser.parse_args()
+
+    random.seed(42)
+    header = f"{'N':>9} {'table':>9} {'buckets':>9} {'max chain':>10} {'mean chain':>11} " \
+             f"{'build s':>8} {'retrieve/s':>12} {'delete/s':>12} {'insert/s':>12}"
+    print(header)
+    print('-' * len(header))
+    for n in args.sizes:
+        keys = make_keys(n)
+        for label, populate in (('fixed', populate_fixed), ('resizing', populate_resizing),
+                                ('open', lambda k: populate_resizing(k, 'open'))):
+            start = time.perf_counter()
+            ht = populate(keys)
+            build = time.perf_counter() - start
+            chains = ht.chain_lengths()
+            rates = time_ops(ht, keys, args.ops)
+            print(f"{n:>9} {label:>9} {chains['buckets']:>9} {chains['max_chain']:>10} "
+                  f"{chains['mean_chain']:>11.1f} {build:>8.2f} {rates['retrieve']:>12,.0f} "
+                  f"{rates['delete']:>12,.0f} {rates['insert']:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
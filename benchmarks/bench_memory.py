@@ -0,0 +1,66 @@
+# benchmarks/bench_memory.py
+"""
+Report the memory footprint of each HashTable backend with tracemalloc.
+
+Usage:
+    python benchmarks/bench_memory.py [--sizes 10000 100000 1000000] [--lookups 200000]
+
+Keys and Student values are allocated before tracing starts, so the
+"table" figure is the storage engine's own overhead (buckets, tuples,
+slot arrays). Lookup throughput over a random sample of keys is printed
+alongside as a rough locality comparison.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hash_table import BACKENDS, HashTable  # noqa: E402
+from student import Student  # noqa: E402
+
+
+def measure(backend, keys, values, lookups):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    ht = HashTable(backend=backend)
+    for key, value in zip(keys, values):
+        ht.insert(key, value)
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    current = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+
+    sample = random.sample(keys, min(lookups, len(keys)))
+    start = time.perf_counter()
+    for key in sample:
+        ht.retrieve(key)
+    rate = len(sample) / (time.perf_counter() - start)
+    return current, peak, rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--lookups', type=int, default=200_000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    header = f"{'N':>9} {'backend':>8} {'table MiB':>10} {'bytes/entry':>12} {'peak MiB':>9} {'lookups/s':>12}"
+    print(header)
+    print('-' * len(header))
+    for n in args.sizes:
+        keys = [f"S{i:08d}" for i in range(n)]
+        values = [Student(key, "name", "Female", 20) for key in keys]
+        for backend in BACKENDS:
+            current, peak, rate = measure(backend, keys, values, args.lookups)
+            print(f"{n:>9} {backend:>8} {current / 2**20:>10.1f} {current / n:>12.1f} "
+                  f"{peak / 2**20:>9.1f} {rate:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
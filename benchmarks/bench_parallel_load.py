@@ -0,0 +1,66 @@
+# benchmarks/bench_parallel_load.py
+"""
+Compare load_from_file() with load_from_file_parallel() on one text roster.
+
+Usage:
+    python benchmarks/bench_parallel_load.py [--students 1000000] [--workers 1 2 4 8] [--dir /tmp]
+
+Reports the serial load, then the parallel load for each worker count,
+with the time spent waiting on shard parsing separated from the merge into
+the table, which stays on one core. Scaling flattens once the parse is
+shorter than the merge.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils  # noqa: E402
+from bench_startup import build_table  # noqa: E402
+from hash_table import HashTable  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    path = os.path.join(args.dir, 'bench_parallel_load.txt')
+    utils.save_to_file(build_table(args.students), path)
+    print(f"{args.students:,} students, {os.path.getsize(path) / 2**20:.1f} MiB, {os.cpu_count()} core(s)")
+
+    serial = timed(lambda: utils.load_from_file(HashTable(), path))
+    print(f"  serial      : {serial:6.2f}s")
+
+    merge_only = timed(lambda: utils.load_from_file_parallel(HashTable(), path, executor=_Inline()))
+    for workers in args.workers:
+        elapsed = timed(lambda: utils.load_from_file_parallel(HashTable(), path, workers=workers))
+        print(f"  {workers:2d} worker(s): {elapsed:6.2f}s  ({serial / elapsed:4.2f}x serial)")
+    print(f"  parse + merge on one thread, no processes: {merge_only:6.2f}s")
+    os.remove(path)
+
+
+class _Inline:
+    """Executor that runs each shard immediately, to time the work without process overhead."""
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_query.py
+"""
+Time Query plans against the hand-written loops they replace.
+
+Usage:
+    python benchmarks/bench_query.py [--students 200000] [--repeat 5]
+
+Each case runs once through Query and once as a full scan over
+get_all_students() (filter, then sort), checks that both agree and prints
+the plan the query used. The first query over the table pays for building
+its indexes, so that is timed separately.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hash_table import HashTable  # noqa: E402
+from query import Query  # noqa: E402
+from student import Student  # noqa: E402
+
+COURSES = ['CG', 'AI', 'DB', 'OS', 'Math', 'Physics']
+
+
+def build_table(n):
+    rng = random.Random(11)
+    items = []
+    for i in range(n):
+        student = Student(f"S{i:07d}", f"Name{rng.randrange(50_000)} Family{rng.randrange(5_000)}",
+                          rng.choice(['Male', 'Female']), rng.randint(17, 30))
+        for course in rng.sample(COURSES, 3):
+            student.grades[course] = float(rng.randint(0, 100))
+        items.append((student.student_id, student))
+    ht = HashTable()
+    ht.insert_many(items, unique=True)
+    return ht
+
+
+def cases(ht):
+    """(label, query, equivalent scan) triples."""
+    yield ("course page, ordered by grade",
+           Query(ht).where(course='CG').order_by('-grade').limit(100),
+           lambda: sorted((s for s in ht.get_all_students() if 'CG' in s.grades),
+                          key=lambda s: s.grades['CG'], reverse=True)[:100])
+    yield ("filtered course, ordered by grade",
+           Query(ht).where(gender='Female', age__gte=20, course='CG', grade__lt=60).order_by('-grade').limit(100),
+           lambda: sorted((s for s in ht.get_all_students() if s.gender == 'Female' and s.age >= 20
+                           and 'CG' in s.grades and s.grades['CG'] < 60),
+                          key=lambda s: s.grades['CG'], reverse=True)[:100])
+    yield ("top 10 by total",
+           Query(ht).order_by('-total').limit(10),
+           lambda: sorted(ht.get_all_students(), key=lambda s: s.total_grade(), reverse=True)[:10])
+    yield ("one ID",
+           Query(ht).where(student_id='S0001234'),
+           lambda: [s for s in ht.get_all_students() if s.student_id == 'S0001234'])
+    yield ("first 50 of a gender",
+           Query(ht).where(gender='Male').limit(50),
+           lambda: [s for s in ht.get_all_students() if s.gender == 'Male'][:50])
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ht = build_table(args.students)
+    start = time.perf_counter()
+    Query(ht).where(course='CG').first()
+    print(f"{args.students:,} students: indexes built by the first query in {time.perf_counter() - start:.2f}s")
+
+    for label, query, scan in cases(ht):
+        query_time, found = timed(query.all, args.repeat)
+        scan_time, expected = timed(scan, args.repeat)
+        # Equal grades may come out in a different order, so compare the sort keys and the sets
+        if len(found) != len(expected) or (not query._order and {s.student_id for s in found} != {s.student_id for s in expected}):
+            raise AssertionError(f"{label}: query and scan disagree")
+        print(f"\n{label}: query {query_time * 1e3:9.3f} ms   scan {scan_time * 1e3:9.3f} ms"
+              f"   ({scan_time / query_time:,.0f}x)")
+        print("  " + query.explain().replace("\n", "\n  "))
+
+
+if __name__ == '__main__':
+    main()
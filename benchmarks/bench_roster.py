@@ -0,0 +1,91 @@
+# benchmarks/bench_roster.py
+"""
+Compare per-student memory of dict-backed, slotted and columnar students.
+
+Usage:
+    python benchmarks/bench_roster.py [--students 100000] [--courses 5]
+
+Every variant stores the same synthetic roster (IDs, names, genders, ages
+and a few grades per student) and is measured with tracemalloc from an
+empty heap, including the strings and grade dicts it owns.
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from roster import Roster  # noqa: E402
+from student import Student  # noqa: E402
+
+COURSES = ['Math', 'Physics', 'Chinese', 'English', 'CG', 'History', 'Biology', 'Art']
+
+
+class DictStudent:
+    """The pre-__slots__ Student, kept here as the baseline."""
+
+    def __init__(self, student_id, name, gender, age):
+        self.student_id = student_id
+        self.name = name
+        self.gender = gender
+        self.age = age
+        self.grades = {}
+
+
+def rows(n, courses_per_student):
+    rng = random.Random(7)
+    for i in range(n):
+        grades = {course: float(rng.randint(40, 100)) for course in rng.sample(COURSES, courses_per_student)}
+        yield f"S{i:08d}", f"Student {i}", rng.choice(['Male', 'Female']), rng.randint(17, 30), grades
+
+
+def build_objects(cls, n, courses_per_student):
+    students = {}
+    for student_id, name, gender, age, grades in rows(n, courses_per_student):
+        student = cls(student_id, name, gender, age)
+        student.grades = grades
+        students[student_id] = student
+    return students
+
+
+def build_roster(n, courses_per_student):
+    roster = Roster()
+    for student_id, name, gender, age, grades in rows(n, courses_per_student):
+        roster.add(student_id, name, gender, age, grades)
+    return roster
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=100_000)
+    parser.add_argument('--courses', type=int, default=5, help="Courses graded per student.")
+    args = parser.parse_args()
+
+    n, c = args.students, args.courses
+    variants = [
+        ('dict Student', lambda: build_objects(DictStudent, n, c)),
+        ('slotted Student', lambda: build_objects(Student, n, c)),
+        ('Roster', lambda: build_roster(n, c)),
+    ]
+    print(f"{'variant':>16} {'MiB':>8} {'bytes/student':>14}")
+    for label, build in variants:
+        size = measure(build)
+        print(f"{label:>16} {size / 2**20:>8.1f} {size / n:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_search.py
+"""
+Time search-as-you-type over a large table.
+
+Usage:
+    python benchmarks/bench_search.py [--students 1000000] [--limit 20]
+
+Reports the one-off cost of indexing the table (paid by the first search),
+then the latency of every keystroke while typing a few IDs and names, and
+of an insert and a delete once the index exists.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hash_table import HashTable  # noqa: E402
+from student import Student  # noqa: E402
+
+FIRST_NAMES = ['John', 'Jane', 'Ann', 'Anna', 'Mohammed', 'Wei', 'Olga', 'Pedro', 'Aisha', 'Kenji', 'Maria', 'Liam']
+LAST_NAMES = ['Smith', 'Khan', 'Garcia', 'Chen', 'Ivanova', 'Okafor', 'Müller', 'de la Cruz']
+TYPED = ['S0012345', 'john smith', 'ann k', 'müller', 'de la', 'wei chen', 'zzz']
+
+
+def build_table(n):
+    rng = random.Random(5)
+    # Pad the name pools so most names are not shared by thousands of students
+    first = FIRST_NAMES + [f"First{i}" for i in range(2000)]
+    last = LAST_NAMES + [f"Last{i}" for i in range(5000)]
+    ht = HashTable()
+    ht.insert_many([(f"S{i:07d}", Student(f"S{i:07d}", f"{rng.choice(first)} {rng.choice(last)}", 'Female', 20))
+                    for i in range(n)], unique=True)
+    return ht
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1_000_000)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    ht = build_table(args.students)
+    start = time.perf_counter()
+    ht.search('')
+    print(f"{args.students:,} students: index built in {time.perf_counter() - start:.2f}s")
+
+    worst = 0.0
+    for text in TYPED:
+        times = []
+        for end in range(1, len(text) + 1):
+            start = time.perf_counter()
+            matches = ht.search(text[:end], args.limit)
+            times.append(time.perf_counter() - start)
+        worst = max(worst, max(times))
+        print(f"  {text!r:14} {len(matches):3d} matches  mean {sum(times) / len(times) * 1e3:6.3f} ms"
+              f"  worst keystroke {max(times) * 1e3:6.3f} ms")
+    print(f"  worst keystroke overall: {worst * 1e3:.3f} ms")
+
+    new = [Student(f"NEW{i:04d}", 'New Student', 'Male', 18) for i in range(100)]
+    start = time.perf_counter()
+    for student in new:
+        ht.insert(student.student_id, student)
+    inserted = (time.perf_counter() - start) / len(new)
+    start = time.perf_counter()
+    for student in new:
+        ht.delete(student.student_id)
+    deleted = (time.perf_counter() - start) / len(new)
+    print(f"  insert {inserted * 1e3:.3f} ms, delete {deleted * 1e3:.3f} ms (mean of {len(new)}) with the index kept current")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_startup.py
+"""
+Time a cold load_from_file() of the same roster in text and binary formats.
+
+Usage:
+    python benchmarks/bench_startup.py [--students 1000000] [--dir /tmp]
+
+This is the work gui.main() does before the window appears. For .smsb the
+figure covers mapping the file, verifying its checksum, decoding the IDs
+and filling the table with lazy records; touching a record afterwards
+decodes just that record.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hash_table import HashTable  # noqa: E402
+from student import Student  # noqa: E402
+from utils import load_from_file, save_to_file  # noqa: E402
+
+COURSES = ['Math', 'Physics', 'Chinese', 'English', 'CG', 'History']
+
+
+def build_table(n):
+    rng = random.Random(3)
+    ht = HashTable()
+    for i in range(n):
+        student = Student(f"S{i:08d}", f"Student {i}", rng.choice(['Male', 'Female']), rng.randint(17, 30))
+        student.grades = {course: float(rng.randint(40, 100)) for course in rng.sample(COURSES, 3)}
+        ht.insert(student.student_id, student)
+    return ht
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1_000_000)
+    parser.add_argument('--dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    source = build_table(args.students)
+    for ext in ('.txt', '.smsb'):
+        path = os.path.join(args.dir, f"bench_startup{ext}")
+        start = time.perf_counter()
+        save_to_file(source, path)
+        save_time = time.perf_counter() - start
+
+        ht = HashTable()
+        start = time.perf_counter()
+        load_from_file(ht, path)
+        load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ht.retrieve(f"S{args.students // 2:08d}").total_grade()
+        first_access = time.perf_counter() - start
+
+        print(f"{ext:>6}: {os.path.getsize(path) / 2**20:7.1f} MiB  save {save_time:6.2f}s  "
+              f"load {load_time:6.2f}s  first record access {first_access * 1e6:6.1f}us")
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/generate.py
+"""
+Synthetic rosters for the benchmarks.
+
+Usage:
+    python benchmarks/generate.py out.txt [--students 100000] [--courses-per-student 3]
+                                          [--courses 12] [--skew 1.0] [--seed 0]
+
+The output format follows the extension (.txt, .csv or .smsb), as
+save_to_file() does. The same arguments always produce the same roster.
+"""
+
+import argparse
+import os
+import random
+import sys
+from bisect import bisect_right
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hash_table import HashTable  # noqa: E402
+from student import Student  # noqa: E402
+
+BASE_COURSES = ['Math', 'Physics', 'Chinese', 'English', 'CG', 'History', 'AI', 'DB', 'OS', 'Biology']
+FIRST_NAMES = ['John', 'Jane', 'Ann', 'Usama', 'Wei', 'Olga', 'Pedro', 'Aisha', 'Kenji', 'Maria', 'Liam', 'Salma']
+LAST_NAMES = ['Smith', 'Khan', 'Garcia', 'Chen', 'Ivanova', 'Okafor', 'Müller', 'Wahab']
+
+
+def _zipf_weights(count, skew):
+    """Cumulative weights where item i is picked in proportion to 1 / (i + 1) ** skew."""
+    return list(accumulate(1 / (i + 1) ** skew for i in range(count)))
+
+
+def _pick(rng, cumulative):
+    return bisect_right(cumulative, rng.random() * cumulative[-1])
+
+
+def course_names(count):
+    """The first count course names: the usual subjects, then numbered electives."""
+    return (BASE_COURSES + [f"Elective{i}" for i in range(max(0, count - len(BASE_COURSES)))])[:count]
+
+
+def generate_students(count, courses_per_student=3, courses=12, skew=1.0, seed=0):
+    """
+    Yield a reproducible synthetic roster.
+
+    Args:
+        count (int): Number of students.
+        courses_per_student (int, optional): Grades recorded per student (capped at courses).
+        courses (int, optional): Number of distinct courses.
+        skew (float, optional): Zipf exponent for course popularity and name frequency.
+                                0 picks uniformly; larger values crowd students into the
+                                first courses and the most common names.
+        seed (int, optional): Random seed.
+
+    Yields:
+        Student: IDs S00000000, S00000001, ... in order.
+    """
+    rng = random.Random(seed)
+    names = course_names(courses)
+    per_student = min(courses_per_student, courses)
+    course_weights = _zipf_weights(courses, skew)
+    # Name pools padded so names repeat, but not across the whole roster
+    first = FIRST_NAMES + [f"First{i}" for i in range(max(0, count // 200))]
+    last = LAST_NAMES + [f"Last{i}" for i in range(max(0, count // 100))]
+    first_weights = _zipf_weights(len(first), skew)
+    last_weights = _zipf_weights(len(last), skew)
+    for i in range(count):
+        student_id = f"S{i:08d}"
+        name = f"{first[_pick(rng, first_weights)]} {last[_pick(rng, last_weights)]}"
+        student = Student(student_id, name, 'Female' if rng.random() < 0.5 else 'Male', rng.randint(17, 30))
+        grades = {}
+        while len(grades) < per_student:
+            course = names[_pick(rng, course_weights)]
+            if course not in grades:
+                grades[course] = float(min(100, max(0, round(rng.gauss(70, 15)))))
+        student.grades = grades
+        yield student
+
+
+def generate_table(count, table=None, **options):
+    """
+    Fill a store with generate_students() in one bulk insert.
+
+    Args:
+        count (int): Number of students.
+        table (optional): Store to fill. Defaults to a new HashTable.
+        **options: Passed on to generate_students().
+
+    Returns:
+        The filled store.
+    """
+    table = HashTable() if table is None else table
+    table.insert_many(((s.student_id, s) for s in generate_students(count, **options)), unique=True)
+    return table
+
+
+def main():
+    from utils import save_to_file
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--students', type=int, default=100_000)
+    parser.add_argument('--courses-per-student', type=int, default=3)
+    parser.add_argument('--courses', type=int, default=12)
+    parser.add_argument('--skew', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    table = generate_table(args.students, courses_per_student=args.courses_per_student,
+                           courses=args.courses, skew=args.skew, seed=args.seed)
+    save_to_file(table, args.path)
+    print(f"Wrote {len(table):,} students to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
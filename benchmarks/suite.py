@@ -0,0 +1,307 @@
+# benchmarks/suite.py
+"""
+Run the core benchmarks at several roster sizes and record the results as JSON.
+
+Usage:
+    python benchmarks/suite.py [--scales 1000 100000 1000000] [--only hashtable persistence]
+                               [--output results.json] [--compare baseline.json]
+                               [--threshold 0.25]
+    python benchmarks/suite.py --compare baseline.json results.json
+
+Cases (grouped by the prefix before the dot):
+    hashtable.insert / retrieve / delete     per-key operations on a HashTable
+    persistence.save_txt / save_csv          save_to_file()
+    persistence.load_txt / load_csv          load_from_file() into an empty table
+    analytics.sort_grades / sort_grades_top  utils.sort_grades() over one course, all / first 50
+    analytics.grade_statistics               utils.grade_statistics() for one course
+    gui.display / display_sorted             building the Display tab's row source and its
+                                             first screen of rows, as display_all_students() does
+                                             (needs ttkbootstrap; skipped without it)
+
+Rosters come from generate.py (--courses-per-student, --courses and --skew
+shape them). Each case reports the best of --repeat runs with the garbage
+collector paused. With --compare, every case that got slower than the
+baseline by more than --threshold (and by more than NOISE_FLOOR seconds)
+is flagged, and the exit status is 1 if any was.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate import course_names, generate_students  # noqa: E402
+from hash_table import HashTable  # noqa: E402
+from utils import grade_statistics, load_from_file, save_to_file, sort_grades  # noqa: E402
+
+# Slowdowns smaller than this many seconds are timer noise, whatever the ratio
+NOISE_FLOOR = 0.002
+
+# Per-key operations timed at each scale (the insert case always covers the whole roster)
+SAMPLE_OPS = 100_000
+
+# Rows on one screen of the Display tab
+SCREEN_ROWS = 20
+
+
+class Skipped(Exception):
+    """Raised by a case that cannot run here; the reason is recorded instead of a time."""
+
+
+def timed(fn, repeat, setup=None):
+    """
+    Return the best wall time of fn() over repeat runs.
+
+    Args:
+        fn (callable): Called with setup()'s result, or with no arguments.
+        repeat (int): Number of runs.
+        setup (callable, optional): Builds fresh input for each run, untimed.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        # The collector's passes over a large heap would otherwise dominate some runs
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn(arg) if setup else fn()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+# ----------------------------------------------------------------------
+# Cases: each takes the run context and returns (seconds, operations)
+# ----------------------------------------------------------------------
+
+def case_insert(ctx):
+    students = ctx['students']
+
+    def fill(table):
+        for student in students:
+            table.insert(student.student_id, student)
+    return timed(fill, ctx['repeat'], setup=HashTable), len(students)
+
+
+def case_retrieve(ctx):
+    table, sample = ctx['table'], ctx['sample']
+
+    def run():
+        for key in sample:
+            table.retrieve(key)
+    return timed(run, ctx['repeat']), len(sample)
+
+
+def case_delete(ctx):
+    students, sample = ctx['students'], ctx['sample']
+
+    def run(table):
+        for key in sample:
+            table.delete(key)
+    return timed(run, ctx['repeat'], setup=lambda: _copy_table(students)), len(sample)
+
+
+def _copy_table(students):
+    table = HashTable()
+    table.insert_many(((s.student_id, s) for s in students), unique=True)
+    return table
+
+
+def _save_case(ext):
+    def case(ctx):
+        path = ctx['path'] + ext
+        seconds = timed(lambda: save_to_file(ctx['table'], path), ctx['repeat'])
+        return seconds, len(ctx['table'])
+    return case
+
+
+def _load_case(ext):
+    def case(ctx):
+        path = ctx['path'] + ext
+        if not os.path.exists(path):
+            save_to_file(ctx['table'], path)
+        seconds = timed(lambda table: load_from_file(table, path), ctx['repeat'], setup=HashTable)
+        return seconds, len(ctx['table'])
+    return case
+
+
+def case_sort_grades(ctx):
+    students = ctx['students']
+    return timed(lambda: sort_grades(students, ctx['course']), ctx['repeat']), len(students)
+
+
+def case_sort_grades_top(ctx):
+    students = ctx['students']
+    return timed(lambda: sort_grades(students, ctx['course'], 'Descending', limit=50), ctx['repeat']), len(students)
+
+
+def case_grade_statistics(ctx):
+    students = ctx['students']
+    return timed(lambda: grade_statistics(students, ctx['course']), ctx['repeat']), len(students)
+
+
+def _display_case(sort_column):
+    def case(ctx):
+        try:
+            from virtual_tree import StudentRowSource
+        except ImportError as e:
+            raise Skipped(f"virtual_tree unavailable: {e}")
+
+        def run():
+            StudentRowSource(ctx['table'], sort_column).rows(0, SCREEN_ROWS)
+        return timed(run, ctx['repeat']), len(ctx['table'])
+    return case
+
+
+CASES = {
+    'hashtable.insert': case_insert,
+    'hashtable.retrieve': case_retrieve,
+    'hashtable.delete': case_delete,
+    'persistence.save_txt': _save_case('.txt'),
+    'persistence.save_csv': _save_case('.csv'),
+    'persistence.load_txt': _load_case('.txt'),
+    'persistence.load_csv': _load_case('.csv'),
+    'analytics.sort_grades': case_sort_grades,
+    'analytics.sort_grades_top': case_sort_grades_top,
+    'analytics.grade_statistics': case_grade_statistics,
+    'gui.display': _display_case(None),
+    'gui.display_sorted': _display_case('Total'),
+}
+
+
+def selected_cases(only):
+    if not only:
+        return list(CASES)
+    names = [name for name in CASES if any(name == o or name.startswith(o + '.') for o in only)]
+    if not names:
+        raise ValueError(f"No benchmark matches {only}. Cases: {', '.join(CASES)}")
+    return names
+
+
+def run_suite(scales, names, repeat=3, roster_options=None, workdir=None):
+    """
+    Run the named cases at every scale.
+
+    Returns:
+        dict: {'meta': {...}, 'results': [{'case', 'students', 'seconds', 'ops', 'per_op_us'}
+               or {'case', 'students', 'skipped'}, ...]}
+    """
+    roster_options = roster_options or {}
+    workdir = workdir or tempfile.gettempdir()
+    results = []
+    for scale in scales:
+        students = list(generate_students(scale, **roster_options))
+        rng = random.Random(scale)
+        keys = [s.student_id for s in students]
+        ctx = {
+            'students': students,
+            'table': _copy_table(students),
+            'sample': rng.sample(keys, min(SAMPLE_OPS, len(keys))),
+            # The most popular course, which the skew makes the largest
+            'course': course_names(roster_options.get('courses', 12))[0],
+            'path': os.path.join(workdir, f"bench_suite_{scale}"),
+            'repeat': repeat,
+        }
+        for name in names:
+            entry = {'case': name, 'students': scale}
+            try:
+                seconds, ops = CASES[name](ctx)
+            except Skipped as e:
+                entry['skipped'] = str(e)
+                print(f"{name:28} {scale:>10,}   skipped: {e}")
+            else:
+                entry.update(seconds=seconds, ops=ops, per_op_us=seconds / ops * 1e6 if ops else None)
+                print(f"{name:28} {scale:>10,}   {seconds:10.4f} s")
+            results.append(entry)
+        for ext in ('.txt', '.csv'):
+            if os.path.exists(ctx['path'] + ext):
+                os.remove(ctx['path'] + ext)
+    meta = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'roster': roster_options,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare two result sets case by case.
+
+    Returns:
+        list: (case, students, baseline seconds, current seconds, ratio, regressed) rows,
+              for the cases timed in both.
+    """
+    before = {(r['case'], r['students']): r['seconds'] for r in baseline['results'] if 'seconds' in r}
+    rows = []
+    for result in current['results']:
+        key = (result['case'], result['students'])
+        if 'seconds' not in result or key not in before:
+            continue
+        old, new = before[key], result['seconds']
+        ratio = new / old if old else float('inf')
+        regressed = ratio > 1 + threshold and new - old > NOISE_FLOOR
+        rows.append((*key, old, new, ratio, regressed))
+    return rows
+
+
+def print_comparison(rows):
+    print(f"\n{'case':28} {'students':>10} {'baseline s':>11} {'current s':>11} {'ratio':>7}")
+    for case, students, old, new, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{case:28} {students:>10,} {old:11.4f} {new:11.4f} {ratio:7.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('results', nargs='?', help="Compare this results file instead of running the suite.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--only', nargs='+', help="Case names or groups (e.g. hashtable, gui.display).")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--courses-per-student', type=int, default=3)
+    parser.add_argument('--courses', type=int, default=12)
+    parser.add_argument('--skew', type=float, default=1.0)
+    parser.add_argument('--output', help="Write the results here as JSON.")
+    parser.add_argument('--compare', metavar='BASELINE', help="Flag regressions against this results file.")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown before a case is flagged, as a fraction (default 0.25).")
+    parser.add_argument('--dir', default=tempfile.gettempdir(), help="Where the persistence cases write files.")
+    args = parser.parse_args()
+
+    if args.results:
+        if not args.compare:
+            parser.error("a results file is only used with --compare")
+        with open(args.results, encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        roster = {'courses_per_student': args.courses_per_student, 'courses': args.courses, 'skew': args.skew}
+        current = run_suite(args.scales, selected_cases(args.only), args.repeat, roster, args.dir)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(current, f, indent=2)
+            print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(baseline, current, args.threshold)
+        print_comparison(rows)
+        regressions = sum(1 for row in rows if row[-1])
+        if regressions:
+            print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}.")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == '__main__':
+    main()
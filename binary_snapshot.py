@@ -0,0 +1,372 @@
+# binary_snapshot.py
+
+import mmap
+import os
+import struct
+import sys
+import weakref
+import zlib
+from array import array
+from itertools import accumulate
+
+from student import Student
+
+MAGIC = b'SMSB'
+VERSION = 1
+
+# magic, version, flags, student count, string count, grade count, CRC-32 of everything after the header
+_HEADER = struct.Struct('<4sHHIIQI4x')
+# (offset, length) of each section, in SECTIONS order, follows the header
+_SECTION_ENTRY = struct.Struct('<QQ')
+
+SECTIONS = (
+    'ids',             # UTF-8 student IDs joined by NUL, in row order
+    'string_offsets',  # u64 x (strings + 1): string table boundaries
+    'string_data',     # UTF-8 string table holding names, genders and course names
+    'names',           # u32 x students: string index of each name
+    'genders',         # u32 x students: string index of each gender
+    'ages',            # i32 x students
+    'grade_offsets',   # u64 x (students + 1): each student's slice of the grade arrays
+    'grade_courses',   # u32 x grades: string index of each course
+    'grade_values',    # f64 x grades
+)
+_TYPECODES = {
+    'string_offsets': 'Q',
+    'names': 'I',
+    'genders': 'I',
+    'ages': 'i',
+    'grade_offsets': 'Q',
+    'grade_courses': 'I',
+    'grade_values': 'd',
+}
+_PREAMBLE_SIZE = _HEADER.size + _SECTION_ENTRY.size * len(SECTIONS)
+_ALIGN = 8
+
+
+class SnapshotFormatError(ValueError):
+    """Raised when a file is not a valid binary snapshot."""
+
+
+def _little_endian_bytes(values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_snapshot(students):
+    """
+    Encode students into the binary snapshot format.
+
+    Args:
+        students (iterable): Student objects (or anything with the same attributes).
+
+    Yields:
+        bytes: The file contents in order: header, section table, then each section.
+    """
+    ids = []
+    names = array('I')
+    genders = array('I')
+    ages = array('i')
+    grade_offsets = array('Q', [0])
+    grade_courses = array('I')
+    grade_values = array('d')
+    string_index = {}
+    strings = []
+
+    def intern(value):
+        index = string_index.get(value)
+        if index is None:
+            index = string_index[value] = len(strings)
+            strings.append(value)
+        return index
+
+    for student in students:
+        ids.append(student.student_id)
+        names.append(intern(student.name))
+        genders.append(intern(student.gender))
+        ages.append(int(student.age))
+        for course, grade in student.grades.items():
+            grade_courses.append(intern(course))
+            grade_values.append(float(grade))
+        grade_offsets.append(len(grade_values))
+
+    encoded = [value.encode('utf-8') for value in strings]
+    string_offsets = array('Q', accumulate((len(value) for value in encoded), initial=0))
+    payloads = {
+        'ids': '\0'.join(ids).encode('utf-8'),
+        'string_offsets': _little_endian_bytes(string_offsets),
+        'string_data': b''.join(encoded),
+        'names': _little_endian_bytes(names),
+        'genders': _little_endian_bytes(genders),
+        'ages': _little_endian_bytes(ages),
+        'grade_offsets': _little_endian_bytes(grade_offsets),
+        'grade_courses': _little_endian_bytes(grade_courses),
+        'grade_values': _little_endian_bytes(grade_values),
+    }
+
+    table = []
+    body = []
+    offset = _PREAMBLE_SIZE
+    for name in SECTIONS:
+        payload = payloads[name]
+        table.append(_SECTION_ENTRY.pack(offset, len(payload)))
+        padding = -len(payload) % _ALIGN
+        body.append(payload)
+        body.append(b'\0' * padding)
+        offset += len(payload) + padding
+
+    table_bytes = b''.join(table)
+    crc = zlib.crc32(table_bytes)
+    for chunk in body:
+        crc = zlib.crc32(chunk, crc)
+    yield _HEADER.pack(MAGIC, VERSION, 0, len(ids), len(strings), len(grade_values), crc)
+    yield table_bytes
+    yield from body
+
+
+# Snapshots whose memory map is open, so one can be released before its file is replaced
+_open_snapshots = weakref.WeakSet()
+
+
+def detach_snapshots(file_path):
+    """
+    Detach every open snapshot of file_path from the file (see BinarySnapshot.detach()).
+
+    Called before file_path is overwritten, so the snapshot's undecoded
+    records keep their old contents and no handle on the file remains.
+    """
+    path = os.path.abspath(file_path)
+    for snapshot in list(_open_snapshots):
+        if os.path.abspath(snapshot.file_path) == path:
+            snapshot.detach()
+
+
+def read_checksum(file_path):
+    """
+    Read the CRC-32 recorded in a snapshot's header without mapping or checking the rest of the file.
+
+    Raises:
+        SnapshotFormatError: If the file does not start with a binary snapshot header.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+        raise SnapshotFormatError(f"'{file_path}' is not a binary snapshot.")
+    return _HEADER.unpack(header)[-1]
+
+
+class BinarySnapshot:
+    def __init__(self, file_path, verify=True):
+        """
+        Memory-map a binary snapshot and expose its records without decoding them up front.
+
+        The mapping stays open while the snapshot is referenced (LazyStudents
+        decode from it). close() releases it early; a with block closes it on exit.
+
+        Args:
+            file_path (str): The .smsb file to open.
+            verify (bool, optional): Check the CRC-32 of the whole file. Defaults to True.
+
+        Raises:
+            SnapshotFormatError: If the file is not a valid, intact snapshot.
+        """
+        self.file_path = file_path
+        self._views = []
+        with open(file_path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotFormatError(f"'{file_path}' is empty.")
+        try:
+            self._map(self._mmap, verify)
+        except BaseException:
+            self.close()
+            raise
+        self._strings = [None] * self.string_count
+        self._ids = None
+        _open_snapshots.add(self)
+
+    def _map(self, buffer, verify=False):
+        """Point the sections at buffer, which holds the whole snapshot file."""
+        file_path = self.file_path
+        if len(buffer) < _PREAMBLE_SIZE:
+            raise SnapshotFormatError(f"'{file_path}' is too short to be a binary snapshot.")
+
+        magic, version, _, self.student_count, self.string_count, self.grade_count, crc = \
+            _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise SnapshotFormatError(f"'{file_path}' is not a binary snapshot.")
+        if version != VERSION:
+            raise SnapshotFormatError(f"'{file_path}' uses unsupported snapshot version {version}.")
+        view = memoryview(buffer)
+        # Every view into the mapping must be released before it can be closed
+        views = self._views
+        views.append(view)
+        if verify:
+            body = view[_HEADER.size:]
+            views.append(body)
+            if zlib.crc32(body) != crc:
+                raise SnapshotFormatError(f"'{file_path}' failed its checksum; the file is damaged or incomplete.")
+
+        self._sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = _SECTION_ENTRY.unpack_from(buffer, _HEADER.size + i * _SECTION_ENTRY.size)
+            if offset + length > len(buffer):
+                raise SnapshotFormatError(f"'{file_path}' has a truncated '{name}' section.")
+            section = view[offset:offset + length]
+            views.append(section)
+            typecode = _TYPECODES.get(name)
+            if typecode is not None:
+                if sys.byteorder == 'little':
+                    section = section.cast(typecode)
+                    views.append(section)
+                else:
+                    section = array(typecode, section.tobytes())
+                    section.byteswap()
+            self._sections[name] = section
+
+        self._names = self._sections['names']
+        self._genders = self._sections['genders']
+        self._ages = self._sections['ages']
+        self._grade_offsets = self._sections['grade_offsets']
+        self._grade_courses = self._sections['grade_courses']
+        self._grade_values = self._sections['grade_values']
+        self._string_offsets = self._sections['string_offsets']
+        self._string_data = self._sections['string_data']
+
+    def _release_views(self):
+        views, self._views = self._views, []
+        for view in reversed(views):
+            view.release()
+
+    @property
+    def closed(self):
+        return self._mmap is None
+
+    def close(self):
+        """
+        Release the memory map and the file behind it.
+
+        Records that have not been decoded yet can no longer be; call detach()
+        instead while LazyStudents may still need them.
+        """
+        if self._mmap is None:
+            return
+        self._release_views()
+        self._sections = {}
+        self._mmap.close()
+        self._mmap = None
+        _open_snapshots.discard(self)
+
+    def detach(self):
+        """
+        Copy the snapshot into memory and release the memory map.
+
+        Records keep decoding from the copy, and the file can then be
+        replaced or deleted (Windows refuses while it is mapped).
+        """
+        if self._mmap is None:
+            return
+        data = self._mmap[:]
+        self._release_views()
+        self._mmap.close()
+        self._mmap = None
+        _open_snapshots.discard(self)
+        self._map(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.student_count
+
+    def student_ids(self):
+        """Decode every student ID in one pass (IDs are needed up front as table keys)."""
+        if self._ids is None:
+            if self.student_count:
+                self._ids = bytes(self._sections['ids']).decode('utf-8').split('\0')
+            else:
+                self._ids = []
+        return self._ids
+
+    def string(self, index):
+        value = self._strings[index]
+        if value is None:
+            start = self._string_offsets[index]
+            end = self._string_offsets[index + 1]
+            value = self._strings[index] = bytes(self._string_data[start:end]).decode('utf-8')
+        return value
+
+    def grades(self, index):
+        start = self._grade_offsets[index]
+        end = self._grade_offsets[index + 1]
+        string = self.string
+        courses = self._grade_courses
+        values = self._grade_values
+        return {string(courses[i]): values[i] for i in range(start, end)}
+
+    def decode(self, index):
+        """Build the Student stored at row index."""
+        student = Student(self.student_ids()[index], self.string(self._names[index]),
+                          self.string(self._genders[index]), self._ages[index])
+        student.grades = self.grades(index)
+        return student
+
+    def __iter__(self):
+        for index in range(self.student_count):
+            yield self.decode(index)
+
+
+class LazyStudent:
+    """
+    Placeholder for a snapshot record that decodes it into a Student on first use.
+
+    Attribute reads and writes are forwarded to the decoded Student. Once
+    decoded, the snapshot reference is dropped so the mapping can be
+    released when no undecoded records remain.
+    """
+    __slots__ = ('_snapshot', '_index', '_student')
+
+    def __init__(self, snapshot, index):
+        self._snapshot = snapshot
+        self._index = index
+        self._student = None
+
+    def materialize(self):
+        student = self._student
+        if student is None:
+            student = self._student = self._snapshot.decode(self._index)
+            self._snapshot = None
+        return student
+
+    def _forward(name):
+        def get(self):
+            return getattr(self.materialize(), name)
+
+        def set(self, value):
+            setattr(self.materialize(), name, value)
+        return property(get, set)
+
+    student_id = _forward('student_id')
+    name = _forward('name')
+    gender = _forward('gender')
+    age = _forward('age')
+    grades = _forward('grades')
+    del _forward
+
+    def add_grade(self, course, grade):
+        self.materialize().add_grade(course, grade)
+
+    def total_grade(self):
+        return self.materialize().total_grade()
+
+    def to_dict(self):
+        return self.materialize().to_dict()
+
+    def __reduce__(self):
+        # Pickle as the plain Student; the memory map cannot cross processes
+        return Student.from_dict, (self.materialize().to_dict(),)
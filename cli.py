@@ -0,0 +1,399 @@
+# cli.py
+"""
+Non-interactive command line for batch jobs.
+
+Usage:
+    python cli.py import SOURCE... [--file students.txt | --db PATH] [--skip-existing]
+    python cli.py export DEST [--file students.txt | --db PATH] [--format csv|jsonl|json]
+    python cli.py stats [--course COURSE...] [--file ... | --db ...] [--format json|csv]
+    python cli.py query [--where FIELD[__LOOKUP]=VALUE...] [--order-by=[-]FIELD,...]
+                        [--limit N] [--offset N] [--fields a,b,...] [--format jsonl|csv|json]
+    python cli.py bench [--file ... | --db ...] [--repeat 3]
+
+Every command reads students.txt unless --file or --db says otherwise; only
+import creates it, the other commands fail if it does not exist.
+Text and binary roster files are streamed wherever the command allows it:
+stats and query read them batch by batch without building a table, and
+export to '-' (stdout) writes rows as they are read. Results go to stdout
+as JSON, JSON lines or CSV; errors go to stderr with exit status 1.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from hash_table import HashTable
+from indexes import SCORE_RANGES
+from query import FIELDS, Query
+from sqlite_store import SQLiteStudentStore
+from student import Student
+from utils import (BINARY_EXTENSION, CorruptFileError, change_log_path, grade_statistics_all,
+                   iter_student_rows, iter_students, load_from_file, load_from_file_parallel, save_changes,
+                   save_to_file, verify_snapshot)
+
+DEFAULT_FILE = 'students.txt'
+
+# Students passed to one insert_many() call while importing
+IMPORT_BATCH_SIZE = 10000
+
+# Fields whose --where values are numbers
+NUMERIC_FIELDS = ('age', 'total', 'grade')
+
+# Fields written by query and export unless --fields says otherwise
+DEFAULT_FIELDS = ('student_id', 'name', 'gender', 'age', 'grades')
+
+# Columns of the per-course statistics in CSV output
+STATS_COLUMNS = ('Course', 'Students', 'Average', 'Median', 'Mode')
+
+
+class RosterFile:
+    """
+    A roster file read straight from disk, for commands that only need to stream it.
+
+    Offers iter_students(), which is all Query needs to scan, without
+    loading the file into a table.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        verify_snapshot(file_path)
+
+    def iter_students(self):
+        return iter_students(self.file_path)
+
+    def iter_rows(self):
+        """Parsed rows (with .grades) for grade_statistics_all(), skipping Student construction."""
+        return (row for batch in iter_student_rows(self.file_path) for row in batch)
+
+
+def open_store(args):
+    """Open --db as a SQLiteStudentStore, or load --file into a HashTable."""
+    if args.db:
+        return SQLiteStudentStore(args.db)
+    table = HashTable()
+    load_from_file_parallel(table, args.file)
+    return table
+
+
+def require_source(args):
+    """
+    Check that the roster a read-only command reads exists.
+
+    open_store() would otherwise start an empty table (or create an empty
+    database) and the command would quietly report nothing.
+    """
+    path = args.db or args.file
+    if not os.path.exists(path):
+        raise ValueError(f"'{path}' not found.")
+
+
+def open_source(args):
+    """
+    Open what a read-only command reads.
+
+    A roster file is streamed unless a change log is pending next to it:
+    only load_from_file() applies the log, so the file is loaded then.
+    """
+    require_source(args)
+    if args.db or os.path.exists(change_log_path(args.file)):
+        return open_store(args)
+    return RosterFile(args.file)
+
+
+def make_student(row):
+    student = Student(row.student_id, row.name, row.gender, row.age)
+    student.grades = row.grades
+    return student
+
+
+def close(store):
+    if isinstance(store, SQLiteStudentStore):
+        store.close()
+
+
+def parse_condition(text):
+    """
+    Parse one --where argument.
+
+    Args:
+        text (str): FIELD[__LOOKUP]=VALUE, e.g. 'age__gte=20' or 'course__in=CG,AI'.
+
+    Returns:
+        tuple: (keyword for Query.where(), value)
+    """
+    name, sep, value = text.partition('=')
+    if not sep:
+        raise ValueError(f"Expected FIELD[__LOOKUP]=VALUE, got '{text}'.")
+    field, _, lookup = name.partition('__')
+    values = value.split(',') if lookup == 'in' else [value]
+    if field in NUMERIC_FIELDS:
+        try:
+            values = [float(v) if '.' in v else int(v) for v in values]
+        except ValueError:
+            raise ValueError(f"'{field}' needs a number, got '{value}'.")
+    return name, values if lookup == 'in' else values[0]
+
+
+def field_value(student, field, course):
+    if field == 'grades':
+        return student.grades
+    if field == 'total':
+        return student.total_grade()
+    if field == 'grade':
+        return student.grades.get(course)
+    return getattr(student, field)
+
+
+class RowWriter:
+    """Write dict rows to a stream as CSV, JSON lines or one JSON array."""
+
+    def __init__(self, stream, fields, fmt):
+        self.stream = stream
+        self.fields = fields
+        self.format = fmt
+        self.count = 0
+        if fmt == 'csv':
+            self._csv = csv.writer(stream)
+            self._csv.writerow(fields)
+        elif fmt == 'json':
+            stream.write('[')
+
+    def write(self, row):
+        if self.format == 'csv':
+            # Grades are written as JSON, as in the roster files
+            self._csv.writerow([json.dumps(v) if isinstance(v, dict) else v for v in row.values()])
+        elif self.format == 'json':
+            self.stream.write((',\n' if self.count else '\n') + json.dumps(row))
+        else:
+            self.stream.write(json.dumps(row) + '\n')
+        self.count += 1
+
+    def close(self):
+        if self.format == 'json':
+            self.stream.write('\n]\n' if self.count else ']\n')
+
+
+def write_students(students, stream, fields, fmt, course=None):
+    writer = RowWriter(stream, fields, fmt)
+    for student in students:
+        writer.write({field: field_value(student, field, course) for field in fields})
+    writer.close()
+    return writer.count
+
+
+def print_json(data):
+    json.dump(data, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+# ----------------------------------------------------------------------
+# Commands
+# ----------------------------------------------------------------------
+
+def cmd_import(args):
+    """Merge roster files into the target store with bulk inserts, then save it."""
+    for source in args.sources:
+        if not os.path.exists(source):
+            raise ValueError(f"'{source}' does not exist.")
+        verify_snapshot(source)
+    store = open_store(args)
+    read = applied = conflicts = 0
+    try:
+        with store.batch():
+            for source in args.sources:
+                for batch in iter_student_rows(source, IMPORT_BATCH_SIZE):
+                    result = store.insert_many([(row.student_id, make_student(row)) for row in batch],
+                                               replace=not args.skip_existing)
+                    read += len(batch)
+                    applied += result.applied
+                    conflicts += len(result.conflicts)
+        if not args.db:
+            # Appends the imported students to the change log, compacting it once it grows large
+            save_changes(store, args.file)
+        total = len(store)
+    finally:
+        close(store)
+    print_json({'read': read, 'applied': applied, 'conflicts': conflicts, 'total': total})
+
+
+def cmd_export(args):
+    """Write the roster to a file (any roster format) or stream it to stdout."""
+    if args.dest == '-':
+        source = open_source(args)
+        try:
+            count = write_students(source.iter_students(), sys.stdout, DEFAULT_FIELDS, args.format or 'csv')
+        finally:
+            close(source)
+        print(f"Exported {count} student(s).", file=sys.stderr)
+        return
+    _, ext = os.path.splitext(args.dest)
+    if ext.lower() in ('.jsonl', '.json'):
+        source = open_source(args)
+        try:
+            with open(args.dest, 'w', encoding='utf-8') as f:
+                count = write_students(source.iter_students(), f, DEFAULT_FIELDS, ext.lower()[1:])
+        finally:
+            close(source)
+    else:
+        require_source(args)
+        store = open_store(args)
+        try:
+            # Roster formats carry a checksum and are written atomically by save_to_file()
+            save_to_file(store, args.dest)
+            count = len(store)
+        finally:
+            close(store)
+    print_json({'exported': count, 'dest': args.dest})
+
+
+def cmd_stats(args):
+    """Report per-course statistics, streaming roster files in one pass."""
+    source = open_source(args)
+    try:
+        if isinstance(source, RosterFile):
+            report = grade_statistics_all(source.iter_rows(), args.course)
+        else:
+            courses = args.course or source.courses()
+            report = {course: dict(stats, count=sum(stats['score_ranges'].values())) for course in sorted(courses)
+                      for stats in [source.course_statistics(course)] if stats}
+    finally:
+        close(source)
+    if args.format == 'csv':
+        # The same columns as the GUI's course statistics report
+        writer = csv.writer(sys.stdout)
+        writer.writerow(STATS_COLUMNS + SCORE_RANGES)
+        for course, stats in report.items():
+            ranges = stats['score_ranges']
+            writer.writerow([course, stats['count'], stats['average'], stats['median'], stats['mode'],
+                             *(ranges[range_] for range_ in SCORE_RANGES)])
+    else:
+        print_json(report)
+
+
+def cmd_query(args):
+    """Filter, order and page the roster with Query, writing only the selected fields."""
+    conditions = dict(parse_condition(text) for text in args.where or ())
+    fields = args.fields.split(',') if args.fields else list(DEFAULT_FIELDS)
+    for field in fields:
+        if field not in FIELDS + ('grades',) or field in ('course', 'search'):
+            raise ValueError(f"Unknown output field '{field}'.")
+    source = open_source(args)
+    try:
+        query = Query(source).where(**conditions)
+        if args.order_by:
+            query = query.order_by(*args.order_by.split(','))
+        query = query.offset(args.offset).limit(args.limit)
+        count = write_students(query, sys.stdout, fields, args.format, conditions.get('course'))
+    finally:
+        close(source)
+    print(f"{count} student(s).", file=sys.stderr)
+
+
+def cmd_bench(args):
+    """Time the batch operations on the real roster and report them as JSON."""
+    def best(fn):
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    require_source(args)
+    results = {}
+    if not args.db:
+        results['load_s'] = best(lambda: load_from_file(HashTable(), args.file))
+        results['load_parallel_s'] = best(lambda: load_from_file_parallel(HashTable(), args.file))
+    store = open_store(args)
+    try:
+        results['students'] = len(store)
+        with tempfile.TemporaryDirectory() as directory:
+            for ext in ('.txt', '.csv', BINARY_EXTENSION):
+                path = os.path.join(directory, 'bench' + ext)
+                results[f"save{ext.replace('.', '_')}_s"] = best(lambda: save_to_file(store, path))
+        results['stats_s'] = best(lambda: [store.course_statistics(c) for c in store.courses()])
+        if not args.db and os.path.exists(args.file):
+            results['stats_stream_s'] = best(
+                lambda: grade_statistics_all(RosterFile(args.file).iter_rows()))
+        courses = store.courses()
+        if courses:
+            results['query_top100_s'] = best(
+                lambda: Query(store).where(course=courses[0]).order_by('-grade').limit(100).all())
+    finally:
+        close(store)
+    print_json(results)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='sms', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_store_options(command):
+        where = command.add_mutually_exclusive_group()
+        where.add_argument('--file', default=DEFAULT_FILE, help="Roster file (.txt, .csv or .smsb).")
+        where.add_argument('--db', help="SQLite database instead of a roster file.")
+
+    command = commands.add_parser('import', help="Merge roster files into the store.")
+    command.add_argument('sources', nargs='+', metavar='SOURCE')
+    command.add_argument('--skip-existing', action='store_true',
+                         help="Keep students already in the store instead of replacing them.")
+    add_store_options(command)
+    command.set_defaults(run=cmd_import)
+
+    command = commands.add_parser('export', help="Write the roster to DEST ('-' for stdout).")
+    command.add_argument('dest')
+    command.add_argument('--format', choices=['csv', 'jsonl', 'json'],
+                         help="Format for stdout (default csv). Files follow their extension.")
+    add_store_options(command)
+    command.set_defaults(run=cmd_export)
+
+    command = commands.add_parser('stats', help="Per-course grade statistics.")
+    command.add_argument('--course', nargs='+', help="Only these courses.")
+    command.add_argument('--format', choices=['json', 'csv'], default='json')
+    add_store_options(command)
+    command.set_defaults(run=cmd_stats)
+
+    command = commands.add_parser('query', help="Filter, order and page students.")
+    command.add_argument('--where', action='append', metavar='FIELD[__LOOKUP]=VALUE',
+                         help="Repeatable. Fields: " + ", ".join(FIELDS) + "; lookups: eq, ne, lt, lte, "
+                              "gt, gte, in (comma-separated), contains, startswith.")
+    command.add_argument('--order-by', metavar='[-]FIELD,...',
+                         help="Comma-separated sort keys, '-' for descending. Write --order-by=-grade "
+                              "so the leading '-' is not read as an option.")
+    command.add_argument('--limit', type=int)
+    command.add_argument('--offset', type=int, default=0)
+    command.add_argument('--fields', help="Comma-separated output fields (default: "
+                                          + ",".join(DEFAULT_FIELDS) + "; also total, grade).")
+    command.add_argument('--format', choices=['jsonl', 'csv', 'json'], default='jsonl')
+    add_store_options(command)
+    command.set_defaults(run=cmd_query)
+
+    command = commands.add_parser('bench', help="Time load, save, stats and a query on the roster.")
+    command.add_argument('--repeat', type=int, default=3)
+    add_store_options(command)
+    command.set_defaults(run=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(args)
+    except BrokenPipeError:
+        # The reader (e.g. head) went away; stop quietly, as other command line tools do
+        sys.stdout = open(os.devnull, 'w')
+        return 0
+    except (ValueError, CorruptFileError, OSError, sqlite3.Error) as e:
+        print(f"sms {args.command}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
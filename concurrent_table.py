@@ -0,0 +1,332 @@
+# concurrent_table.py
+
+import threading
+import weakref
+from contextlib import contextmanager
+
+import metrics
+from hash_table import HashTable, _MISSING
+from indexes import DEFAULT_SEARCH_LIMIT, SearchIndex
+from student import Student
+
+
+class TableSnapshot:
+    """
+    Read-only, point-in-time view of a ConcurrentHashTable.
+
+    Holds its own key -> student map, and the table copies a student before
+    changing it through add_grade() while a snapshot is alive, so later
+    edits never show through.
+    """
+
+    def __init__(self, items):
+        self._items = items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def retrieve(self, key):
+        return self._items.get(key)
+
+    def iter_students(self):
+        # A generator, so the snapshot (and with it copy-on-write) lives as long as the iterator
+        yield from self._items.values()
+
+    def get_all_students(self):
+        return _SnapshotList(self, self._items.values())
+
+    def get_all_students_dict(self):
+        return _SnapshotDict(self, self._items)
+
+
+class _SnapshotList(list):
+    """A list of snapshot students that keeps the snapshot alive while the list is."""
+    __slots__ = ('_snapshot',)
+
+    def __init__(self, snapshot, students):
+        super().__init__(students)
+        self._snapshot = snapshot
+
+
+class _SnapshotDict(dict):
+    """A key -> student dict that keeps its snapshot alive while the dict is."""
+    __slots__ = ('_snapshot',)
+
+    def __init__(self, snapshot, items):
+        super().__init__(items)
+        self._snapshot = snapshot
+
+
+def _locked(name):
+    """Wrap a HashTable method so it runs while holding the table's lock."""
+    method = getattr(HashTable, name)
+
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class ConcurrentHashTable(HashTable):
+    def __init__(self, *args, **kwargs):
+        """
+        Thread-safe HashTable with snapshot reads.
+
+        Every operation holds one re-entrant lock; under the GIL only one
+        thread runs Python code at a time anyway, and an incremental resize
+        moves entries between buckets, so per-bucket lock striping would add
+        cost without adding parallelism. Long reads instead work from a
+        TableSnapshot taken under the lock in a single dict build, after
+        which writers continue: add_grade() copies a student that a live
+        snapshot may still reference before changing it (copy-on-write), and
+        insert()/delete() only swap references.
+
+        iter_students(), get_all_students() and get_all_students_dict() read
+        from a fresh snapshot that lives as long as the returned iterator,
+        list or dict, so save_to_file() and the statistics helpers always see
+        a consistent table. Change students through insert() or
+        add_grade(); a student modified in place after retrieve() bypasses
+        the copy-on-write protection.
+
+        Accepts the same arguments as HashTable (chained backend).
+        """
+        self._lock = threading.RLock()
+        # Keys whose student was stored after the last snapshot, so may be changed in place;
+        # None while no snapshot is alive
+        self._fresh = None
+        self._live_snapshots = 0
+        # Saves between checkpoint() and mark_persisted()/restore_changes()
+        self._saving = 0
+        # Keys written while the search index is being built outside the lock; None otherwise
+        self._search_touched = None
+        super().__init__(*args, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def snapshot(self):
+        """
+        Capture the current contents for reading without holding the lock.
+
+        Returns:
+            TableSnapshot: Unaffected by later inserts, deletes and add_grade() calls.
+        """
+        with self._lock:
+            snapshot = TableSnapshot(dict(self._items()))
+            self._live_snapshots += 1
+            self._fresh = set()
+        weakref.finalize(snapshot, self._release_snapshot)
+        return snapshot
+
+    def _release_snapshot(self):
+        with self._lock:
+            self._live_snapshots -= 1
+            if not self._live_snapshots:
+                self._fresh = None
+
+    def _own(self, key):
+        """Make the student under key safe to change in place, copying it if a snapshot may share it."""
+        student = self._get(key)
+        if student is _MISSING or self._fresh is None or key in self._fresh:
+            return student
+        student = Student.from_dict(student.to_dict())
+        student.grades = dict(student.grades)
+        self._put(key, student)
+        self._fresh.add(key)
+        return student
+
+    def _record(self, key, present):
+        # While a save is running its changes are detached, so everything new must be kept
+        if self.persisted_path is not None or self._saving:
+            self._changes[key] = present
+        if self._search_touched is not None:
+            self._search_touched.add(key)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def insert(self, key, value):
+        with self._lock:
+            super().insert(key, value)
+            self._record(key, True)
+            if self._fresh is not None:
+                self._fresh.add(key)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            if not super().delete(key):
+                return False
+            self._record(key, False)
+            if self._fresh is not None:
+                self._fresh.discard(key)
+        return True
+
+    def add_grade(self, key, course, grade):
+        with self._lock:
+            if self._own(key) is _MISSING:
+                return False
+            super().add_grade(key, course, grade)
+            self._record(key, True)
+        return True
+
+    def mark_dirty(self, key):
+        with self._lock:
+            super().mark_dirty(key)
+            self._record(key, True)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            # A search index being built now describes students that are gone
+            self._search_touched = None
+            if self._fresh is not None:
+                self._fresh = set()
+
+    def insert_many(self, items, unique=False, replace=True):
+        items = list(items)
+        with self._lock:
+            result = super().insert_many(items, unique, replace)
+            # Skipped rows left an existing student in place; it may still be shared with a snapshot
+            kept = set() if replace else set(result.conflicts)
+            for key, _ in items:
+                self._record(key, True)
+                if self._fresh is not None and key not in kept:
+                    self._fresh.add(key)
+        return result
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        with self._lock:
+            result = super().delete_many(keys)
+            # Every key is absent now, so recording conflicts too is still exact
+            for key in keys:
+                self._record(key, False)
+                if self._fresh is not None:
+                    self._fresh.discard(key)
+        return result
+
+    def update_many(self, updates):
+        updates = list(updates)
+        with self._lock:
+            for key, _ in updates:
+                self._own(key)
+            result = super().update_many(updates)
+            for key, _ in updates:
+                self._record(key, True)
+        return result
+
+    reserve = _locked('reserve')
+
+    @contextmanager
+    def batch(self):
+        """Hold the lock for a run of writes so other threads see all of them or none."""
+        with self._lock:
+            yield self
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def iter_students(self):
+        return self.snapshot().iter_students()
+
+    def get_all_students(self):
+        return self.snapshot().get_all_students()
+
+    def get_all_students_dict(self):
+        return self.snapshot().get_all_students_dict()
+
+    def search(self, text, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        See HashTable.search().
+
+        The first search builds the index from a copy of the table taken
+        under the lock, but sorts it without holding the lock, so other
+        threads keep reading and editing meanwhile. Students written during
+        the build are re-indexed before the index is swapped in.
+        """
+        with self._lock:
+            build = self._search is None
+            if build:
+                touched = self._search_touched = set()
+                items = dict(self._items())
+        if build:
+            index = SearchIndex.build((key, student.name) for key, student in items.items())
+            with self._lock:
+                # Otherwise the table was cleared, or a later search started its own build
+                if self._search_touched is touched:
+                    self._search_touched = None
+                    for key in touched:
+                        student = self._get(key)
+                        if student is _MISSING:
+                            index.remove(key)
+                        else:
+                            index.add(key, student.name)
+                    self._search = index
+        with self._lock:
+            return super().search(text, limit)
+
+    __len__ = _locked('__len__')
+    load_factor = _locked('load_factor')
+    retrieve = _locked('retrieve')
+    find_by_name = _locked('find_by_name')
+    courses = _locked('courses')
+    students_in_course = _locked('students_in_course')
+    grade_range = _locked('grade_range')
+    course_statistics = _locked('course_statistics')
+    chain_lengths = _locked('chain_lengths')
+
+    # ------------------------------------------------------------------
+    # Change tracking
+    # ------------------------------------------------------------------
+
+    is_dirty = _locked('is_dirty')
+    changes = _locked('changes')
+    mark_clean = _locked('mark_clean')
+
+    def checkpoint(self):
+        """
+        Start a save from a snapshot; writers carry on while it is written.
+
+        Returns:
+            tuple: (TableSnapshot, changes included in it).
+        """
+        with self._lock:
+            changes, self._changes = self._changes, {}
+            self._saving += 1
+            return self.snapshot(), changes
+
+    def restore_changes(self, changes):
+        with self._lock:
+            self._saving -= 1
+            super().restore_changes(changes)
+
+    def mark_persisted(self, path):
+        with self._lock:
+            self._saving -= 1
+            super().mark_persisted(path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_fresh'] = None
+        state['_live_snapshots'] = 0
+        state['_search_touched'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+
+# Includes time spent waiting for the lock; the HashTable.* metrics cover the work done under it
+metrics.instrument(ConcurrentHashTable, ['insert', 'retrieve', 'delete', 'add_grade', 'insert_many', 'delete_many',
+                                         'update_many', 'search', 'snapshot', 'checkpoint'])
@@ -5,19 +5,80 @@ from tkinter import messagebox, simpledialog, filedialog
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from hash_table import HashTable
+from concurrent_table import ConcurrentHashTable
+from indexes import SCORE_RANGES
+from sqlite_store import SQLiteStudentStore
 from student import Student
-from utils import save_to_file, load_from_file, sort_grades, grade_statistics
+from query import Query
+from utils import save_to_file, load_from_file, load_from_file_parallel, save_changes, collect_course_grades, summarize_courses, grade_statistics_all, CorruptFileError
+from utils import PARALLEL_LOAD_MIN_BYTES
+import analytics
+import metrics
+import profiling
 from tooltips import ToolTip
+from tasks import POLL_INTERVAL_MS, TaskExecutor
+from virtual_tree import VirtualTreeview, StudentRowSource
 import os  # Ensure os is imported if used
 import sys
+import argparse
+import functools
+import time
+
+# Rows shown per page of the sorted grades view
+SORT_PAGE_SIZE = 50
+
+# Without NumPy, reports over fewer grades than this are summarized in the worker thread rather than a worker process
+PROCESS_POOL_MIN_GRADES = 100000
+
+# Search-as-you-type waits this long after the last keystroke, then shows at most this many matches
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_RESULT_LIMIT = 20
+
+# The Performance tab redraws its table this often while it is open
+PERFORMANCE_REFRESH_MS = 1000
+
+def profiled_action(label):
+    """
+    Decorate an app method so it runs under the profiler when 'Profile Next Action' is armed.
+
+    Args:
+        label (str): Names the profile files.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.claim_profile():
+                return method(self, *args, **kwargs)
+            announce = lambda report: self.root.after_idle(self.show_profile, report)
+            return profiling.profiled(label, method, profiling.profile_directory(), announce)(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def format_bytes(count):
+    """Render a byte count with a binary unit, e.g. 1.5 MiB; empty for zero."""
+    if not count:
+        return ""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if count < 1024 or unit == "GiB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
 
 class StudentManagementApp:
-    def __init__(self, root):
+    def __init__(self, root, db_path=None, profile=False):
         """
         Initialize the Student Management Application.
 
         Args:
             root (ttk.Window): The root window of the Tkinter application.
+            db_path (str, optional): Work directly against this SQLite database
+                                     instead of loading students.txt into memory.
+            profile (bool, optional): Profile loading students.txt and arm
+                                      'Profile Next Action' (see profiling.capture).
+
+        The window appears before any student is read: students.txt loads in
+        the background, and each tab is built the first time it is opened.
         """
         self.root = root
         self.root.title("Student Management System")
@@ -26,12 +87,34 @@ class StudentManagementApp:
         # Set ttkbootstrap theme
         self.style = ttk.Style("superhero")  # Choose from available themes like 'cosmo', 'flatly', 'superhero', etc.
 
-        # Initialize HashTable and load existing data
-        self.hash_table = HashTable()
-        load_from_file(self.hash_table)  # Ensure default filename is used correctly
+        # Set when the default file could not be loaded, so auto-save never overwrites it
+        self.autosave_blocked = None
+        # Background work; at most one task runs at a time
+        self.tasks = TaskExecutor(self.root)
+        self.current_task = None
+        # Whether edits must wait for the current task (see start_task)
+        self.task_exclusive = False
+        # Whether the current task writes the roster (see start_task)
+        self.task_saves = False
+        # Set while closing waits for a save to finish (see on_closing)
+        self.closing = False
+        # Pending root.after() id of a debounced search
+        self.search_after = None
+        # Pending root.after() id of the Performance tab's next refresh
+        self.performance_after = None
+        if db_path:
+            # Every lookup is served by the database, so the roster need not fit in memory
+            self.hash_table = SQLiteStudentStore(db_path)
+        else:
+            # Empty until the startup load below replaces it; the concurrent variant lets
+            # edits continue while background saves and reports read a snapshot
+            self.hash_table = ConcurrentHashTable()
 
         # Create the GUI widgets
         self.create_widgets()
+        if not db_path:
+            self.load_startup_file(profile)
+        self.profile_next_var.set(profile)
 
         # Handle the window close event to ensure data is saved
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -58,6 +141,7 @@ class StudentManagementApp:
         file_menu = ttk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Save As...", command=self.save_data_as, accelerator="Ctrl+Shift+S")
         file_menu.add_command(label="Load From...", command=self.load_data_from, accelerator="Ctrl+Shift+L")
+        file_menu.add_command(label="Open Database...", command=self.open_database)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.on_closing, accelerator="Ctrl+Q")
         menubar.add_cascade(label="File", menu=file_menu)
@@ -69,6 +153,14 @@ class StudentManagementApp:
             theme_menu.add_command(label=theme.capitalize(), command=lambda t=theme: self.change_theme(t))
         menubar.add_cascade(label="Themes", menu=theme_menu)
 
+        # Tools Menu
+        tools_menu = ttk.Menu(menubar, tearoff=0)
+        # Armed until the next load, save, statistics or display runs, which is then profiled
+        self.profile_next_var = tk.BooleanVar(value=False)
+        tools_menu.add_checkbutton(label="Profile Next Action", variable=self.profile_next_var,
+                                   command=self.on_profile_toggled)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+
         # Help Menu
         help_menu = ttk.Menu(menubar, tearoff=0)
         help_menu.add_command(label="About", command=self.show_about)
@@ -92,6 +184,7 @@ class StudentManagementApp:
         self.tab_manage_grades = ttk.Frame(tab_control)
         self.tab_display = ttk.Frame(tab_control)
         self.tab_statistics = ttk.Frame(tab_control)
+        self.tab_performance = ttk.Frame(tab_control)
 
         # Add tabs to the notebook
         tab_control.add(self.tab_add_student, text='Add Student')
@@ -100,17 +193,23 @@ class StudentManagementApp:
         tab_control.add(self.tab_manage_grades, text='Manage Grades')
         tab_control.add(self.tab_display, text='Display All Students')
         tab_control.add(self.tab_statistics, text='Statistics')
+        tab_control.add(self.tab_performance, text='Performance')
 
         # Pack the notebook to fill the window
         tab_control.pack(expand=1, fill='both')
 
-        # Initialize each tab's content
-        self.create_add_student_tab()
-        self.create_delete_student_tab()
-        self.create_retrieve_student_tab()
-        self.create_manage_grades_tab()
-        self.create_display_tab()
-        self.create_statistics_tab()
+        tab_control.bind("<<NotebookTabChanged>>", lambda event: self.on_tab_changed(tab_control.select()))
+
+        # Each tab's content is built the first time the tab is opened (see build_tab)
+        self.tab_builders = {
+            str(self.tab_add_student): self.create_add_student_tab,
+            str(self.tab_delete_student): self.create_delete_student_tab,
+            str(self.tab_retrieve_student): self.create_retrieve_student_tab,
+            str(self.tab_manage_grades): self.create_manage_grades_tab,
+            str(self.tab_display): self.create_display_tab,
+            str(self.tab_statistics): self.create_statistics_tab,
+            str(self.tab_performance): self.create_performance_tab,
+        }
 
         # Create a status bar
         self.status_var = tk.StringVar()
@@ -118,6 +217,61 @@ class StudentManagementApp:
         status_bar = ttk.Label(self.root, textvariable=self.status_var, relief='sunken', anchor='w', bootstyle='light')
         status_bar.pack(side='bottom', fill='x')
 
+        # Background task progress, shown only while a task runs
+        self.task_frame = ttk.Frame(self.root, padding=(5, 2))
+        self.task_label_var = tk.StringVar()
+        ttk.Label(self.task_frame, textvariable=self.task_label_var, width=30).pack(side='left')
+        ttk.Button(self.task_frame, text="Cancel", command=self.cancel_task, bootstyle='danger-outline').pack(side='right')
+        self.task_progress = ttk.Progressbar(self.task_frame, mode='indeterminate', bootstyle='info-striped')
+        self.task_progress.pack(side='left', fill='x', expand=True, padx=5)
+
+        # Only the tab on screen is built before the window first appears
+        self.build_tab(tab_control.select())
+
+    def build_tab(self, tab):
+        """
+        Build a tab's widgets if they do not exist yet.
+
+        Args:
+            tab (str): Widget name of the tab.
+        """
+        builder = self.tab_builders.pop(str(tab), None)
+        if builder is not None:
+            with metrics.measure('gui.build_tab'):
+                builder()
+
+    def tab_built(self, tab):
+        """
+        Whether a tab's widgets exist yet.
+
+        Args:
+            tab (ttk.Frame): The tab.
+
+        Returns:
+            bool: False until the tab has been opened once.
+        """
+        return str(tab) not in self.tab_builders
+
+    def on_tab_changed(self, tab):
+        """
+        Prepare a tab as it is opened.
+
+        Args:
+            tab (str): Widget name of the selected tab.
+        """
+        self.build_tab(tab)
+        if tab == str(self.tab_display):
+            # The display table is virtual, so refreshing it whenever its tab is opened is cheap
+            self.display_all_students()
+        elif tab == str(self.tab_retrieve_student):
+            self.prepare_search()
+        elif tab == str(self.tab_performance):
+            self.refresh_performance()
+        if tab != str(self.tab_performance) and self.performance_after is not None:
+            # Only redraw the metrics while they are on screen
+            self.root.after_cancel(self.performance_after)
+            self.performance_after = None
+
     def create_add_student_tab(self):
         """
         Create the 'Add Student' tab with input fields and an add button.
@@ -180,10 +334,13 @@ class StudentManagementApp:
         else:
             return False
 
+    @metrics.timed('gui.add_student')
     def add_student(self):
         """
         Add a new student to the hash table after validating inputs.
         """
+        if not self.ensure_idle(edit=True):
+            return
         student_id = self.entry_id.get().strip()
         name = self.entry_name.get().strip()
         gender = self.gender_var.get()
@@ -249,10 +406,13 @@ class StudentManagementApp:
         btn_delete.grid(column=1, row=1, padx=5, pady=15, sticky='E')
         ToolTip(btn_delete, "Click to delete the specified student.")
 
+    @metrics.timed('gui.delete_student')
     def delete_student(self):
         """
         Delete a student from the hash table based on student ID.
         """
+        if not self.ensure_idle(edit=True):
+            return
         student_id = self.entry_delete_id.get().strip()
 
         if not student_id:
@@ -291,15 +451,31 @@ class StudentManagementApp:
         input_frame.columnconfigure(0, weight=1, pad=10)
         input_frame.columnconfigure(1, weight=3, pad=10)
 
+        # Search-as-you-type over IDs and names
+        ttk.Label(input_frame, text="Search:", font=('Helvetica', 10, 'bold')).grid(column=0, row=0, padx=5, pady=5, sticky='E')
+        self.entry_search = ttk.Entry(input_frame, width=30, bootstyle='info')
+        self.entry_search.grid(column=1, row=0, padx=5, pady=5, sticky='W')
+        self.entry_search.bind('<KeyRelease>', lambda event: self.schedule_search())
+        ToolTip(self.entry_search, "Type part of a student's ID or name; matches appear as you type.")
+
+        self.tree_search = ttk.Treeview(input_frame, columns=("ID", "Name"), show='headings', height=6, selectmode='browse')
+        self.tree_search.heading("ID", text="Student ID")
+        self.tree_search.heading("Name", text="Name")
+        self.tree_search.column("ID", width=120, anchor='center')
+        self.tree_search.column("Name", width=300, anchor='w')
+        self.tree_search.grid(column=1, row=1, padx=5, pady=5, sticky='W')
+        self.tree_search.bind('<<TreeviewSelect>>', lambda event: self.show_search_result())
+        ToolTip(self.tree_search, "Select a match to show the student's information.")
+
         # Labels and Entry Fields with Padding and ToolTips
-        ttk.Label(input_frame, text="Student ID:", font=('Helvetica', 10, 'bold')).grid(column=0, row=0, padx=5, pady=5, sticky='E')
+        ttk.Label(input_frame, text="Student ID:", font=('Helvetica', 10, 'bold')).grid(column=0, row=2, padx=5, pady=5, sticky='E')
         self.entry_retrieve_id = ttk.Entry(input_frame, width=30, bootstyle='info')
-        self.entry_retrieve_id.grid(column=1, row=0, padx=5, pady=5, sticky='W')
+        self.entry_retrieve_id.grid(column=1, row=2, padx=5, pady=5, sticky='W')
         ToolTip(self.entry_retrieve_id, "Enter the student's ID to retrieve information.")
 
         # Retrieve Button
         btn_retrieve = ttk.Button(input_frame, text="Retrieve Student", command=self.retrieve_student, bootstyle='info-outline')
-        btn_retrieve.grid(column=1, row=1, padx=5, pady=15, sticky='E')
+        btn_retrieve.grid(column=1, row=3, padx=5, pady=15, sticky='E')
         ToolTip(btn_retrieve, "Click to retrieve the student's information.")
 
         # Create a Text widget with Scrollbar to display student information
@@ -313,6 +489,7 @@ class StudentManagementApp:
         self.text_retrieve.pack(side='left', fill='both', expand=True)
         ToolTip(self.text_retrieve, "Displays the retrieved student information.")
 
+    @metrics.timed('gui.retrieve_student')
     def retrieve_student(self):
         """
         Retrieve and display student information based on the entered student ID.
@@ -354,6 +531,54 @@ class StudentManagementApp:
             self.text_retrieve.insert(tk.END, f"Student with ID '{student_id}' not found.")
             self.status_var.set(f"Failed to retrieve student: ID '{student_id}' not found.")
 
+    def prepare_search(self):
+        """
+        Build the search index in the background before the first keystroke needs it.
+
+        Only a ConcurrentHashTable can be indexed while edits continue; other
+        stores build (or need no) index on the first search.
+        """
+        store = self.hash_table
+        if self.current_task is not None or not self.reads_from_snapshots():
+            return
+        # The first search indexes every student; an empty query returns nothing
+        self.start_task("Indexing students", lambda handle: store.search(''), exclusive=False)
+
+    def schedule_search(self):
+        """Run the search once typing pauses for SEARCH_DEBOUNCE_MS."""
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(SEARCH_DEBOUNCE_MS, self.run_search)
+
+    @metrics.timed('gui.run_search')
+    def run_search(self):
+        """
+        Show the students matching the search box, capped at SEARCH_RESULT_LIMIT.
+        """
+        self.search_after = None
+        text = self.entry_search.get()
+        self.tree_search.delete(*self.tree_search.get_children())
+        if not text.strip():
+            return
+        students = self.hash_table.search(text, SEARCH_RESULT_LIMIT)
+        for student in students:
+            # The ID doubles as the item id, so it comes back exactly as stored
+            self.tree_search.insert("", tk.END, iid=student.student_id, values=(student.student_id, student.name))
+        if len(students) >= SEARCH_RESULT_LIMIT:
+            self.status_var.set(f"Showing the first {SEARCH_RESULT_LIMIT} matches for '{text.strip()}'; keep typing to narrow them.")
+        else:
+            self.status_var.set(f"{len(students)} match(es) for '{text.strip()}'.")
+
+    def show_search_result(self):
+        """Retrieve the student selected in the search results."""
+        selection = self.tree_search.selection()
+        if not selection:
+            return
+        student_id = selection[0]
+        self.entry_retrieve_id.delete(0, tk.END)
+        self.entry_retrieve_id.insert(0, student_id)
+        self.retrieve_student()
+
     def create_manage_grades_tab(self):
         """
         Create the 'Manage Grades' tab with functionalities to add and view grades.
@@ -440,10 +665,13 @@ class StudentManagementApp:
         except ValueError:
             return False
 
+    @metrics.timed('gui.add_grade')
     def add_grade(self):
         """
         Add a grade to a student's record after validating inputs.
         """
+        if not self.ensure_idle(edit=True):
+            return
         student_id = self.entry_grade_id.get().strip()
         course = self.entry_course.get().strip()
         grade = self.entry_grade.get().strip()
@@ -465,7 +693,7 @@ class StudentManagementApp:
         student = self.hash_table.retrieve(student_id)
 
         if student:
-            student.add_grade(course, grade)
+            self.hash_table.add_grade(student_id, course, grade)
             messagebox.showinfo("Success", f"Grade for course '{course}' added to student '{student.name}'.")
             self.status_var.set(f"Added grade for course '{course}' to student '{student.name}'.")
         else:
@@ -477,6 +705,7 @@ class StudentManagementApp:
         self.entry_course.delete(0, tk.END)
         self.entry_grade.delete(0, tk.END)
 
+    @metrics.timed('gui.view_grades')
     def view_grades(self):
         """
         View all grades for a specified student.
@@ -533,58 +762,48 @@ class StudentManagementApp:
         btn_display.pack(side='right')
         ToolTip(btn_display, "Click to display all students in the system.")
 
-        # Create a Treeview with Scrollbar
-        tree_frame = ttk.Frame(frame, padding="10")
-        tree_frame.pack(fill='both', expand=True)
+        # Filter by ID or name
+        ttk.Label(button_frame, text="Filter:", font=('Helvetica', 10, 'bold')).pack(side='left', padx=5)
+        self.entry_display_filter = ttk.Entry(button_frame, width=30, bootstyle='success')
+        self.entry_display_filter.pack(side='left', padx=5)
+        self.entry_display_filter.bind('<Return>', lambda event: self.display_all_students())
+        ToolTip(self.entry_display_filter, "Show only students whose ID or name words start with this text. Press Enter to apply.")
 
-        scrollbar = ttk.Scrollbar(tree_frame, orient='vertical')
-        self.tree = ttk.Treeview(
-            tree_frame,
-            columns=("ID", "Name", "Gender", "Age", "Grades", "Total"),
-            show='headings',
-            yscrollcommand=scrollbar.set
-        )
-        scrollbar.config(command=self.tree.yview)
-        scrollbar.pack(side='right', fill='y')
+        # Virtual table: only the rows on screen exist as Treeview items
+        self.tree = VirtualTreeview(frame, padding="10")
+        self.tree.pack(fill='both', expand=True)
+        self.tree.on_sort(self.sort_display_by)
+        ToolTip(self.tree.tree, "Displays all students with their details. Click a column heading to sort.")
 
-        # Define columns
-        self.tree.heading("ID", text="Student ID")
-        self.tree.heading("Name", text="Name")
-        self.tree.heading("Gender", text="Gender")
-        self.tree.heading("Age", text="Age")
-        self.tree.heading("Grades", text="Grades")
-        self.tree.heading("Total", text="Total Grades")
+        # Current sort of the display table: (column id, descending) or None
+        self.display_sort = None
 
-        # Define column widths
-        self.tree.column("ID", width=100, anchor='center')
-        self.tree.column("Name", width=200, anchor='w')
-        self.tree.column("Gender", width=100, anchor='center')
-        self.tree.column("Age", width=50, anchor='center')
-        self.tree.column("Grades", width=300, anchor='w')
-        self.tree.column("Total", width=100, anchor='center')
+    @profiled_action('Display')
+    @metrics.timed('gui.display_all_students')
+    def display_all_students(self):
+        """
+        Display all students in the virtual table, applying the current filter and sort.
+        """
+        column, descending = self.display_sort or (None, False)
+        source = StudentRowSource(self.hash_table, column, descending, self.entry_display_filter.get())
+        self.tree.set_source(source)
+        if source.filter_text:
+            self.status_var.set(f"Displayed {len(source)} student(s) matching '{source.filter_text}'.")
+        else:
+            self.status_var.set("Displayed all students.")
 
-        self.tree.pack(fill='both', expand=True)
-        ToolTip(self.tree, "Displays all students with their details.")
+    def sort_display_by(self, column):
+        """
+        Sort the display table by a column; clicking the same heading again reverses the order.
 
-    def display_all_students(self):
+        Args:
+            column (str): Column id from virtual_tree.STUDENT_COLUMNS.
         """
-        Display all students in the Treeview.
-        """
-        # Clear existing data
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        for student in self.hash_table.get_all_students():
-            grades_str = "; ".join([f"{course}: {grade}" for course, grade in student.grades.items()])
-            self.tree.insert("", tk.END, values=(
-                student.student_id,
-                student.name,
-                student.gender,
-                student.age,
-                grades_str,
-                student.total_grade()
-            ))
-        self.status_var.set("Displayed all students.")
+        if self.display_sort and self.display_sort[0] == column:
+            self.display_sort = (column, not self.display_sort[1])
+        else:
+            self.display_sort = (column, False)
+        self.display_all_students()
 
     def create_statistics_tab(self):
         """
@@ -603,8 +822,11 @@ class StudentManagementApp:
 
         # Course Selection
         ttk.Label(stats_options_frame, text="Select Course:", font=('Helvetica', 10, 'bold')).grid(column=0, row=0, padx=5, pady=5, sticky='E')
-        self.combo_course_stats = ttk.Combobox(stats_options_frame, values=self.get_all_courses(), state='readonly')
+        # Filled by update_course_combobox_stats(), which also runs whenever the list is opened
+        self.combo_course_stats = ttk.Combobox(stats_options_frame, state='readonly',
+                                               postcommand=self.update_course_combobox_stats)
         self.combo_course_stats.grid(column=1, row=0, padx=5, pady=5, sticky='W')
+        self.update_course_combobox_stats()
         ToolTip(self.combo_course_stats, "Select the course for which you want to view statistics.")
 
         # Statistics Button
@@ -612,6 +834,11 @@ class StudentManagementApp:
         btn_statistics.grid(column=2, row=0, padx=5, pady=5, sticky='W')
         ToolTip(btn_statistics, "Click to view statistics for the selected course.")
 
+        # All Courses Report Button
+        btn_all_courses = ttk.Button(stats_options_frame, text="All Courses", command=self.show_all_course_statistics, bootstyle='info-outline')
+        btn_all_courses.grid(column=3, row=0, padx=5, pady=5, sticky='W')
+        ToolTip(btn_all_courses, "Click to view statistics for every course at once.")
+
         # Sorting Options
         ttk.Label(stats_options_frame, text="Sort Grades:", font=('Helvetica', 10, 'bold')).grid(column=0, row=1, padx=5, pady=5, sticky='E')
         self.combo_sort_order = ttk.Combobox(stats_options_frame, values=["Ascending", "Descending"], state='readonly')
@@ -667,18 +894,35 @@ class StudentManagementApp:
         self.tree_sort.pack(fill='both', expand=True)
         ToolTip(self.tree_sort, "Displays sorted grades for the selected course.")
 
+        # Paging controls for the sorted grades
+        sort_nav_frame = ttk.Frame(sort_grades_display_frame)
+        sort_nav_frame.pack(fill='x', pady=(5, 0))
+        self.btn_sort_prev = ttk.Button(sort_nav_frame, text="< Previous", command=lambda: self.show_sort_page(self.sort_page - 1), bootstyle='secondary-outline', state='disabled')
+        self.btn_sort_prev.pack(side='left')
+        self.btn_sort_next = ttk.Button(sort_nav_frame, text="Next >", command=lambda: self.show_sort_page(self.sort_page + 1), bootstyle='secondary-outline', state='disabled')
+        self.btn_sort_next.pack(side='right')
+        self.sort_page_var = tk.StringVar()
+        ttk.Label(sort_nav_frame, textvariable=self.sort_page_var).pack(side='top')
+
+        # Query behind the sorted grades pages, and how many students it matches
+        self.sort_query = None
+        self.sort_total = 0
+        self.sort_course = None
+        self.sort_order = None
+        self.sort_page = 0
+
     def get_all_courses(self):
         """
-        Retrieve a sorted list of all courses from the hash table.
+        Retrieve a sorted list of all courses from the store's course index
+        (kept up to date by every edit), without scanning the students.
 
         Returns:
             list: Sorted list of course names.
         """
-        courses = set()
-        for student in self.hash_table.get_all_students():
-            courses.update(student.grades.keys())
-        return sorted(list(courses))
+        return Query(self.hash_table).distinct('course')
 
+    @profiled_action('Statistics')
+    @metrics.timed('gui.show_statistics')
     def show_statistics(self):
         """
         Display statistical analysis for the selected course.
@@ -690,19 +934,14 @@ class StudentManagementApp:
             self.status_var.set("Failed to show statistics: No course selected.")
             return
 
-        students = []
-        for student in self.hash_table.get_all_students():
-            if course in student.grades:
-                students.append(student)
+        stats = Query(self.hash_table).where(course=course).statistics()
 
-        if not students:
+        if not stats:
             self.text_stats.delete('1.0', tk.END)
             self.text_stats.insert(tk.END, f"No grades found for course '{course}'.")
             self.status_var.set(f"Failed to show statistics: No grades for course '{course}'.")
             return
 
-        stats = grade_statistics(students, course)
-
         self.text_stats.delete('1.0', tk.END)
         stats_info = f"Grade Statistics for '{course}':\n"
         stats_info += f"Average Grade: {stats['average']:.2f}\n"
@@ -715,6 +954,70 @@ class StudentManagementApp:
         self.text_stats.insert(tk.END, stats_info)
         self.status_var.set(f"Displayed statistics for course '{course}'.")
 
+    def show_all_course_statistics(self):
+        """
+        Display a report with the statistics of every course, computed in one pass over the students.
+
+        With NumPy the report is computed vectorized on a worker thread.
+        Without it the grades are gathered on a worker thread and, for large
+        rosters, summarized in a worker process.
+        """
+        if not self.ensure_idle():
+            return
+        store = self.hash_table
+
+        def build_report(handle):
+            if analytics.HAVE_NUMPY:
+                return grade_statistics_all(store.iter_students())
+            columns = collect_course_grades(store.iter_students())
+            if sum(map(len, columns.values())) < PROCESS_POOL_MIN_GRADES:
+                return summarize_courses(columns)
+            return handle.run_cpu(summarize_courses, columns)
+
+        self.start_task("Computing course statistics", build_report, on_done=self.show_course_report,
+                        exclusive=not self.reads_from_snapshots(), profile=True)
+
+    @metrics.timed('gui.show_course_report')
+    def show_course_report(self, report):
+        """
+        Show a per-course statistics report in its own window.
+
+        Args:
+            report (dict): course -> statistics dict, as from utils.grade_statistics_all().
+        """
+        if not report:
+            messagebox.showinfo("No Data", "No grades have been recorded yet.")
+            self.status_var.set("Failed to show report: No grades recorded.")
+            return
+
+        window = ttk.Toplevel(self.root)
+        window.title("All Courses Report")
+        window.geometry("900x400")
+
+        columns = ("Course", "Students", "Average", "Median", "Mode") + SCORE_RANGES
+        scrollbar = ttk.Scrollbar(window, orient='vertical')
+        tree = ttk.Treeview(window, columns=columns, show='headings', yscrollcommand=scrollbar.set)
+        scrollbar.config(command=tree.yview)
+        scrollbar.pack(side='right', fill='y')
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=150 if column == "Course" else 80, anchor='w' if column == "Course" else 'center')
+        tree.pack(fill='both', expand=True)
+
+        for course, stats in report.items():
+            ranges = stats['score_ranges']
+            tree.insert("", tk.END, values=(
+                course,
+                sum(ranges.values()),
+                f"{stats['average']:.2f}",
+                stats['median'],
+                stats['mode'],
+                *(ranges[range_] for range_ in SCORE_RANGES)
+            ))
+        self.status_var.set(f"Displayed statistics for {len(report)} course(s).")
+
+    @profiled_action('Sort grades')
+    @metrics.timed('gui.sort_grades_for_course')
     def sort_grades_for_course(self):
         """
         Sort and display grades for the selected course based on the chosen order.
@@ -732,109 +1035,532 @@ class StudentManagementApp:
             self.status_var.set("Failed to sort grades: No sort order selected.")
             return
 
-        students = []
-        for student in self.hash_table.get_all_students():
-            if course in student.grades:
-                students.append(student)
+        # Equal grades are ordered by student ID so pages never overlap
+        grade = '-grade' if order == 'Descending' else 'grade'
+        query = Query(self.hash_table).where(course=course).order_by(grade, 'student_id')
+        total = query.count()
 
-        if not students:
+        if not total:
             messagebox.showinfo("No Data", f"No grades found for course '{course}'.")
             self.status_var.set(f"Failed to sort grades: No grades for course '{course}'.")
             return
 
-        # Sort students based on grades
-        sorted_students = sort_grades(students, course, order)
+        self.sort_query = query
+        self.sort_total = total
+        self.sort_course = course
+        self.sort_order = order
+        self.show_sort_page(0)
+        self.status_var.set(f"Sorted grades for course '{course}' in {order} order.")
+
+    @metrics.timed('gui.show_sort_page')
+    def show_sort_page(self, page):
+        """
+        Show one page of the sorted grades, selecting only the students on that page.
+
+        Args:
+            page (int): Zero-based page number.
+        """
+        total = self.sort_total
+        pages = max(1, -(-total // SORT_PAGE_SIZE))
+        page = min(max(page, 0), pages - 1)
+        self.sort_page = page
+
+        # Top-K selection: only the rows up to the end of this page are ranked
+        page_students = self.sort_query.offset(page * SORT_PAGE_SIZE).limit(SORT_PAGE_SIZE).all()
 
         # Clear existing data in the treeview
         for item in self.tree_sort.get_children():
             self.tree_sort.delete(item)
 
         # Insert sorted data
-        for student in sorted_students:
-            self.tree_sort.insert("", tk.END, values=(student.name, student.grades.get(course, 0)))
+        for student in page_students:
+            self.tree_sort.insert("", tk.END, values=(student.name, student.grades.get(self.sort_course, 0)))
 
-        self.status_var.set(f"Sorted grades for course '{course}' in {order} order.")
+        first = page * SORT_PAGE_SIZE
+        self.sort_page_var.set(f"Page {page + 1} of {pages} ({first + 1}-{first + len(page_students)} of {total})")
+        self.btn_sort_prev.config(state='normal' if page > 0 else 'disabled')
+        self.btn_sort_next.config(state='normal' if page < pages - 1 else 'disabled')
+
+    def create_performance_tab(self):
+        """
+        Create the 'Performance' tab showing the timings recorded by the metrics module.
+        """
+        frame = self.tab_performance
+
+        options_frame = ttk.Frame(frame, padding="10")
+        options_frame.pack(fill='x')
+
+        self.metrics_enabled_var = tk.BooleanVar(value=metrics.is_enabled())
+        check_record = ttk.Checkbutton(options_frame, text="Record metrics", variable=self.metrics_enabled_var,
+                                       command=self.toggle_metrics, bootstyle='success-round-toggle')
+        check_record.pack(side='left', padx=5)
+        ToolTip(check_record, "Time loads, saves, reports, table operations and screen updates. Off costs nothing.")
+
+        btn_export = ttk.Button(options_frame, text="Export JSON...", command=self.export_metrics, bootstyle='info-outline')
+        btn_export.pack(side='right', padx=5)
+        ToolTip(btn_export, "Save the recorded metrics to a JSON file.")
+
+        btn_reset = ttk.Button(options_frame, text="Reset", command=self.reset_metrics, bootstyle='danger-outline')
+        btn_reset.pack(side='right', padx=5)
+        ToolTip(btn_reset, "Forget everything recorded so far.")
+
+        table_frame = ttk.Frame(frame, padding="10")
+        table_frame.pack(fill='both', expand=True)
+        columns = ("Operation", "Calls", "Mean ms", "Max ms", "Total s", "Read", "Written") + metrics.BUCKET_LABELS
+        scrollbar = ttk.Scrollbar(table_frame, orient='vertical')
+        self.tree_metrics = ttk.Treeview(table_frame, columns=columns, show='headings', yscrollcommand=scrollbar.set)
+        scrollbar.config(command=self.tree_metrics.yview)
+        scrollbar.pack(side='right', fill='y')
+        for column in columns:
+            self.tree_metrics.heading(column, text=column)
+            self.tree_metrics.column(column, width=220 if column == "Operation" else 70,
+                                     anchor='w' if column == "Operation" else 'center')
+        self.tree_metrics.pack(fill='both', expand=True)
+        ToolTip(self.tree_metrics, "Calls, latency and bytes per operation, with a latency histogram. Updates every second.")
+
+    def refresh_performance(self):
+        """
+        Redraw the metrics table, and again every PERFORMANCE_REFRESH_MS while the tab stays open.
+        """
+        if self.performance_after is not None:
+            self.root.after_cancel(self.performance_after)
+        self.tree_metrics.delete(*self.tree_metrics.get_children())
+        for name, stat in metrics.snapshot().items():
+            self.tree_metrics.insert("", tk.END, values=(
+                name,
+                stat['count'],
+                f"{stat['mean_s'] * 1000:.3f}",
+                f"{stat['max_s'] * 1000:.3f}",
+                f"{stat['total_s']:.3f}",
+                format_bytes(stat['bytes_read']),
+                format_bytes(stat['bytes_written']),
+                *stat['histogram'].values()
+            ))
+        self.performance_after = self.root.after(PERFORMANCE_REFRESH_MS, self.refresh_performance)
+
+    def toggle_metrics(self):
+        """
+        Start or stop recording metrics, following the 'Record metrics' switch.
+        """
+        if self.metrics_enabled_var.get():
+            metrics.enable()
+            self.status_var.set("Recording performance metrics.")
+        else:
+            metrics.disable()
+            self.status_var.set("Stopped recording performance metrics.")
+
+    def reset_metrics(self):
+        """
+        Clear the recorded metrics.
+        """
+        metrics.reset()
+        self.refresh_performance()
+        self.status_var.set("Performance metrics cleared.")
+
+    def export_metrics(self):
+        """
+        Save the recorded metrics to a user-specified JSON file.
+        """
+        file_path = filedialog.asksaveasfilename(defaultextension=".json",
+                                                 filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+        if not file_path:
+            self.status_var.set("Export canceled.")
+            return
+        try:
+            metrics.dump(file_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export metrics: {e}")
+            self.status_var.set(f"Error exporting metrics: {e}")
+            return
+        self.status_var.set(f"Performance metrics exported to {file_path}.")
 
     def save_data_as(self):
         """
-        Save data to a user-specified .txt or .csv file.
+        Save data to a user-specified .txt, .csv or .smsb file.
         """
         file_path = filedialog.asksaveasfilename(
             defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=[("Text files", "*.txt"), ("CSV files", "*.csv"), ("Binary snapshots", "*.smsb"), ("All files", "*.*")]
         )
         if not file_path:
             self.status_var.set("Save operation canceled.")
             return
-        try:
-            save_to_file(self.hash_table, file_path)
+        if not self.ensure_idle():
+            return
+        store = self.hash_table
+
+        def saved(_):
+            self.autosave_blocked = None
             messagebox.showinfo("Saved", f"Data has been saved successfully to {file_path}.")
             self.status_var.set(f"Data saved successfully to {file_path}.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save data.\n{e}")
-            self.status_var.set(f"Failed to save data: {e}")
+
+        # An aborted save never replaces the file: it is written to a temp file and renamed at the end
+        self.start_task("Saving", lambda handle: save_to_file(store, file_path, progress=handle.report), on_done=saved,
+                        exclusive=not self.reads_from_snapshots(), profile=True, saves=True)
 
     def load_data_from(self):
         """
-        Load data from a user-specified .txt or .csv file.
+        Load data from a user-specified .txt, .csv or .smsb file.
         """
         file_path = filedialog.askopenfilename(
             defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=[("Text files", "*.txt"), ("CSV files", "*.csv"), ("Binary snapshots", "*.smsb"), ("All files", "*.*")]
         )
         if not file_path:
             self.status_var.set("Load operation canceled.")
             return
-        progress = ttk.Progressbar(self.root, mode='indeterminate')
-        progress.pack(side='top', fill='x')
-        progress.start()
-        try:
-            load_from_file(self.hash_table, file_path)
+        if not self.ensure_idle():
+            return
+
+        def loaded(table):
+            self.use_store(table)
             messagebox.showinfo("Loaded", f"Data has been loaded successfully from {file_path}.")
-            self.display_all_students()
             self.status_var.set(f"Data loaded successfully from {file_path}.")
-            # Update course combobox in statistics tab
-            self.combo_course_stats['values'] = self.get_all_courses()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load data.\n{e}")
-            self.status_var.set(f"Failed to load data: {e}")
-        finally:
-            progress.stop()
-            progress.destroy()
 
-    def auto_save(self):
+        self.start_load(file_path, loaded)
+
+    def load_startup_file(self, profile=False):
         """
-        Automatically save data to the default .txt file at regular intervals.
+        Load students.txt in the background while the window is already on screen.
+
+        Edits wait for the load (it is an exclusive task). Until it succeeds
+        auto-save and the save prompt on closing are off, so the empty or
+        partial roster on screen never overwrites the file, even when the
+        window is closed mid-load.
+
+        Args:
+            profile (bool, optional): Profile the load (see profiling.capture).
+        """
+        default_file = 'students.txt'
+
+        def loaded(table):
+            self.use_store(table)
+            self.status_var.set(f"Loaded {len(table)} student(s) from {default_file}.")
+
+        def failed(e):
+            self.autosave_blocked = str(e)
+            title = "Corrupt Data File" if isinstance(e, CorruptFileError) else "Error"
+            messagebox.showerror(title, f"{e}\nAuto-save is disabled until you load or save a file.")
+            self.status_var.set(f"Loading {default_file} failed: {e}")
+
+        def cancelled():
+            self.autosave_blocked = f"{default_file} was not loaded."
+            self.status_var.set(f"Loading {default_file} canceled; auto-save is disabled until you load or save a file.")
+
+        # Cleared by use_store() once the load has succeeded
+        self.autosave_blocked = f"{default_file} has not finished loading."
+        self.profile_next_var.set(profile)
+        self.start_load(default_file, loaded, on_error=failed, on_cancel=cancelled, profile=profile)
+
+    def start_load(self, file_path, on_loaded, on_error=None, on_cancel=None, profile=True):
         """
+        Load a roster file on a worker thread, showing its progress.
+
+        The course index is left for the Statistics tab to build when it is
+        first needed (see update_course_combobox_stats): building it reads every
+        student, which for a .smsb roster would decode every row up front.
+
+        Args:
+            file_path (str): The roster file.
+            on_loaded (callable): on_loaded(store), run on the Tk thread.
+            on_error (callable, optional): Passed to start_task().
+            on_cancel (callable, optional): Passed to start_task().
+            profile (bool, optional): Passed to start_task().
+        """
+        store = self.hash_table
+        # Large text rosters are parsed in shards on the process pool
+        large = os.path.exists(file_path) and os.path.getsize(file_path) >= PARALLEL_LOAD_MIN_BYTES
+        pool = self.tasks.cpu_pool() if large else None
+
+        def load(handle):
+            # Files load into a fresh table that replaces the current one only once complete, so
+            # cancelling leaves the data on screen untouched. A database imports inside one
+            # transaction, which is rolled back on cancel.
+            target = store if isinstance(store, SQLiteStudentStore) else ConcurrentHashTable()
+            if pool is None:
+                load_from_file(target, file_path, progress=handle.report)
+            else:
+                load_from_file_parallel(target, file_path, executor=pool, progress=handle.report)
+            return target
+
+        # Edits made during a load would be lost when the loaded table replaces the current one
+        self.start_task("Loading", load, on_done=on_loaded, on_error=on_error, on_cancel=on_cancel,
+                        exclusive=True, profile=profile)
+
+    def use_store(self, store):
+        """
+        Make store the data the application works on and refresh the tabs built so far.
+
+        Args:
+            store: A ConcurrentHashTable or SQLiteStudentStore.
+        """
+        self.hash_table = store
+        self.autosave_blocked = None
+        if self.tab_built(self.tab_display):
+            self.display_all_students()
+        self.update_course_combobox_stats()
+
+    def open_database(self):
+        """
+        Switch to a SQLite database so the roster no longer has to fit in memory.
+        """
+        db_path = filedialog.askopenfilename(
+            defaultextension=".db",
+            filetypes=[("SQLite databases", "*.db *.sqlite"), ("All files", "*.*")]
+        )
+        if not db_path:
+            self.status_var.set("Open database canceled.")
+            return
+        if not self.ensure_idle():
+            return
         try:
-            # Define a default filename or choose based on your preference
-            default_file = 'students.txt'  # Changed from 'students.json' to 'students.txt'
-            save_to_file(self.hash_table, default_file)
-            print("Auto-saved data.")
-            self.status_var.set("Auto-saved data.")
+            store = SQLiteStudentStore(db_path)
         except Exception as e:
+            messagebox.showerror("Error", f"Failed to open database.\n{e}")
+            self.status_var.set(f"Failed to open database: {e}")
+            return
+        if not self.autosave_blocked and self.hash_table.is_dirty() and messagebox.askyesno(
+                "Unsaved Changes", "Save your changes to students.txt before switching?"):
+            save_changes(self.hash_table, 'students.txt')
+        self.close_store()
+        self.use_store(store)
+        self.status_var.set(f"Opened database {db_path}.")
+
+    def close_store(self):
+        """
+        Release the current store's resources (the SQLite connection, if any).
+        """
+        if isinstance(self.hash_table, SQLiteStudentStore):
+            self.hash_table.close()
+
+    def auto_save(self):
+        """
+        Automatically save changes to the default .txt file at regular intervals.
+        Nothing is written when no student has changed since the last save.
+        The save runs in the background; a round is skipped while another task runs.
+        """
+        # Schedule the next auto-save
+        self.root.after(300000, self.auto_save)  # 5 minutes
+        if self.autosave_blocked:
+            self.status_var.set(f"Auto-save skipped: {self.autosave_blocked}")
+            return
+        if self.current_task is not None or not self.hash_table.is_dirty():
+            return
+        # Define a default filename or choose based on your preference
+        default_file = 'students.txt'  # Changed from 'students.json' to 'students.txt'
+        store = self.hash_table
+
+        def saved(written):
+            print(f"Auto-saved {written} record(s).")
+            self.status_var.set(f"Auto-saved {written} record(s).")
+
+        def failed(e):
             print(f"Auto-save failed: {e}")
             self.status_var.set(f"Auto-save failed: {e}")
-        finally:
-            # Schedule the next auto-save
-            self.root.after(300000, self.auto_save)  # 5 minutes
+
+        self.start_task("Auto-saving", lambda handle: save_changes(store, default_file, progress=handle.report),
+                        on_done=saved, on_error=failed, exclusive=not self.reads_from_snapshots(), saves=True)
+
+    def reads_from_snapshots(self):
+        """
+        Whether background readers see a consistent snapshot while edits continue.
+
+        Returns:
+            bool: True for a ConcurrentHashTable; other stores need edits paused.
+        """
+        return isinstance(self.hash_table, ConcurrentHashTable)
+
+    def start_task(self, name, fn, on_done=None, on_error=None, on_cancel=None, exclusive=True, profile=False,
+                   saves=False):
+        """
+        Run fn(handle) on a worker thread, showing its progress with a Cancel button.
+
+        Args:
+            name (str): Shown next to the progress bar.
+            fn (callable): The task, given its tasks.TaskHandle.
+            on_done (callable, optional): on_done(result), run on the Tk thread.
+            on_error (callable, optional): on_error(exception), run on the Tk thread.
+                                           Defaults to an error dialog.
+            on_cancel (callable, optional): on_cancel(), run on the Tk thread once the
+                                            task has stopped after a cancel.
+            exclusive (bool, optional): Refuse edits (see ensure_idle) until the task
+                                        finishes, so the worker never sees the data
+                                        change underneath it.
+            profile (bool, optional): The task is a user action that 'Profile Next Action'
+                                      applies to; it is then profiled on the worker thread.
+            saves (bool, optional): The task saves the table, so closing the window waits
+                                    for it instead of cancelling it (see on_closing).
+        """
+        profiles = []
+        if profile and self.claim_profile():
+            fn = profiling.profiled(name, fn, profiling.profile_directory(), profiles.append)
+
+        self.task_label_var.set(f"{name}...")
+        self.task_progress.configure(mode='indeterminate', value=0)
+        self.task_progress.start()
+        self.task_frame.pack(side='bottom', fill='x')
+        started = time.perf_counter() if metrics.is_enabled() else None
+
+        def finish():
+            self.task_progress.stop()
+            self.task_frame.pack_forget()
+            self.current_task = None
+            if started is not None:
+                metrics.record(f"task.{name}", time.perf_counter() - started)
+            # Written by the worker; announced once the task's own messages are up
+            for report in profiles:
+                self.root.after_idle(self.show_profile, report)
+
+        def done(result):
+            finish()
+            if on_done is not None:
+                on_done(result)
+
+        def error(e):
+            finish()
+            if on_error is not None:
+                on_error(e)
+            else:
+                messagebox.showerror("Error", f"{name} failed.\n{e}")
+                self.status_var.set(f"{name} failed: {e}")
+
+        def cancelled():
+            finish()
+            self.status_var.set(f"{name} canceled.")
+            if on_cancel is not None:
+                on_cancel()
+
+        def progress(done, total):
+            if total:
+                if str(self.task_progress.cget('mode')) != 'determinate':
+                    self.task_progress.stop()
+                    self.task_progress.configure(mode='determinate', maximum=100)
+                percent = min(100, done * 100 // total)
+                self.task_progress.configure(value=percent)
+                self.task_label_var.set(f"{name}... {percent}%")
+
+        self.task_exclusive = exclusive
+        self.task_saves = saves
+        self.current_task = self.tasks.submit(name, fn, on_done=done, on_error=error,
+                                              on_progress=progress, on_cancel=cancelled)
+
+    def cancel_task(self):
+        """
+        Ask the running background task to stop at its next progress point.
+        """
+        if self.current_task is not None:
+            self.current_task.cancel()
+            self.task_label_var.set(f"Canceling {self.current_task.name.lower()}...")
+
+    def ensure_idle(self, edit=False):
+        """
+        Check that no background task is in the way before changing data or starting a task.
+
+        Args:
+            edit (bool, optional): The caller only edits students, which is allowed
+                                   while a non-exclusive task runs.
+
+        Returns:
+            bool: True if it is safe to go ahead.
+        """
+        if self.current_task is None or (edit and not self.task_exclusive):
+            return True
+        messagebox.showinfo("Busy", f"Please wait for '{self.current_task.name}' to finish, or cancel it.")
+        self.status_var.set(f"Busy: {self.current_task.name}.")
+        return False
 
     def on_closing(self):
         """
         Handle the application closing event by prompting the user to save data.
         """
+        if self.closing:
+            return
+        task = self.current_task
+        if task is not None and self.task_saves:
+            # A save holds the table's pending changes until it ends (they are put back if it
+            # fails), so let it finish: its result stands and the final save only adds later edits
+            if not messagebox.askokcancel("Quit", f"'{task.name}' is still running. Wait for it to finish and quit?"):
+                return
+            self.status_var.set(f"Waiting for '{task.name}' to finish...")
+            self.closing = True
+            self.close_after_task(task)
+            return
+        elif task is not None:
+            if not messagebox.askokcancel("Quit", f"'{task.name}' is still running. Cancel it and quit?"):
+                return
+            task.cancel()
+        self.close_application()
+
+    def close_after_task(self, task):
+        """
+        Poll until task has finished, keeping the window responsive, then close the application.
+
+        The task counts as finished once it is no longer the current task: its
+        on_done/on_error callbacks (which put back the changes of a failed save)
+        have then run on the Tk thread.
+
+        Args:
+            task (tasks.TaskHandle): The task to wait for.
+        """
+        if self.current_task is task:
+            self.root.after(POLL_INTERVAL_MS, self.close_after_task, task)
+            return
+        if self.current_task is not None:
+            # Started by the task's callbacks
+            self.current_task.cancel()
+        self.close_application()
+
+    def close_application(self):
+        """
+        Offer to save unsaved changes, then shut down the workers and destroy the window.
+        """
         try:
-            if messagebox.askokcancel("Quit", "Do you want to save your changes before exiting?"):
+            # Blocked too while the startup load has not finished: the table on screen is not the file's
+            if not self.autosave_blocked and self.hash_table.is_dirty() and messagebox.askokcancel("Quit", "Do you want to save your changes before exiting?"):
                 # Define a default filename or choose based on your preference
                 default_file = 'students.txt'  # Changed from 'students.json' to 'students.txt'
-                save_to_file(self.hash_table, default_file)
+                save_changes(self.hash_table, default_file)
                 self.status_var.set("Data saved. Exiting application.")
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while saving data: {e}")
             self.status_var.set(f"Error saving data: {e}")
         finally:
+            self.tasks.shutdown()
+            self.close_store()
             self.root.destroy()
 
+    def on_profile_toggled(self):
+        """
+        Report the state of the 'Profile Next Action' toggle in the status bar.
+        """
+        if self.profile_next_var.get():
+            self.status_var.set("The next load, save, statistics or display will be profiled.")
+        else:
+            self.status_var.set("Profiling canceled.")
+
+    def claim_profile(self):
+        """
+        Disarm 'Profile Next Action' for the action about to run.
+
+        Returns:
+            bool: True if that action should be profiled.
+        """
+        if not self.profile_next_var.get():
+            return False
+        self.profile_next_var.set(False)
+        return True
+
+    def show_profile(self, report):
+        """
+        Tell the user where a captured profile was written.
+
+        Args:
+            report (profiling.ProfileReport): The finished capture.
+        """
+        self.status_var.set(str(report))
+        messagebox.showinfo("Profile Saved", f"{report}.\n\nOpen the .pstats file with pstats or snakeviz; "
+                                             "the .txt file lists the slowest functions and top allocations.")
+
     def show_about(self):
         """
         Display information about the application.
@@ -866,18 +1592,55 @@ class StudentManagementApp:
     def update_course_combobox_stats(self):
         """
         Update the course selection combobox with the latest courses.
+        Nothing to do until the Statistics tab has been opened; it reads the courses when built.
+
+        Once the store's course index exists this is a cheap read. Until then the
+        index is built by an 'Indexing courses' task and the list filled in when
+        it finishes, so the Tk thread never reads the whole roster.
         """
-        courses = self.get_all_courses()
-        self.combo_course_stats['values'] = courses
+        if not self.tab_built(self.tab_statistics):
+            return
+        store = self.hash_table
+        if store.index_built():
+            self.combo_course_stats['values'] = self.get_all_courses()
+            return
+        # Courses of a replaced store; a selection left over would build the index on the Tk thread
+        self.combo_course_stats['values'] = ()
+        self.combo_course_stats.set('')
+        if self.current_task is not None:
+            # Tried again when the list is next opened
+            return
+
+        def indexed(courses):
+            if store is self.hash_table:
+                self.combo_course_stats['values'] = courses
+                self.status_var.set(f"Indexed {len(courses)} courses.")
+
+        # Exclusive: the index is built under the table's lock, which an edit would wait on
+        self.start_task("Indexing courses", lambda handle: Query(store).distinct('course'), on_done=indexed)
 
 def main():
     """
     Entry point of the Student Management Application.
     """
+    parser = argparse.ArgumentParser(description="Student Management System")
+    parser.add_argument('--db', help="Open this SQLite database instead of students.txt.")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile the startup load and the next load, save, statistics or display "
+                             "with cProfile and tracemalloc; the files are written next to students.txt.")
+    parser.add_argument('--metrics', metavar='JSON', nargs='?', const='',
+                        help="Record performance metrics from startup; with a file name, "
+                             "also write them there on exit.")
+    args = parser.parse_args()
+    if args.metrics is not None:
+        metrics.enable()
+
     # Initialize ttkbootstrap window with default theme
     root = ttk.Window(themename="superhero")
-    app = StudentManagementApp(root)
+    app = StudentManagementApp(root, db_path=args.db, profile=args.profile)
     root.mainloop()
+    if args.metrics:
+        metrics.dump(args.metrics)
 
 if __name__ == "__main__":
     main()
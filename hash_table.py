@@ -1,50 +1,893 @@
 # hash_table.py
 
+import math
+import os
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+
+import metrics
+from indexes import DEFAULT_SEARCH_LIMIT, SearchIndex, StudentIndex
+
+
+class _Marker:
+    """Named sentinel that survives pickling as the same module-level object."""
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+    def __reduce__(self):
+        return self.name
+
+
+# Sentinel returned by the storage primitives when a key is absent
+_MISSING = _Marker('_MISSING')
+
+# Slot markers for the open-addressing backend
+_EMPTY = _Marker('_EMPTY')
+_DELETED = _Marker('_DELETED')
+_PERTURB_MASK = (1 << 64) - 1
+
+# Outcome of a bulk operation: how many rows took effect, and the keys that
+# conflicted (already present for insert_many(), absent for delete_many() and
+# update_many()), in input order
+BulkResult = namedtuple('BulkResult', ['applied', 'conflicts'])
+
+
 class HashTable:
-    def __init__(self, size=100):
+    def __new__(cls, *args, backend='chained', **kwargs):
+        """
+        Pick the storage engine at construction time.
+
+        ``HashTable(backend='open')`` returns an OpenAddressingHashTable; the
+        default ``'chained'`` backend is this class itself.
+        """
+        if cls is HashTable:
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown hash table backend '{backend}'. Choose from: {', '.join(BACKENDS)}.")
+            cls = BACKENDS[backend]
+        return super().__new__(cls)
+
+    def __init__(self, size=100, max_load_factor=0.75, min_load_factor=None, rehash_step=4, backend='chained'):
+        """
+        Separate-chaining hash table that grows (and optionally shrinks) itself.
+
+        Resizing is incremental: when the load factor is crossed a new bucket
+        array is allocated and the old buckets are migrated a few at a time on
+        every subsequent operation, so no single call pays for a full rehash.
+
+        Args:
+            size (int, optional): Initial number of buckets. Defaults to 100.
+            max_load_factor (float, optional): Grow when entries/buckets exceeds this.
+                                               None keeps the bucket count fixed.
+            min_load_factor (float, optional): Shrink when entries/buckets drops below this.
+                                               None (the default) never shrinks.
+            rehash_step (int, optional): Old buckets migrated per operation while resizing.
+            backend (str, optional): 'chained' (default) or 'open'. See __new__.
+        """
         self.size = size
-        self.table = [[] for _ in range(size)]
+        self.initial_size = size
+        self.max_load_factor = max_load_factor
+        self.min_load_factor = min_load_factor
+        self.rehash_step = max(1, rehash_step)
+        self.count = 0
+        # Buckets start out as the shared empty tuple and become lists on first insert,
+        # so allocating (or resizing to) millions of buckets is a single C-level copy
+        self.table = [()] * size
+        # Bucket array being drained into self.table during an incremental resize
+        self._old_table = None
+        self._old_size = 0
+        self._migrate_index = 0
+        self._init_tracking()
 
-    def _hash(self, key):
-        return hash(key) % self.size
+    # ------------------------------------------------------------------
+    # Public API (shared by every backend)
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return self.count
+
+    def load_factor(self):
+        return self.count / self.size
 
     def insert(self, key, value):
-        index = self._hash(key)
-        for i, (k, v) in enumerate(self.table[index]):
-            if k == key:
-                self.table[index][i] = (key, value)
-                return True
-        self.table[index].append((key, value))
+        self._put(key, value)
+        if self.persisted_path is not None:
+            self._changes[key] = True
+        if self._index is not None:
+            self._index.add(key, value)
+        if self._search is not None:
+            self._search.add(key, value.name)
         return True
 
     def retrieve(self, key):
-        index = self._hash(key)
-        for k, v in self.table[index]:
-            if k == key:
-                return v
-        return None
+        value = self._get(key)
+        return None if value is _MISSING else value
 
     def delete(self, key):
-        index = self._hash(key)
-        for i, (k, v) in enumerate(self.table[index]):
-            if k == key:
-                del self.table[index][i]
-                return True
-        return False
+        if self._pop(key) is _MISSING:
+            return False
+        if self.persisted_path is not None:
+            self._changes[key] = False
+        if self._index is not None:
+            self._index.remove(key)
+        if self._search is not None:
+            self._search.remove(key)
+        return True
+
+    def add_grade(self, key, course, grade):
+        """
+        Record a grade for the student stored under key.
+
+        Going through the table (rather than calling Student.add_grade on a
+        retrieved student) is what lets the change be tracked and persisted.
+
+        Returns:
+            bool: False if no student is stored under key.
+        """
+        student = self._get(key)
+        if student is _MISSING:
+            return False
+        student.add_grade(course, grade)
+        if self.persisted_path is not None:
+            self._changes[key] = True
+        if self._index is not None:
+            self._index.set_grade(key, course, grade)
+        return True
+
+    # ------------------------------------------------------------------
+    # Bulk operations
+    # ------------------------------------------------------------------
+
+    def reserve(self, count):
+        """
+        Grow the table once so that count entries fit without further resizing.
+
+        A table with max_load_factor=None keeps its fixed size.
+        """
+        if self.max_load_factor is None:
+            return
+        needed = math.ceil(count / self.max_load_factor)
+        if needed > self.size:
+            self._start_resize(needed)
+            self._finish_rehash()
+
+    def insert_many(self, items, unique=False, replace=True):
+        """
+        Insert many students, presizing the table once for all of them.
+
+        Args:
+            items (iterable): (key, student) pairs.
+            unique (bool, optional): The caller guarantees that no key is already
+                                     stored or repeated in items, so the per-row
+                                     duplicate scan is skipped and no conflicts
+                                     are reported. A repeated key would then be
+                                     stored twice.
+            replace (bool, optional): Overwrite students already stored under a key
+                                      (like insert()); False keeps them and skips
+                                      the new row.
+
+        Returns:
+            BulkResult: Rows stored, and the keys that were already present.
+        """
+        if not hasattr(items, '__len__'):
+            items = list(items)
+        self.reserve(self.count + len(items))
+        track = self.persisted_path is not None
+        index = self._index
+        conflicts = []
+        applied = 0
+        # Keep a shrinking table from resizing down while it is still being filled
+        min_load_factor, self.min_load_factor = self.min_load_factor, None
+        try:
+            if unique:
+                put_new = self._put_new
+                for key, value in items:
+                    put_new(key, value)
+                applied = len(items)
+                stored = items
+            else:
+                put, get = self._put, self._get
+                stored = []
+                for key, value in items:
+                    if not replace and get(key) is not _MISSING:
+                        conflicts.append(key)
+                        continue
+                    if put(key, value) is not _MISSING:
+                        conflicts.append(key)
+                    stored.append((key, value))
+                applied = len(stored)
+        finally:
+            self.min_load_factor = min_load_factor
+        if track or index is not None:
+            for key, value in stored:
+                if track:
+                    self._changes[key] = True
+                if index is not None:
+                    index.add(key, value)
+        if self._search is not None:
+            self._search.add_many((key, value.name) for key, value in stored)
+        self._check_load()
+        return BulkResult(applied, conflicts)
+
+    def delete_many(self, keys):
+        """
+        Delete many students in one call, e.g. an end-of-term purge.
+
+        Returns:
+            BulkResult: Students deleted, and the keys that were not stored.
+        """
+        track = self.persisted_path is not None
+        index = self._index
+        pop = self._pop
+        conflicts = []
+        deleted = []
+        for key in keys:
+            if pop(key) is _MISSING:
+                conflicts.append(key)
+                continue
+            deleted.append(key)
+            if track:
+                self._changes[key] = False
+            if index is not None:
+                index.remove(key)
+        if self._search is not None:
+            self._search.remove_many(deleted)
+        return BulkResult(len(deleted), conflicts)
+
+    def update_many(self, updates):
+        """
+        Record many grades in one call, e.g. a bulk enrolment import.
+
+        Args:
+            updates (iterable): (key, {course: grade}) pairs.
+
+        Returns:
+            BulkResult: Students updated, and the keys that were not stored.
+        """
+        track = self.persisted_path is not None
+        index = self._index
+        get = self._get
+        conflicts = []
+        applied = 0
+        for key, grades in updates:
+            student = get(key)
+            if student is _MISSING:
+                conflicts.append(key)
+                continue
+            for course, grade in grades.items():
+                student.add_grade(course, grade)
+                if index is not None:
+                    index.set_grade(key, course, grade)
+            applied += 1
+            if track:
+                self._changes[key] = True
+        return BulkResult(applied, conflicts)
 
     def get_all_students(self):
-        students = []
-        for bucket in self.table:
-            for k, v in bucket:
-                students.append(v)
-        return students
+        return [v for k, v in self._items()]
+
+    def iter_students(self):
+        """Yield every stored student without building a list first."""
+        for k, v in self._items():
+            yield v
 
     def get_all_students_dict(self):
-        students_dict = {}
-        for bucket in self.table:
-            for k, v in bucket:
-                students_dict[k] = v
-        return students_dict
+        return dict(self._items())
 
     def clear(self):
-        self.table = [[] for _ in range(self.size)]
+        self._reset()
+        self._index = None
+        self._search = None
+        # Deletions are no longer recorded individually, so the next save must be a full one
+        self.mark_clean(None)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group a run of writes. In-memory tables apply writes immediately, so
+        this only exists to match stores where grouping matters (e.g. SQLite
+        transactions).
+        """
+        yield self
+
+    # ------------------------------------------------------------------
+    # Secondary indexes (built on the first query, then kept up to date)
+    # ------------------------------------------------------------------
+
+    # StudentIndex over the stored students, or None until a query needs it
+    _index = None
+
+    def _student_index(self):
+        if self._index is None:
+            self._index = StudentIndex.build(self._items())
+        return self._index
+
+    def index_built(self):
+        """
+        Report whether the course/name index exists yet.
+
+        Building it reads every student, which for a roster loaded from a
+        binary snapshot means decoding every row; callers on a UI thread can
+        check this first and build it elsewhere.
+        """
+        return self._index is not None
+
+    # SearchIndex over IDs and names, or None until the first search
+    _search = None
+
+    def search(self, text, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Find students by a partial ID or name, for search-as-you-type.
+
+        The first search indexes the table with one sort; later inserts and
+        deletes keep the index current.
+
+        Args:
+            text (str): An ID prefix, or the beginnings of words of a name.
+            limit (int, optional): Return at most this many students; None returns every match.
+
+        Returns:
+            list: Students whose ID starts with text first, then name matches.
+        """
+        if self._search is None:
+            self._search = SearchIndex.build((key, student.name) for key, student in self._items())
+        return [self._get(key) for key in self._search.search(text, limit)]
+
+    def find_by_name(self, name):
+        """
+        Return every student stored with the given name.
+
+        Returns:
+            list: Matching students in no particular order.
+        """
+        return [self._get(key) for key in self._student_index().keys_for_name(name)]
+
+    def courses(self):
+        """Return the sorted names of all courses that have at least one grade."""
+        return self._student_index().courses()
+
+    def students_in_course(self, course):
+        """
+        Return the students with a grade for course.
+
+        Returns:
+            list: Students in ascending order of their grade for the course.
+        """
+        return [self._get(key) for key in self._student_index().keys_for_course(course)]
+
+    def grade_range(self, course, low=None, high=None, descending=False, limit=None):
+        """
+        Find the students whose grade for course lies in [low, high].
+
+        Args:
+            course (str): Course name.
+            low (float, optional): Inclusive lower bound; None means unbounded.
+            high (float, optional): Inclusive upper bound; None means unbounded.
+            descending (bool, optional): Return the highest grades first.
+            limit (int, optional): Return only the first limit students of that order,
+                                   touching no others.
+
+        Returns:
+            list: (student, grade) pairs in ascending (or descending) grade order.
+        """
+        pairs = self._student_index().grade_range(course, low, high, descending, limit)
+        return [(self._get(key), grade) for key, grade in pairs]
+
+    def course_statistics(self, course):
+        """
+        Return the statistics for a course from its running aggregate.
+
+        Returns:
+            dict: average, median, mode and score_ranges (as utils.grade_statistics),
+                  or {} if the course has no grades.
+        """
+        return self._student_index().course_statistics(course)
+
+    # ------------------------------------------------------------------
+    # Change tracking for incremental persistence
+    # ------------------------------------------------------------------
+
+    def _init_tracking(self):
+        # key -> True (inserted/modified) or False (deleted) since the last save
+        self._changes = {}
+        # File the table contents were last loaded from or saved to; None forces a full save
+        self.persisted_path = None
+
+    def mark_dirty(self, key):
+        """Flag a student that was modified in place so the next save (and the indexes) include it."""
+        if self.persisted_path is not None:
+            self._changes[key] = True
+        if self._index is not None or self._search is not None:
+            student = self._get(key)
+            if student is not _MISSING:
+                if self._index is not None:
+                    self._index.add(key, student)
+                if self._search is not None:
+                    self._search.add(key, student.name)
+
+    def is_dirty(self):
+        return self.persisted_path is None or bool(self._changes)
+
+    def changes(self):
+        """
+        Return the unsaved changes.
+
+        Returns:
+            dict: key -> True for inserted/modified students, False for deleted ones.
+        """
+        return dict(self._changes)
+
+    def mark_clean(self, path):
+        """
+        Record that the table now matches the file at path and forget pending changes.
+
+        Args:
+            path (str): The file just loaded or saved, or None if no file matches.
+        """
+        self._changes = {}
+        self.persisted_path = os.path.abspath(path) if path else None
+
+    def checkpoint(self):
+        """
+        Start a save: return what to write and detach the changes it covers.
+
+        Returns:
+            tuple: (view, changes) where view has iter_students(), retrieve() and
+                   __len__ and reflects every change in changes. Changes made
+                   afterwards are recorded afresh.
+        """
+        changes, self._changes = self._changes, {}
+        return self, changes
+
+    def restore_changes(self, changes):
+        """Put back the changes from a checkpoint() whose save failed (newer changes win)."""
+        for key, present in changes.items():
+            self._changes.setdefault(key, present)
+
+    def mark_persisted(self, path):
+        """
+        Finish a save started with checkpoint(): the file at path now holds the
+        checkpointed view, and only changes recorded since remain pending.
+        """
+        self.persisted_path = os.path.abspath(path) if path else None
+
+    # ------------------------------------------------------------------
+    # Storage primitives (overridden by other backends)
+    # ------------------------------------------------------------------
+
+    def _hash(self, key):
+        return hash(key) % self.size
+
+    def is_rehashing(self):
+        return self._old_table is not None
+
+    def _start_resize(self, new_size):
+        if self._old_table is not None:
+            self._finish_rehash()
+        self._old_table = self.table
+        self._old_size = self.size
+        self._migrate_index = 0
+        self.size = new_size
+        self.table = [()] * new_size
+
+    def _migrate_bucket(self, index):
+        bucket = self._old_table[index]
+        if bucket:
+            self._old_table[index] = ()
+            table = self.table
+            size = self.size
+            for entry in bucket:
+                i = hash(entry[0]) % size
+                target = table[i]
+                if target:
+                    target.append(entry)
+                else:
+                    table[i] = [entry]
+
+    def _rehash_step(self):
+        """Move the next few old buckets into the new table."""
+        old_table = self._old_table
+        table = self.table
+        size = self.size
+        end = min(self._migrate_index + self.rehash_step, self._old_size)
+        # Same as calling _migrate_bucket() on each index, inlined because this runs on every operation
+        for j in range(self._migrate_index, end):
+            bucket = old_table[j]
+            if bucket:
+                old_table[j] = ()
+                for entry in bucket:
+                    i = hash(entry[0]) % size
+                    target = table[i]
+                    if target:
+                        target.append(entry)
+                    else:
+                        table[i] = [entry]
+        self._migrate_index = end
+        if end >= self._old_size:
+            self._old_table = None
+            self._old_size = 0
+            self._migrate_index = 0
+
+    def _finish_rehash(self):
+        while self._old_table is not None:
+            self._rehash_step()
+
+    def _index_for(self, key):
+        """
+        Return the index of the bucket in the current table that holds (or would hold) key.
+
+        While resizing, the key's old bucket is migrated first so the new
+        table is always authoritative for the key being operated on.
+        """
+        if self._old_table is not None:
+            old_index = hash(key) % self._old_size
+            if self._old_table[old_index]:
+                self._migrate_bucket(old_index)
+            self._rehash_step()
+        return hash(key) % self.size
+
+    def _check_load(self):
+        if self._old_table is not None:
+            return
+        if self.max_load_factor is not None and self.count > self.max_load_factor * self.size:
+            self._start_resize(self.size * 2)
+        elif (self.min_load_factor is not None and self.size > self.initial_size
+              and self.count < self.min_load_factor * self.size):
+            self._start_resize(max(self.initial_size, self.size // 2))
+
+    def _put(self, key, value):
+        """Insert or replace key. Returns the previous value or _MISSING."""
+        index = self._index_for(key)
+        bucket = self.table[index]
+        if bucket:
+            for i, (k, v) in enumerate(bucket):
+                if k == key:
+                    bucket[i] = (key, value)
+                    return v
+            bucket.append((key, value))
+        else:
+            self.table[index] = [(key, value)]
+        self.count += 1
+        self._check_load()
+        return _MISSING
+
+    def _put_new(self, key, value):
+        """Insert a key the caller knows is absent, without scanning its bucket."""
+        index = self._index_for(key)
+        bucket = self.table[index]
+        if bucket:
+            bucket.append((key, value))
+        else:
+            self.table[index] = [(key, value)]
+        self.count += 1
+        self._check_load()
+
+    def _get(self, key):
+        for k, v in self.table[self._index_for(key)]:
+            if k == key:
+                return v
+        return _MISSING
+
+    def _pop(self, key):
+        bucket = self.table[self._index_for(key)]
+        for i, (k, v) in enumerate(bucket):
+            if k == key:
+                del bucket[i]
+                self.count -= 1
+                self._check_load()
+                return v
+        return _MISSING
+
+    def _buckets(self):
+        if self._old_table is not None:
+            yield from self._old_table
+        yield from self.table
+
+    def _items(self):
+        for bucket in self._buckets():
+            yield from bucket
+
+    def _reset(self):
+        self.count = 0
+        self._old_table = None
+        self._old_size = 0
+        self._migrate_index = 0
+        self.table = [()] * self.size
+
+    def chain_lengths(self):
+        """
+        Summarise bucket occupancy, mainly for benchmarking.
+
+        Returns:
+            dict: Bucket count, entry count, load factor, longest and mean non-empty chain.
+        """
+        lengths = [len(bucket) for bucket in self._buckets() if bucket]
+        return {
+            'buckets': self.size,
+            'entries': self.count,
+            'load_factor': self.load_factor(),
+            'max_chain': max(lengths) if lengths else 0,
+            'mean_chain': sum(lengths) / len(lengths) if lengths else 0.0
+        }
+
+
+def _next_power_of_two(n):
+    return 1 << max(3, (int(n) - 1).bit_length())
+
+
+def _find_slot(keys, hashes, mask, key, h):
+    """
+    Probe for key using CPython's perturbed probe sequence.
+
+    Returns:
+        tuple: (slot holding key or -1, first reusable slot on the probe path).
+    """
+    i = h & mask
+    perturb = h & _PERTURB_MASK
+    free = -1
+    while True:
+        k = keys[i]
+        if k is _EMPTY:
+            return -1, (i if free < 0 else free)
+        if k is _DELETED:
+            if free < 0:
+                free = i
+        elif hashes[i] == h and (k is key or k == key):
+            return i, free
+        perturb >>= 5
+        i = (i * 5 + perturb + 1) & mask
+
+
+class OpenAddressingHashTable(HashTable):
+    def __init__(self, size=64, max_load_factor=0.66, min_load_factor=None, rehash_step=8, backend='open'):
+        """
+        Open-addressing hash table backed by parallel key/hash/value arrays.
+
+        There is no per-entry tuple or per-bucket list: a slot costs one key
+        reference, one value reference and one unboxed 64-bit cached hash.
+        Cached hashes let probes skip most key comparisons. Resizing is
+        incremental like the chained backend: old slots are migrated a few
+        per operation and lookups consult both arrays until it finishes.
+
+        Args:
+            size (int, optional): Initial slot count, rounded up to a power of two.
+            max_load_factor (float, optional): Resize when used slots (live plus
+                                               tombstones) exceed this fraction.
+            min_load_factor (float, optional): Shrink below this fraction. None never shrinks.
+            rehash_step (int, optional): Old slots migrated per operation while resizing.
+            backend (str, optional): Always 'open'; accepted for HashTable(backend=...).
+        """
+        if max_load_factor is None or not 0 < max_load_factor < 1:
+            raise ValueError("Open addressing needs a max_load_factor between 0 and 1.")
+        self.size = _next_power_of_two(size)
+        self.initial_size = self.size
+        self.max_load_factor = max_load_factor
+        self.min_load_factor = min_load_factor
+        self.rehash_step = max(1, rehash_step)
+        self.count = 0
+        self._alloc(self.size)
+        self._old_keys = None
+        self._old_hashes = None
+        self._old_values = None
+        self._old_mask = 0
+        self._migrate_index = 0
+        self._init_tracking()
+
+    def _alloc(self, capacity):
+        self.size = capacity
+        self._mask = capacity - 1
+        self._keys = [_EMPTY] * capacity
+        self._hashes = array('q', bytes(8 * capacity))
+        self._values = [None] * capacity
+        # Slots that are not _EMPTY (live entries plus tombstones) in the current arrays
+        self._used = 0
+
+    def is_rehashing(self):
+        return self._old_keys is not None
+
+    def _start_resize(self, capacity):
+        if self._old_keys is not None:
+            self._finish_rehash()
+        self._old_keys = self._keys
+        self._old_hashes = self._hashes
+        self._old_values = self._values
+        self._old_mask = self._mask
+        self._migrate_index = 0
+        self._alloc(capacity)
+
+    def _rehash_step(self):
+        old_keys = self._old_keys
+        old_hashes = self._old_hashes
+        old_values = self._old_values
+        keys, hashes, values, mask = self._keys, self._hashes, self._values, self._mask
+        end = min(self._migrate_index + self.rehash_step, len(old_keys))
+        for j in range(self._migrate_index, end):
+            k = old_keys[j]
+            if k is _EMPTY or k is _DELETED:
+                continue
+            h = old_hashes[j]
+            # A key lives in exactly one of the two arrays, so only a free slot is needed
+            _, i = _find_slot(keys, hashes, mask, k, h)
+            if keys[i] is _EMPTY:
+                self._used += 1
+            keys[i] = k
+            hashes[i] = h
+            values[i] = old_values[j]
+            old_keys[j] = _DELETED
+            old_values[j] = None
+        self._migrate_index = end
+        if end >= len(old_keys):
+            self._old_keys = self._old_hashes = self._old_values = None
+            self._old_mask = 0
+            self._migrate_index = 0
+
+    def _finish_rehash(self):
+        while self._old_keys is not None:
+            self._rehash_step()
+
+    def reserve(self, count):
+        capacity = _next_power_of_two(count / self.max_load_factor + 1)
+        if capacity > self.size:
+            self._start_resize(capacity)
+            self._finish_rehash()
+
+    def _target_capacity(self):
+        # Leave room for the live entries plus everything inserted while migrating
+        return max(self.initial_size, _next_power_of_two(self.count * 2 / self.max_load_factor + 1))
+
+    def _check_load(self):
+        if self._old_keys is not None:
+            return
+        if self._used > self.max_load_factor * self.size:
+            self._start_resize(self._target_capacity())
+        elif (self.min_load_factor is not None and self.size > self.initial_size
+              and self.count < self.min_load_factor * self.size):
+            target = self._target_capacity()
+            if target < self.size:
+                self._start_resize(target)
+
+    def _pop_old(self, key, h):
+        j, _ = _find_slot(self._old_keys, self._old_hashes, self._old_mask, key, h)
+        if j < 0:
+            return _MISSING
+        value = self._old_values[j]
+        self._old_keys[j] = _DELETED
+        self._old_values[j] = None
+        return value
+
+    def _put(self, key, value):
+        h = hash(key)
+        if self._old_keys is not None:
+            self._rehash_step()
+        keys = self._keys
+        i, free = _find_slot(keys, self._hashes, self._mask, key, h)
+        if i >= 0:
+            previous = self._values[i]
+            self._values[i] = value
+            return previous
+        previous = _MISSING
+        if self._old_keys is not None:
+            previous = self._pop_old(key, h)
+        if keys[free] is _EMPTY:
+            self._used += 1
+        keys[free] = key
+        self._hashes[free] = h
+        self._values[free] = value
+        if previous is _MISSING:
+            self.count += 1
+        self._check_load()
+        return previous
+
+    def _put_new(self, key, value):
+        """Insert a key the caller knows is absent: take the first free slot without comparing keys."""
+        h = hash(key)
+        if self._old_keys is not None:
+            self._rehash_step()
+        keys, mask = self._keys, self._mask
+        i = h & mask
+        perturb = h & _PERTURB_MASK
+        k = keys[i]
+        while k is not _EMPTY and k is not _DELETED:
+            perturb >>= 5
+            i = (i * 5 + perturb + 1) & mask
+            k = keys[i]
+        if k is _EMPTY:
+            self._used += 1
+        keys[i] = key
+        self._hashes[i] = h
+        self._values[i] = value
+        self.count += 1
+        self._check_load()
+
+    def _get(self, key):
+        h = hash(key)
+        if self._old_keys is not None:
+            self._rehash_step()
+        i, _ = _find_slot(self._keys, self._hashes, self._mask, key, h)
+        if i >= 0:
+            return self._values[i]
+        if self._old_keys is not None:
+            j, _ = _find_slot(self._old_keys, self._old_hashes, self._old_mask, key, h)
+            if j >= 0:
+                return self._old_values[j]
+        return _MISSING
+
+    def _pop(self, key):
+        h = hash(key)
+        if self._old_keys is not None:
+            self._rehash_step()
+        i, _ = _find_slot(self._keys, self._hashes, self._mask, key, h)
+        if i >= 0:
+            value = self._values[i]
+            self._keys[i] = _DELETED
+            self._values[i] = None
+        elif self._old_keys is not None:
+            value = self._pop_old(key, h)
+            if value is _MISSING:
+                return _MISSING
+        else:
+            return _MISSING
+        self.count -= 1
+        self._check_load()
+        return value
+
+    def _items(self):
+        if self._old_keys is not None:
+            for k, v in zip(self._old_keys, self._old_values):
+                if k is not _EMPTY and k is not _DELETED:
+                    yield k, v
+        for k, v in zip(self._keys, self._values):
+            if k is not _EMPTY and k is not _DELETED:
+                yield k, v
+
+    def _reset(self):
+        self.count = 0
+        self._old_keys = self._old_hashes = self._old_values = None
+        self._old_mask = 0
+        self._migrate_index = 0
+        self._alloc(self.size)
+
+    def chain_lengths(self):
+        """
+        Summarise probe-sequence lengths, the open-addressing analogue of chains.
+
+        Returns:
+            dict: Slot count, entry count, load factor, longest and mean probe length.
+        """
+        self._finish_rehash()
+        keys, hashes, mask = self._keys, self._hashes, self._mask
+        lengths = []
+        for slot, key in enumerate(keys):
+            if key is _EMPTY or key is _DELETED:
+                continue
+            h = hashes[slot]
+            i = h & mask
+            perturb = h & _PERTURB_MASK
+            probes = 1
+            while i != slot:
+                perturb >>= 5
+                i = (i * 5 + perturb + 1) & mask
+                probes += 1
+            lengths.append(probes)
+        return {
+            'buckets': self.size,
+            'entries': self.count,
+            'load_factor': self.load_factor(),
+            'max_chain': max(lengths) if lengths else 0,
+            'mean_chain': sum(lengths) / len(lengths) if lengths else 0.0
+        }
+
+
+BACKENDS = {
+    'chained': HashTable,
+    'open': OpenAddressingHashTable,
+}
+
+# Timed while metrics are enabled; left unwrapped (and free) otherwise
+metrics.instrument(HashTable, ['insert', 'retrieve', 'delete', 'add_grade', 'insert_many', 'delete_many',
+                               'update_many', 'search', 'find_by_name', 'grade_range', 'course_statistics'])
@@ -0,0 +1,476 @@
+# indexes.py
+
+import sys
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+
+# Matches returned by a search unless a different limit is asked for
+DEFAULT_SEARCH_LIMIT = 20
+
+# Bulk updates to a SearchIndex larger than this re-sort its arrays instead of inserting row by row
+SEARCH_MERGE_MIN_ROWS = 1000
+
+# Grade distribution buckets reported by the statistics, highest first
+SCORE_RANGES = ("90-100", "80-89", "70-79", "60-69", "Below 60")
+
+
+def score_range(grade):
+    """Return the SCORE_RANGES bucket a grade falls into."""
+    if 90 <= grade <= 100:
+        return "90-100"
+    elif 80 <= grade < 90:
+        return "80-89"
+    elif 70 <= grade < 80:
+        return "70-79"
+    elif 60 <= grade < 70:
+        return "60-69"
+    return "Below 60"
+
+
+class CourseAggregate:
+    """
+    The grades recorded for one course, with running statistics.
+
+    Grades are kept sorted (with the key of each grade alongside), which
+    serves range queries and gives the median by position. Count, sum, the
+    per-grade frequencies and the distribution buckets are updated on every
+    add/remove, so statistics() never rescans the grades.
+    """
+    __slots__ = ('grades', 'keys', 'total', 'frequency', '_grades_by_frequency', '_top_frequency', 'buckets')
+
+    def __init__(self):
+        self.grades = []
+        self.keys = []
+        self.total = 0
+        self.frequency = {}
+        # frequency -> set of grades seen exactly that often, for the mode
+        self._grades_by_frequency = {}
+        self._top_frequency = 0
+        self.buckets = dict.fromkeys(SCORE_RANGES, 0)
+
+    def __len__(self):
+        return len(self.grades)
+
+    def add(self, grade, key):
+        i = bisect_right(self.grades, grade)
+        self.grades.insert(i, grade)
+        self.keys.insert(i, key)
+        self.total += grade
+        self.buckets[score_range(grade)] += 1
+        count = self.frequency.get(grade, 0)
+        if count:
+            self._move_frequency(grade, count, count + 1)
+        else:
+            self._grades_by_frequency.setdefault(1, set()).add(grade)
+        self.frequency[grade] = count + 1
+        if count + 1 > self._top_frequency:
+            self._top_frequency = count + 1
+
+    def remove(self, grade, key):
+        i = bisect_left(self.grades, grade)
+        while self.keys[i] != key:
+            i += 1
+        del self.grades[i]
+        del self.keys[i]
+        self.total -= grade
+        self.buckets[score_range(grade)] -= 1
+        count = self.frequency[grade]
+        if count == 1:
+            del self.frequency[grade]
+            self._move_frequency(grade, 1, None)
+        else:
+            self.frequency[grade] = count - 1
+            self._move_frequency(grade, count, count - 1)
+        if count == self._top_frequency and count not in self._grades_by_frequency:
+            self._top_frequency -= 1
+
+    def _move_frequency(self, grade, old, new):
+        grades = self._grades_by_frequency[old]
+        grades.discard(grade)
+        if not grades:
+            del self._grades_by_frequency[old]
+        if new is not None:
+            self._grades_by_frequency.setdefault(new, set()).add(grade)
+
+    def range(self, low, high):
+        """Return (start, end) positions of the grades with low <= grade <= high."""
+        start = 0 if low is None else bisect_left(self.grades, low)
+        end = len(self.grades) if high is None else bisect_right(self.grades, high)
+        return start, end
+
+    def median(self):
+        grades = self.grades
+        n = len(grades)
+        return grades[n // 2] if n % 2 != 0 else (grades[n // 2 - 1] + grades[n // 2]) / 2
+
+    def mode(self):
+        """The most frequent grade; ties go to the lowest grade."""
+        return min(self._grades_by_frequency[self._top_frequency])
+
+    def statistics(self):
+        """
+        Return the course statistics in the shape utils.grade_statistics produces.
+
+        Returns:
+            dict: average, median, mode and score_ranges, or {} if there are no grades.
+        """
+        if not self.grades:
+            return {}
+        return {
+            'average': self.total / len(self.grades),
+            'median': self.median(),
+            'mode': self.mode(),
+            'score_ranges': dict(self.buckets)
+        }
+
+    @classmethod
+    def from_grades(cls, grades):
+        """
+        Build an aggregate from (grade, key) pairs with one sort.
+
+        Equal grades keep their input order, exactly as adding the pairs one
+        by one would leave them.
+        """
+        aggregate = cls()
+        pairs = sorted(grades, key=itemgetter(0))
+        aggregate.grades = [grade for grade, _ in pairs]
+        aggregate.keys = [key for _, key in pairs]
+        aggregate.total = sum(aggregate.grades)
+        for grade in aggregate.grades:
+            aggregate.buckets[score_range(grade)] += 1
+            aggregate.frequency[grade] = aggregate.frequency.get(grade, 0) + 1
+        for grade, count in aggregate.frequency.items():
+            aggregate._grades_by_frequency.setdefault(count, set()).add(grade)
+        aggregate._top_frequency = max(aggregate._grades_by_frequency, default=0)
+        return aggregate
+
+
+class StudentIndex:
+    def __init__(self):
+        """
+        Secondary indexes over the students stored in a table.
+
+        Maintains name -> keys and, per course, a CourseAggregate of the
+        enrolled keys sorted by grade, so name lookups, enrolment lists,
+        grade-range queries and course statistics do not scan the table.
+        The name and grades each key was indexed under are remembered, so a
+        student edited in place can still be unindexed correctly when it is
+        replaced.
+        """
+        # key -> (name, {course: grade}) as currently indexed
+        self._entries = {}
+        self._by_name = {}
+        self._by_course = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def build(cls, items):
+        """
+        Index many students at once, sorting each course's grades once instead of inserting per grade.
+
+        Args:
+            items (iterable): (key, student) pairs with distinct keys.
+        """
+        index = cls()
+        columns = {}
+        for key, student in items:
+            grades = dict(student.grades)
+            index._entries[key] = (student.name, grades)
+            index._by_name.setdefault(student.name, set()).add(key)
+            for course, grade in grades.items():
+                columns.setdefault(course, []).append((grade, key))
+        index._by_course = {course: CourseAggregate.from_grades(pairs) for course, pairs in columns.items()}
+        return index
+
+    def add(self, key, student):
+        """Index a student under key, replacing whatever was indexed there before."""
+        if key in self._entries:
+            self.remove(key)
+        grades = dict(student.grades)
+        self._entries[key] = (student.name, grades)
+        self._by_name.setdefault(student.name, set()).add(key)
+        for course, grade in grades.items():
+            column = self._by_course.get(course)
+            if column is None:
+                column = self._by_course[course] = CourseAggregate()
+            column.add(grade, key)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        name, grades = entry
+        keys = self._by_name[name]
+        keys.discard(key)
+        if not keys:
+            del self._by_name[name]
+        for course, grade in grades.items():
+            self._remove_grade(course, grade, key)
+
+    def set_grade(self, key, course, grade):
+        """Record (or replace) one course grade for an already indexed key."""
+        grades = self._entries[key][1]
+        if course in grades:
+            self._remove_grade(course, grades[course], key)
+        grades[course] = grade
+        column = self._by_course.get(course)
+        if column is None:
+            column = self._by_course[course] = CourseAggregate()
+        column.add(grade, key)
+
+    def _remove_grade(self, course, grade, key):
+        column = self._by_course[course]
+        column.remove(grade, key)
+        if not column:
+            del self._by_course[course]
+
+    def keys_for_name(self, name):
+        return set(self._by_name.get(name, ()))
+
+    def courses(self):
+        return sorted(self._by_course)
+
+    def keys_for_course(self, course):
+        """Return the keys enrolled in course, in ascending grade order."""
+        column = self._by_course.get(course)
+        return [] if column is None else list(column.keys)
+
+    def grade_range(self, course, low=None, high=None, descending=False, limit=None):
+        """
+        Find the grades for a course that fall in [low, high].
+
+        Args:
+            course (str): Course name.
+            low (float, optional): Inclusive lower bound; None means unbounded.
+            high (float, optional): Inclusive upper bound; None means unbounded.
+            descending (bool, optional): Return the highest grades first.
+            limit (int, optional): Return only the first limit pairs of that order.
+
+        Returns:
+            list: (key, grade) pairs in ascending (or descending) grade order.
+        """
+        column = self._by_course.get(course)
+        if column is None:
+            return []
+        start, end = column.range(low, high)
+        if limit is not None:
+            if descending:
+                start = max(start, end - limit)
+            else:
+                end = min(end, start + limit)
+        pairs = list(zip(column.keys[start:end], column.grades[start:end]))
+        if descending:
+            pairs.reverse()
+        return pairs
+
+    def course_statistics(self, course):
+        """
+        Return the running statistics for a course.
+
+        Returns:
+            dict: average, median, mode and score_ranges, or {} if the course has no grades.
+        """
+        column = self._by_course.get(course)
+        return {} if column is None else column.statistics()
+
+
+def _fold(text):
+    """Case-fold text, reusing the original string when folding changes nothing."""
+    folded = text.casefold()
+    return text if folded == text else folded
+
+
+def name_words(name):
+    """Split a name into the case-folded words a search matches against."""
+    return name.casefold().split()
+
+
+def _prefix_range(values, prefix):
+    """Return (start, end) positions of the sorted values that start with prefix."""
+    start = bisect_left(values, prefix)
+    if not prefix:
+        return start, len(values)
+    last = ord(prefix[-1])
+    if last < sys.maxunicode:
+        # Everything starting with prefix sorts before prefix with its last character bumped
+        return start, bisect_left(values, prefix[:-1] + chr(last + 1), start)
+    end = start
+    while end < len(values) and values[end].startswith(prefix):
+        end += 1
+    return start, end
+
+
+class SearchIndex:
+    def __init__(self):
+        """
+        Search-as-you-type index over student IDs and names.
+
+        IDs are kept case-folded in a sorted array with their keys alongside
+        (the layout CourseAggregate uses for grades). Names are split into
+        case-folded words, each with the list of keys whose name contains it,
+        and the distinct words are kept sorted. A prefix lookup is then a
+        binary search plus a walk over only the matches returned, whatever
+        the roster size.
+
+        A query matches a student whose ID starts with it, or whose name has,
+        for every query word, a word starting with that query word
+        ("ann sm" finds "Anna Smith").
+        """
+        self._ids = []
+        self._id_keys = []
+        # Sorted distinct name words, and word -> keys of the names containing it
+        self._vocabulary = []
+        self._postings = {}
+        # key -> name as indexed, so a student renamed in place is still unindexed correctly
+        self._names = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    @classmethod
+    def build(cls, entries):
+        """
+        Index many students at once, sorting each array once instead of inserting per student.
+
+        Args:
+            entries (iterable): (key, name) pairs.
+        """
+        index = cls()
+        index.add_many(entries)
+        return index
+
+    def add(self, key, name):
+        """Index a student under key, replacing whatever was indexed there before."""
+        if key in self._names:
+            self.remove(key)
+        self._names[key] = name
+        folded = _fold(key)
+        i = bisect_right(self._ids, folded)
+        self._ids.insert(i, folded)
+        self._id_keys.insert(i, key)
+        for word in set(name_words(name)):
+            keys = self._postings.get(word)
+            if keys is None:
+                self._postings[word] = [key]
+                self._vocabulary.insert(bisect_left(self._vocabulary, word), word)
+            else:
+                keys.append(key)
+
+    def add_many(self, entries):
+        """Index many (key, name) pairs, re-sorting once when there are many of them."""
+        # The last name given for a repeated key wins, as with add()
+        latest = dict(entries)
+        if len(latest) < SEARCH_MERGE_MIN_ROWS:
+            for key, name in latest.items():
+                self.add(key, name)
+            return
+        self.remove_many(latest)
+        self._names.update(latest)
+        self._id_keys = sorted(self._id_keys + list(latest), key=str.casefold)
+        self._ids = list(map(_fold, self._id_keys))
+        postings = self._postings
+        for key, name in latest.items():
+            for word in set(name.casefold().split()):
+                keys = postings.get(word)
+                if keys is None:
+                    postings[word] = [key]
+                else:
+                    keys.append(key)
+        self._vocabulary = sorted(postings)
+
+    def remove(self, key):
+        name = self._names.pop(key, None)
+        if name is None:
+            return
+        folded = _fold(key)
+        i = bisect_left(self._ids, folded)
+        while self._id_keys[i] != key:
+            i += 1
+        del self._ids[i]
+        del self._id_keys[i]
+        for word in set(name_words(name)):
+            keys = self._postings[word]
+            keys.remove(key)
+            if not keys:
+                del self._postings[word]
+                del self._vocabulary[bisect_left(self._vocabulary, word)]
+
+    def remove_many(self, keys):
+        """Unindex many keys, with one pass over each affected array when there are many of them."""
+        keys = [key for key in keys if key in self._names]
+        if len(keys) < SEARCH_MERGE_MIN_ROWS:
+            for key in keys:
+                self.remove(key)
+            return
+        gone = set(keys)
+        words = set()
+        for key in gone:
+            words.update(name_words(self._names.pop(key)))
+        kept = [(folded, key) for folded, key in zip(self._ids, self._id_keys) if key not in gone]
+        self._ids = [folded for folded, _ in kept]
+        self._id_keys = [key for _, key in kept]
+        postings = self._postings
+        for word in words:
+            remaining = [key for key in postings[word] if key not in gone]
+            if remaining:
+                postings[word] = remaining
+            else:
+                del postings[word]
+        self._vocabulary = sorted(postings)
+
+    def _candidates(self, start, end):
+        """Yield the keys posted under the vocabulary words in [start, end)."""
+        postings = self._postings
+        for word in self._vocabulary[start:end]:
+            yield from postings[word]
+
+    def _range_cost(self, span):
+        """Number of keys posted under the words in span, estimated when the span is wide."""
+        start, end = span
+        if end - start > 256:
+            # Counting every posting would cost more than the search itself
+            return (end - start) * len(self._names) / len(self._vocabulary)
+        return sum(len(self._postings[word]) for word in self._vocabulary[start:end])
+
+    def search(self, text, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Find the keys matching a partial ID or name.
+
+        Args:
+            text (str): What has been typed so far.
+            limit (int, optional): Return at most this many keys; None returns every match.
+
+        Returns:
+            list: ID prefix matches first (in ID order), then name matches, without repeats.
+        """
+        if limit is None:
+            limit = len(self._names)
+        words = name_words(text)
+        if not words or limit <= 0:
+            return []
+        start, end = _prefix_range(self._ids, _fold(text.strip()))
+        results = self._id_keys[start:min(end, start + limit)]
+        if len(results) >= limit:
+            return results
+        seen = set(results)
+
+        # Walk the cheapest word's matches and check the other words against each candidate's name
+        spans = {word: _prefix_range(self._vocabulary, word) for word in words}
+        first = min(spans, key=lambda word: self._range_cost(spans[word]))
+        others = [word for word in spans if word != first]
+        names = self._names
+        for key in self._candidates(*spans[first]):
+            if key in seen:
+                continue
+            if others:
+                candidate = name_words(names[key])
+                if not all(any(w.startswith(word) for w in candidate) for word in others):
+                    continue
+            seen.add(key)
+            results.append(key)
+            if len(results) >= limit:
+                break
+        return results
@@ -1,12 +1,60 @@
 # main.py
 
+import argparse
+from contextlib import contextmanager
+import profiling
 from hash_table import HashTable
+from sqlite_store import SQLiteStudentStore
+from query import Query
 from student import Student
-from utils import save_to_file, load_from_file, sort_grades, grade_statistics
+from utils import save_changes, load_from_file, grade_statistics_all
 
-def main():
-    ht = HashTable()
-    load_from_file(ht)
+# Profile labels of the menu choices
+MENU_ACTIONS = {
+    '1': 'add student', '2': 'delete student', '3': 'retrieve student', '4': 'add grades',
+    '5': 'display', '6': 'sort grades', '7': 'statistics', '8': 'all statistics', '9': 'save',
+}
+
+@contextmanager
+def profile_action(label, enabled):
+    """Run the block under profiling.capture() when enabled, then say where the profile went."""
+    if not enabled:
+        yield
+        return
+    with profiling.capture(label) as report:
+        yield
+    print(report)
+
+def find_student(ht, name):
+    """
+    Look a student up by name, falling back to a partial name or ID search,
+    and ask for the ID when several students match.
+    """
+    matches = ht.find_by_name(name)
+    if not matches:
+        matches = ht.search(name)
+    if len(matches) > 1:
+        print(f"{len(matches)} students match '{name}':")
+        for student in matches:
+            print(f"  {student.student_id}  {student.name}")
+        return ht.retrieve(input("Enter Student ID: "))
+    return matches[0] if matches else None
+
+def print_statistics(course, stats):
+    print(f"Grade Statistics for {course}:")
+    print(f"  Average: {stats['average']:.2f}  Median: {stats['median']}  Mode: {stats['mode']}")
+    for range_, count in stats['score_ranges'].items():
+        print(f"  {range_}: {count} students")
+
+def main(db_path=None, profile=False):
+    if db_path:
+        # Every change is written to the database as it happens
+        ht = SQLiteStudentStore(db_path)
+    else:
+        ht = HashTable()
+        with profile_action('startup load', profile):
+            load_from_file(ht)
+    profile_next = profile
 
     while True:
         print("\n--- Student Management System ---")
@@ -17,92 +65,107 @@ def main():
         print("5. Display All Students")
         print("6. Sort Grades for a Course")
         print("7. Grade Statistics for a Course")
-        print("8. Save and Exit")
+        print("8. Statistics for All Courses")
+        print("9. Save and Exit")
         choice = input("Enter your choice: ")
+        # With --profile, the first menu action runs under the profiler (prompts included)
+        armed = profile_next and choice in MENU_ACTIONS
+        if armed:
+            profile_next = False
+        with profile_action(MENU_ACTIONS.get(choice), armed):
+            if choice == '1':
+                student_id = input("Enter Student ID: ")
+                name = input("Enter Name: ")
+                gender = input("Enter Gender: ")
+                try:
+                    age = int(input("Enter Age: "))
+                except ValueError:
+                    print("Invalid age. Please enter a number.")
+                    continue
+                student = Student(student_id, name, gender, age)
+                ht.insert(student_id, student)
+                print("Student added successfully.")
 
-        if choice == '1':
-            student_id = input("Enter Student ID: ")
-            name = input("Enter Name: ")
-            gender = input("Enter Gender: ")
-            try:
-                age = int(input("Enter Age: "))
-            except ValueError:
-                print("Invalid age. Please enter a number.")
-                continue
-            student = Student(student_id, name, gender, age)
-            ht.insert(name, student)
-            print("Student added successfully.")
-
-        elif choice == '2':
-            name = input("Enter Name of the student to delete: ")
-            if ht.delete(name):
-                print("Student deleted successfully.")
-            else:
-                print("Student not found.")
+            elif choice == '2':
+                name = input("Enter Name of the student to delete: ")
+                student = find_student(ht, name)
+                if student and ht.delete(student.student_id):
+                    print("Student deleted successfully.")
+                else:
+                    print("Student not found.")
+
+            elif choice == '3':
+                name = input("Enter Name of the student to retrieve: ")
+                student = find_student(ht, name)
+                if student:
+                    print(student)
+                else:
+                    print("Student not found.")
+
+            elif choice == '4':
+                name = input("Enter Student Name to add grades: ")
+                student = find_student(ht, name)
+                if student:
+                    while True:
+                        course = input("Enter Course Name (or 'done' to finish): ")
+                        if course.lower() == 'done':
+                            break
+                        try:
+                            grade = float(input(f"Enter grade for {course}: "))
+                            ht.add_grade(student.student_id, course, grade)
+                            print(f"Grade for {course} added.")
+                        except ValueError:
+                            print("Invalid grade. Please enter a number.")
+                else:
+                    print("Student not found.")
+
+            elif choice == '5':
+                count = 0
+                for student in Query(ht).order_by('student_id'):
+                    print(f"  {student.student_id}  {student.name}  {student.gender}  {student.age}  {student.grades}")
+                    count += 1
+                print(f"{count} student(s).")
+
+            elif choice == '6':
+                course = input("Enter Course Name to sort grades: ")
+                students = Query(ht).where(course=course).order_by('grade', 'student_id').all()
+                if not students:
+                    print(f"No grades found for course '{course}'.")
+                    continue
+                print(f"Sorted grades for {course}:")
+                for student in students:
+                    print(f"  {student.grades[course]:>6}  {student.student_id}  {student.name}")
+
+            elif choice == '7':
+                course = input("Enter Course Name for statistics: ")
+                stats = Query(ht).where(course=course).statistics()
+                if not stats:
+                    print(f"No grades found for course '{course}'.")
+                    continue
+                print_statistics(course, stats)
+
+            elif choice == '8':
+                report = grade_statistics_all(ht.iter_students())
+                if not report:
+                    print("No grades recorded yet.")
+                for course, stats in report.items():
+                    print_statistics(course, stats)
+
+            elif choice == '9':
+                save_changes(ht, 'students.txt')
+                if isinstance(ht, SQLiteStudentStore):
+                    ht.close()
+                print("Data saved. Exiting...")
+                break
 
-        elif choice == '3':
-            name = input("Enter Name of the student to retrieve: ")
-            student = ht.retrieve(name)
-            if student:
-                print(student)
-            else:
-                print("Student not found.")
-
-        elif choice == '4':
-            name = input("Enter Student Name to add grades: ")
-            student = ht.retrieve(name)
-            if student:
-                while True:
-                    course = input("Enter Course Name (or 'done' to finish): ")
-                    if course.lower() == 'done':
-                        break
-                    try:
-                        grade = float(input(f"Enter grade for {course}: "))
-                        student.add_grade(course, grade)
-                        print(f"Grade for {course} added.")
-                    except ValueError:
-                        print("Invalid grade. Please enter a number.")
             else:
-                print("Student not found.")
-
-        elif choice == '5':
-            ht.display()
-
-        elif choice == '6':
-            course = input("Enter Course Name to sort grades: ")
-            students = []
-            for bucket in ht.table:
-                for key, student in bucket:
-                    if course in student.grades:
-                        students.append(student)
-            if not students:
-                print(f"No grades found for course '{course}'.")
-                continue
-            sorted_grades = sort_grades(students, course)
-            print(f"Sorted grades for {course}: {sorted_grades}")
-
-        elif choice == '7':
-            course = input("Enter Course Name for statistics: ")
-            students = []
-            for bucket in ht.table:
-                for key, student in bucket:
-                    if course in student.grades:
-                        students.append(student)
-            if not students:
-                print(f"No grades found for course '{course}'.")
-                continue
-            stats = grade_statistics(students, course)
-            print(f"Grade Statistics for {course}:")
-            for range_, count in stats.items():
-                print(f"{range_}: {count} students")
-
-        elif choice == '8':
-            save_to_file(ht)
-            print("Data saved. Exiting...")
-            break
-
-        else:
-            print("Invalid choice. Please try again.")
+                print("Invalid choice. Please try again.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Student Management System (console)")
+    parser.add_argument('--db', help="Open this SQLite database instead of students.txt.")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile the startup load and the first menu action with cProfile and "
+                             "tracemalloc; the files are written next to students.txt.")
+    args = parser.parse_args()
+    main(args.db, args.profile)
@@ -0,0 +1,218 @@
+# metrics.py
+
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the latency histogram buckets; a last bucket takes anything slower
+LATENCY_BUCKETS = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+BUCKET_LABELS = ('<10us', '<100us', '<1ms', '<10ms', '<100ms', '<1s', '>=1s')
+
+# Recording is off until enable(); while off, timed() and measure() cost one flag check
+# and instrument()ed methods are not wrapped at all
+_enabled = False
+_lock = threading.Lock()
+_stats = {}
+# [class, attribute, metric name, original or None if inherited] for every instrument()ed method
+_methods = []
+
+
+class Stat:
+    """Call count, latency histogram and I/O byte counts for one instrumented operation."""
+    __slots__ = ('count', 'total', 'max', 'buckets', 'bytes_read', 'bytes_written')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_s': self.total,
+            'mean_s': self.total / self.count if self.count else 0.0,
+            'max_s': self.max,
+            'histogram': dict(zip(BUCKET_LABELS, self.buckets)),
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+        }
+
+
+def _stat(name):
+    stat = _stats.get(name)
+    if stat is None:
+        stat = _stats[name] = Stat()
+    return stat
+
+
+def record(name, seconds):
+    """Add one call of the named operation, taking seconds, to its statistics."""
+    with _lock:
+        _stat(name).record(seconds)
+
+
+def add_bytes(name, read=0, written=0):
+    """Count bytes read or written by the named operation (ignored while disabled)."""
+    if not _enabled:
+        return
+    with _lock:
+        stat = _stat(name)
+        stat.bytes_read += read
+        stat.bytes_written += written
+
+
+def add_file_size(name, path, written=False):
+    """Count the size of a file the named operation read (or wrote) in full, if it exists."""
+    if _enabled and os.path.exists(path):
+        size = os.path.getsize(path)
+        add_bytes(name, written=size) if written else add_bytes(name, read=size)
+
+
+def timed(name):
+    """
+    Decorate a function so each call is recorded under name while metrics are enabled.
+
+    Meant for functions that do real work (file I/O, reports, GUI handlers);
+    the per-call flag check is negligible next to them. For hot methods use
+    instrument(), which costs nothing while disabled.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class measure:
+    """
+    Context manager recording the time spent in its block under name.
+
+    Example:
+        with metrics.measure('gui.tree_refresh'):
+            ...
+    """
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter() if _enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def instrument(cls, names, prefix=None):
+    """
+    Register methods of cls to be timed while metrics are enabled.
+
+    The methods are swapped for timing wrappers by enable() and restored by
+    disable(), so the hot paths of a table (retrieve, insert, ...) run
+    unwrapped while metrics are off.
+
+    Args:
+        cls (type): The class owning (or inheriting) the methods.
+        names (iterable): Method names.
+        prefix (str, optional): Metric name prefix. Defaults to the class name.
+    """
+    prefix = prefix or cls.__name__
+    for name in names:
+        entry = [cls, name, f"{prefix}.{name}", None]
+        _methods.append(entry)
+        if _enabled:
+            _patch(entry)
+
+
+def _patch(entry):
+    cls, name, metric, _ = entry
+    original = cls.__dict__.get(name)
+    entry[3] = original
+    setattr(cls, name, timed(metric)(getattr(cls, name)))
+
+
+def _unpatch(entry):
+    cls, name, _, original = entry
+    if original is None:
+        delattr(cls, name)
+    else:
+        setattr(cls, name, original)
+    entry[3] = None
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable():
+    """Start recording."""
+    global _enabled
+    with _lock:
+        if _enabled:
+            return
+        _enabled = True
+        for entry in _methods:
+            _patch(entry)
+
+
+def disable():
+    """Stop recording; the statistics gathered so far are kept."""
+    global _enabled
+    with _lock:
+        if not _enabled:
+            return
+        _enabled = False
+        for entry in reversed(_methods):
+            _unpatch(entry)
+
+
+def reset():
+    """Forget every recorded statistic."""
+    with _lock:
+        _stats.clear()
+
+
+def snapshot():
+    """
+    Return the statistics recorded so far.
+
+    Returns:
+        dict: metric name -> Stat.to_dict(), sorted by name.
+    """
+    with _lock:
+        return {name: _stats[name].to_dict() for name in sorted(_stats)}
+
+
+def dump(file_path):
+    """
+    Write snapshot() to a JSON file.
+
+    Args:
+        file_path (str): Where to write.
+    """
+    report = {'enabled': _enabled, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'metrics': snapshot()}
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
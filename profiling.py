@@ -0,0 +1,141 @@
+# profiling.py
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Lines listed in the allocation and function sections of a profile report
+REPORT_TOP = 25
+
+# Stack frames kept per allocation; 1 groups allocations by the line that made them
+TRACEMALLOC_FRAMES = 1
+
+# cProfile and tracemalloc are process-wide enough that two captures would garble each other
+_capture_lock = threading.Lock()
+
+
+class ProfileReport:
+    """Where a capture wrote its files, filled in when the profiled block ends."""
+
+    def __init__(self, label):
+        self.label = label
+        self.stats_path = None
+        self.report_path = None
+        self.seconds = None
+        self.peak_bytes = None
+
+    def __str__(self):
+        return f"Profile of '{self.label}' ({self.seconds:.2f}s) saved to {self.stats_path} and {self.report_path}"
+
+
+def profile_directory(data_file='students.txt'):
+    """Return the directory profiles are written to: the one holding the data file."""
+    return os.path.dirname(os.path.abspath(data_file))
+
+
+def _slug(label):
+    return re.sub(r'[^A-Za-z0-9]+', '-', label).strip('-').lower() or 'action'
+
+
+@contextmanager
+def capture(label, directory=None, top=REPORT_TOP):
+    """
+    Run a block under cProfile and tracemalloc and write what they found.
+
+    Two files are written to directory, named after the label and the time:
+    profile-<label>-<time>.pstats (load it with pstats or snakeviz) and
+    profile-<label>-<time>.txt listing the slowest functions by cumulative
+    time and the lines that allocated the most memory still held at the end,
+    with the peak traced memory. cProfile only sees the thread the block runs
+    on; work handed to other threads or processes shows up as waiting.
+
+    Args:
+        label (str): What is being profiled, e.g. 'load'.
+        directory (str, optional): Where to write. Defaults to profile_directory().
+        top (int, optional): Entries listed per section of the text report.
+
+    Yields:
+        ProfileReport: Holds the file paths once the block has finished.
+
+    Raises:
+        ValueError: If another capture is already running.
+    """
+    if not _capture_lock.acquire(blocking=False):
+        raise ValueError("Another profile is already being captured.")
+    report = ProfileReport(label)
+    was_tracing = tracemalloc.is_tracing()
+    try:
+        if not was_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            report.seconds = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            _, report.peak_bytes = tracemalloc.get_traced_memory()
+            if not was_tracing:
+                tracemalloc.stop()
+            _write_report(report, profiler, snapshot, directory or profile_directory(), top)
+    finally:
+        _capture_lock.release()
+
+
+def _write_report(report, profiler, snapshot, directory, top):
+    base = os.path.join(directory, f"profile-{_slug(report.label)}-{time.strftime('%Y%m%d-%H%M%S')}")
+    report.stats_path = base + '.pstats'
+    report.report_path = base + '.txt'
+    profiler.dump_stats(report.stats_path)
+
+    functions = io.StringIO()
+    pstats.Stats(profiler, stream=functions).sort_stats('cumulative').print_stats(top)
+    # Leave out the profiler's own bookkeeping
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                       tracemalloc.Filter(False, __file__)])
+    allocations = snapshot.statistics('lineno')
+    with open(report.report_path, 'w', encoding='utf-8') as f:
+        f.write(f"Profile of '{report.label}'\n")
+        f.write(f"Wall time: {report.seconds:.3f}s\n")
+        f.write(f"Peak traced memory: {report.peak_bytes / (1024 * 1024):.1f} MiB\n")
+        f.write(f"Still allocated at the end: {sum(s.size for s in allocations) / (1024 * 1024):.1f} MiB\n\n")
+        f.write(f"Top {top} allocation sites (memory still held at the end):\n")
+        for stat in allocations[:top]:
+            frame = stat.traceback[0]
+            f.write(f"  {stat.size / 1024:10.1f} KiB  {stat.count:9d} blocks  {frame.filename}:{frame.lineno}\n")
+        f.write(f"\nTop {top} functions by cumulative time:\n")
+        f.write(functions.getvalue())
+
+
+def profiled(label, fn, directory=None, on_report=None):
+    """
+    Wrap fn so that its next call is captured.
+
+    Args:
+        label (str): Passed to capture().
+        fn (callable): The function to profile.
+        directory (str, optional): Passed to capture().
+        on_report (callable, optional): Called with the ProfileReport once it is written.
+
+    Returns:
+        callable: Takes the same arguments as fn and returns its result.
+    """
+    def wrapper(*args, **kwargs):
+        report = None
+        try:
+            with capture(label, directory) as report:
+                return fn(*args, **kwargs)
+        finally:
+            # Reported even when fn failed: the profile of a failing action is still useful
+            if on_report is not None and report is not None and report.stats_path:
+                on_report(report)
+    return wrapper
@@ -0,0 +1,482 @@
+# query.py
+
+import heapq
+from collections import namedtuple
+from itertools import groupby, islice
+from operator import attrgetter
+
+from indexes import name_words
+from utils import summarize_grades
+
+# Fields a condition or ordering can name; 'grade' means the grade for the course the query is restricted to
+FIELDS = ('student_id', 'name', 'gender', 'age', 'total', 'course', 'grade', 'search')
+
+_LOOKUPS = {
+    'eq': lambda value, arg: value == arg,
+    'ne': lambda value, arg: value != arg,
+    'lt': lambda value, arg: value < arg,
+    'lte': lambda value, arg: value <= arg,
+    'gt': lambda value, arg: value > arg,
+    'gte': lambda value, arg: value >= arg,
+    'in': lambda value, arg: value in arg,
+    'contains': lambda value, arg: arg in value,
+    'startswith': lambda value, arg: value.startswith(arg),
+}
+
+# One where() keyword argument, split into its parts
+Condition = namedtuple('Condition', ['field', 'lookup', 'value'])
+
+# How a query will run: the access path, the conditions it leaves to check per student,
+# whether its students already come out in the requested order, and whether they come out
+# in grade order with only equal grades left to sort by the later keys
+_Plan = namedtuple('_Plan', ['source', 'fetch', 'residual', 'ordered', 'by_grade'], defaults=(False,))
+
+
+def _parse_condition(name, value):
+    field, _, lookup = name.partition('__')
+    lookup = lookup or 'eq'
+    if field not in FIELDS:
+        raise ValueError(f"Unknown field '{field}'. Expected one of: {', '.join(FIELDS)}.")
+    if lookup not in _LOOKUPS:
+        raise ValueError(f"Unknown lookup '{lookup}'. Expected one of: {', '.join(_LOOKUPS)}.")
+    if field == 'course' and lookup not in ('eq', 'in'):
+        raise ValueError("Courses can only be matched with course= or course__in=.")
+    if field == 'search' and lookup != 'eq':
+        raise ValueError("search= takes the text to search for and no lookup.")
+    if lookup == 'in':
+        value = tuple(value)
+    return Condition(field, lookup, value)
+
+
+class _Reversed:
+    """A sort key part that orders descending inside an otherwise ascending key tuple."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _matches_search(student, text):
+    """The test HashTable.search() applies: an ID prefix, or every word starting a word of the name."""
+    words = name_words(text)
+    if not words:
+        return False
+    if student.student_id.casefold().startswith(text.strip().casefold()):
+        return True
+    candidate = name_words(student.name)
+    return all(any(w.startswith(word) for w in candidate) for word in words)
+
+
+class Query:
+    def __init__(self, store):
+        """
+        Filter, order and page the students of a store without hand-written loops.
+
+        Queries are built by chaining where(), order_by(), offset() and
+        limit(); each returns a new Query, so a base query can be reused.
+        Nothing runs until the query is iterated (or all(), first(),
+        count(), ... is called). A small planner then picks the cheapest
+        access path the store offers:
+
+        - student_id= or student_id__in= -> retrieve()
+        - name= -> find_by_name()
+        - search= -> search()
+        - course= (with grade bounds) -> grade_range(), already in grade order
+        - otherwise a stream over iter_students()
+
+        Conditions the access path does not settle are checked per student.
+        Without an order_by() the stream stops as soon as limit() students
+        are found; with one, a limit selects the top students with a heap
+        instead of sorting everything, and an order by grade over a course
+        is handed to grade_range() along with the limit.
+
+        Example:
+            Query(store).where(gender='Female', age__gte=20, course='CG', grade__lt=60) \\
+                        .order_by('-grade').limit(100)
+
+        Args:
+            store: HashTable, ConcurrentHashTable, Roster or SQLiteStudentStore.
+                   Anything with iter_students() works; missing index methods are scanned instead.
+        """
+        self.store = store
+        self._conditions = ()
+        self._order = ()
+        self._descending = False
+        self._offset = 0
+        self._limit = None
+
+    def _copy(self, **changes):
+        query = Query(self.store)
+        query.__dict__.update(self.__dict__)
+        query.__dict__.update(changes)
+        return query
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def where(self, **conditions):
+        """
+        Keep only the students matching every condition.
+
+        Conditions are field=value or field__lookup=value, with lookups eq,
+        ne, lt, lte, gt, gte, in, contains and startswith. Fields are
+        student_id, name, gender, age, total (the sum of the grades),
+        course (= or __in: the student has a grade for it), grade (the
+        grade for the course given with course=) and search (a partial ID or
+        name, as HashTable.search()).
+
+        Returns:
+            Query: A new query with the conditions added.
+
+        Raises:
+            ValueError: For an unknown field or lookup.
+        """
+        parsed = tuple(_parse_condition(name, value) for name, value in conditions.items())
+        return self._copy(_conditions=self._conditions + parsed)
+
+    def order_by(self, *keys, descending=False):
+        """
+        Order the results.
+
+        Args:
+            *keys: Field names, '-' prefixed for descending (e.g. '-grade', 'student_id'),
+                   or callables taking a student.
+            descending (bool, optional): Reverse the whole ordering.
+
+        Returns:
+            Query: A new query with this ordering in place of any earlier one.
+        """
+        order = []
+        for key in keys:
+            reverse = False
+            if isinstance(key, str):
+                if key.startswith('-'):
+                    key, reverse = key[1:], True
+                if key not in FIELDS or key in ('course', 'search'):
+                    raise ValueError(f"Cannot order by '{key}'.")
+            order.append((key, reverse))
+        return self._copy(_order=tuple(order), _descending=descending)
+
+    def offset(self, count):
+        """Skip the first count results (for paging)."""
+        return self._copy(_offset=max(0, count))
+
+    def limit(self, count):
+        """Return at most count results; None removes the limit."""
+        return self._copy(_limit=None if count is None else max(0, count))
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+
+    def _course(self):
+        """The course every result must be enrolled in, or None."""
+        for condition in self._conditions:
+            if condition.field == 'course' and condition.lookup == 'eq':
+                return condition.value
+        return None
+
+    def _getter(self, field):
+        if callable(field):
+            return field
+        if field == 'total':
+            return lambda student: student.total_grade()
+        if field == 'grade':
+            course = self._course()
+            if course is None:
+                raise ValueError("Conditions and orderings on grade need a course= condition.")
+            return lambda student: student.grades.get(course)
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field '{field}'. Expected one of: {', '.join(FIELDS)}.")
+        return attrgetter(field)
+
+    def _test(self, condition):
+        """Return a predicate for one condition."""
+        field, lookup, value = condition
+        if field == 'search':
+            return lambda student: _matches_search(student, value)
+        if field == 'course':
+            if lookup == 'eq':
+                return lambda student: value in student.grades
+            return lambda student: any(course in student.grades for course in value)
+        getter = self._getter(field)
+        compare = _LOOKUPS[lookup]
+        if field == 'grade':
+            return lambda student: getter(student) is not None and compare(getter(student), value)
+        return lambda student: compare(getter(student), value)
+
+    def _index(self, name):
+        return getattr(self.store, name, None)
+
+    def _find(self, field, lookup):
+        for condition in self._conditions:
+            if condition.field == field and condition.lookup == lookup:
+                return condition
+        return None
+
+    def _plan(self):
+        conditions = list(self._conditions)
+        store = self.store
+
+        def settle(*settled):
+            return [c for c in conditions if c not in settled]
+
+        by_id = self._find('student_id', 'eq')
+        if by_id is not None and self._index('retrieve'):
+            def fetch():
+                student = store.retrieve(by_id.value)
+                return [] if student is None else [student]
+            return _Plan(f"retrieve({by_id.value!r})", fetch, settle(by_id), False)
+
+        by_ids = self._find('student_id', 'in')
+        if by_ids is not None and self._index('retrieve'):
+            def fetch():
+                keys = dict.fromkeys(by_ids.value)
+                return [student for student in map(store.retrieve, keys) if student is not None]
+            return _Plan(f"retrieve each of {len(by_ids.value)} ID(s)", fetch, settle(by_ids), False)
+
+        by_name = self._find('name', 'eq')
+        if by_name is not None and self._index('find_by_name'):
+            return _Plan(f"find_by_name({by_name.value!r})", lambda: store.find_by_name(by_name.value),
+                         settle(by_name), False)
+
+        by_text = self._find('search', 'eq')
+        if by_text is not None and self._index('search'):
+            return _Plan(f"search({by_text.value!r})", lambda: store.search(by_text.value, None),
+                         settle(by_text), False)
+
+        by_course = self._find('course', 'eq')
+        if by_course is not None and self._index('grade_range'):
+            return self._grade_range_plan(by_course, conditions)
+
+        return _Plan("scan iter_students()", store.iter_students, conditions, False)
+
+    def _grade_range_plan(self, by_course, conditions):
+        """Serve course= and inclusive grade bounds from the per-course grade index."""
+        course = by_course.value
+        low = high = None
+        settled = [by_course]
+        for condition in conditions:
+            if condition.field != 'grade':
+                continue
+            # Strict bounds narrow the range but still need checking, since grade_range() is inclusive
+            if condition.lookup in ('gte', 'gt', 'eq'):
+                low = condition.value if low is None else max(low, condition.value)
+            if condition.lookup in ('lte', 'lt', 'eq'):
+                high = condition.value if high is None else min(high, condition.value)
+            if condition.lookup in ('gte', 'lte', 'eq'):
+                settled.append(condition)
+        residual = [c for c in conditions if c not in settled]
+
+        # The index yields grade order, so an order by grade needs no sort; later keys
+        # (e.g. 'student_id' as a tie-break) only reorder students with equal grades
+        by_grade = bool(self._order) and self._order[0][0] == 'grade'
+        ordered = by_grade and len(self._order) == 1
+        descending = by_grade and self._order[0][1] != self._descending
+        limit = None
+        if by_grade and self._limit is not None:
+            limit = self._offset + self._limit
+
+        def fetch():
+            if limit is None or (ordered and not residual):
+                return (student for student, _ in self.store.grade_range(course, low, high, descending, limit))
+            if not residual:
+                return self._with_edge_ties(course, low, high, descending, limit)
+            # Filtered-out students have to be made up for, so the range is read in growing batches
+            return self._grade_batches(course, low, high, descending, limit)
+
+        bounds = ''.join(f", {name}={value!r}" for name, value in (('low', low), ('high', high)) if value is not None)
+        source = f"grade_range({course!r}{bounds}{', descending' if descending else ''}"
+        if limit is not None:
+            source += f", limit={limit}" if not residual else f", limit={limit} growing x4"
+        source += ")"
+        if limit is not None and not ordered and not residual:
+            source += " + the ties of its last grade"
+        return _Plan(source, fetch, residual, ordered, by_grade and not ordered)
+
+    def _with_edge_ties(self, course, low, high, descending, wanted):
+        """
+        The first wanted students of grade_range(), plus every other student
+        sharing the last one's grade, still in grade order.
+        """
+        pairs = self.store.grade_range(course, low, high, descending, wanted)
+        if len(pairs) < wanted or not pairs:
+            return [student for student, _ in pairs]
+        edge = pairs[-1][1]
+        students = [student for student, grade in pairs if grade != edge]
+        students.extend(student for student, _ in self.store.grade_range(course, edge, edge))
+        return students
+
+    def _grade_batches(self, course, low, high, descending, wanted):
+        """
+        Stream grade_range() results when some are going to be filtered out.
+
+        Asks for the first wanted students, then four times as many each time
+        the filter leaves too few, so a selective filter costs a few calls
+        rather than a full range and an unselective one a single call.
+        """
+        seen = 0
+        while True:
+            pairs = self.store.grade_range(course, low, high, descending, wanted)
+            for student, _ in pairs[seen:]:
+                yield student
+            if len(pairs) < wanted:
+                return
+            seen = len(pairs)
+            wanted *= 4
+
+    def explain(self):
+        """
+        Describe how the query would run.
+
+        Returns:
+            str: The access path, the per-student checks and the ordering step.
+        """
+        plan = self._plan()
+        lines = [f"source: {plan.source}"]
+        if plan.residual:
+            lines.append("filter: " + ", ".join(f"{c.field} {c.lookup} {c.value!r}" for c in plan.residual))
+        if self._order:
+            if plan.ordered:
+                lines.append("order: from index")
+            elif plan.by_grade and self._limit is not None:
+                lines.append(f"order: grade from index; runs of equal grades sorted by the later keys, "
+                             f"up to the run holding result {self._offset + self._limit}")
+            elif plan.by_grade:
+                lines.append("order: grade from index; runs of equal grades sorted by the later keys")
+            elif self._limit is not None:
+                lines.append(f"order: top {self._offset + self._limit} by heap")
+            else:
+                lines.append("order: sort")
+        if self._offset or self._limit is not None:
+            lines.append(f"page: offset {self._offset}, limit {self._limit}")
+        return "\n".join(lines)
+
+    # ------------------------------------------------------------------
+    # Running
+    # ------------------------------------------------------------------
+
+    def _sorted(self, students):
+        keys = [(self._getter(field), reverse != self._descending) for field, reverse in self._order]
+        if len({reverse for _, reverse in keys}) > 1:
+            # Mixed directions: one ascending key with the descending parts inverted, so a
+            # limit can still select with a heap
+            def key(student):
+                return tuple(_Reversed(getter(student)) if reverse else getter(student) for getter, reverse in keys)
+            reverse = False
+        else:
+            reverse = keys[0][1]
+            key = keys[0][0] if len(keys) == 1 else lambda s: tuple(getter(s) for getter, _ in keys)
+        if self._limit is None:
+            return sorted(students, key=key, reverse=reverse)
+        # nsmallest/nlargest are stable, exactly like sorted(...)[:k]
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        return select(self._offset + self._limit, students, key=key)
+
+    def _sort_ties(self, students):
+        """
+        Order students arriving in grade order by the later sort keys too.
+
+        Only runs of equal grades need sorting, each with the fast built-in
+        sort; with a limit, the runs stop with the one that reaches it.
+        """
+        grade = self._getter('grade')
+        # Stable sorts from the last key to the first handle mixed directions
+        keys = [(self._getter(field), reverse != self._descending) for field, reverse in reversed(self._order[1:])]
+        wanted = None if self._limit is None else self._offset + self._limit
+        produced = 0
+        for _, run in groupby(students, key=grade):
+            if wanted is not None and produced >= wanted:
+                return
+            run = list(run)
+            for getter, reverse in keys:
+                run.sort(key=getter, reverse=reverse)
+            produced += len(run)
+            yield from run
+
+    def __iter__(self):
+        plan = self._plan()
+        students = plan.fetch()
+        if plan.residual:
+            tests = [self._test(condition) for condition in plan.residual]
+            students = (s for s in students if all(test(s) for test in tests))
+        if plan.by_grade:
+            students = self._sort_ties(students)
+        elif self._order and not plan.ordered:
+            students = self._sorted(students)
+        stop = None if self._limit is None else self._offset + self._limit
+        return islice(students, self._offset, stop)
+
+    def all(self):
+        """Return the results as a list."""
+        return list(self)
+
+    def first(self):
+        """Return the first result, or None."""
+        return next(iter(self.limit(1)), None)
+
+    def count(self):
+        """Return the number of results, without ordering them."""
+        course = self._course()
+        if not self._conditions and hasattr(self.store, '__len__'):
+            total = len(self.store)
+        elif len(self._conditions) == 1 and course is not None and self._index('course_statistics'):
+            # The course's running aggregate already knows how many grades it holds
+            total = sum(self.store.course_statistics(course).get('score_ranges', {}).values())
+        else:
+            total = sum(1 for _ in self._copy(_order=(), _offset=0, _limit=None))
+        total = max(0, total - self._offset)
+        return total if self._limit is None else min(total, self._limit)
+
+    def values(self, *fields):
+        """
+        Project the results onto some fields.
+
+        Args:
+            *fields (str): Field names, e.g. 'student_id', 'grade'.
+
+        Returns:
+            list: One tuple of the requested values per result.
+        """
+        getters = [self._getter(field) for field in fields]
+        return [tuple(getter(student) for getter in getters) for student in self]
+
+    def distinct(self, field):
+        """
+        Return the distinct values of a field among the results, sorted.
+
+        For 'course' this is every course the matching students have a grade for.
+        """
+        if field == 'course':
+            if not self._conditions and self._index('courses'):
+                return list(self.store.courses())
+            return sorted({course for student in self for course in student.grades})
+        getter = self._getter(field)
+        return sorted({getter(student) for student in self})
+
+    def statistics(self):
+        """
+        Summarize the grades of the results for the course given with course=.
+
+        A query restricted to nothing but the course is answered from the
+        store's running course aggregate when it keeps one.
+
+        Returns:
+            dict: average, median, mode and score_ranges (as utils.grade_statistics),
+                  or {} if no result has a grade.
+        """
+        course = self._course()
+        if course is None:
+            raise ValueError("statistics() needs a course= condition.")
+        plain = len(self._conditions) == 1 and not self._offset and self._limit is None
+        if plain and self._index('course_statistics'):
+            return self.store.course_statistics(course)
+        grades = [student.grades[course] for student in self]
+        return summarize_grades(grades) if grades else {}
@@ -0,0 +1,686 @@
+# roster.py
+
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from hash_table import BulkResult
+from indexes import DEFAULT_SEARCH_LIMIT, CourseAggregate, name_words
+from student import Student
+
+
+# Dead bytes a _StringColumn tolerates before compacting (and only once they are half its data)
+COMPACT_MIN_BYTES = 64 * 1024
+
+
+class _StringColumn:
+    """
+    UTF-8 string storage: one shared bytearray plus offset/length arrays.
+
+    Replacing a value appends the new bytes and repoints the row, and
+    clearing a row just zeroes its length. The bytes left behind are counted,
+    and once they make up half the buffer the live strings are copied into a
+    fresh one, so renames and deletions do not grow the column forever.
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+        self._start = array('Q')
+        self._length = array('I')
+        self._garbage = 0
+
+    def __len__(self):
+        return len(self._start)
+
+    def append(self, value):
+        encoded = value.encode('utf-8')
+        self._start.append(len(self._data))
+        self._length.append(len(encoded))
+        self._data += encoded
+
+    def get(self, row):
+        start = self._start[row]
+        return self._data[start:start + self._length[row]].decode('utf-8')
+
+    def set(self, row, value):
+        encoded = value.encode('utf-8')
+        self._garbage += self._length[row]
+        self._start[row] = len(self._data)
+        self._length[row] = len(encoded)
+        self._data += encoded
+        self._maybe_compact()
+
+    def clear(self, row):
+        """Drop a row's string; it reads back as '' until set again."""
+        self._garbage += self._length[row]
+        self._length[row] = 0
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._garbage > COMPACT_MIN_BYTES and self._garbage * 2 > len(self._data):
+            self.compact()
+
+    def compact(self):
+        """Copy the live strings into a new buffer, dropping the replaced and cleared bytes."""
+        old = memoryview(self._data)
+        data = bytearray()
+        starts, lengths = self._start, self._length
+        for row in range(len(starts)):
+            start = starts[row]
+            starts[row] = len(data)
+            data += old[start:start + lengths[row]]
+        old.release()
+        self._data = data
+        self._garbage = 0
+
+    def nbytes(self):
+        return len(self._data) + self._start.itemsize * len(self._start) + self._length.itemsize * len(self._length)
+
+
+class _RowIndex:
+    """
+    Open-addressing student ID -> row map built from two typed arrays.
+
+    Only hashes and row numbers are stored; candidate rows are confirmed by
+    decoding the ID from the string column, so no per-student key objects
+    are kept alive.
+    """
+
+    def __init__(self, ids, capacity=64):
+        self._ids = ids
+        self._count = 0
+        self._used = 0
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        self._mask = capacity - 1
+        # Row number + 1 per slot: 0 marks an empty slot, -1 a deleted one
+        self._slots = array('i', bytes(4 * capacity))
+        # Low 32 bits of each key's hash, which also seed the probe sequence
+        self._hashes = array('I', bytes(4 * capacity))
+
+    def __len__(self):
+        return self._count
+
+    def _probe(self, key, h):
+        """Return (slot holding key or -1, first reusable slot)."""
+        slots, hashes, mask = self._slots, self._hashes, self._mask
+        i = h & mask
+        perturb = h
+        free = -1
+        while True:
+            entry = slots[i]
+            if entry == 0:
+                return -1, (i if free < 0 else free)
+            if entry < 0:
+                if free < 0:
+                    free = i
+            elif hashes[i] == h and self._ids.get(entry - 1) == key:
+                return i, free
+            perturb >>= 5
+            i = (i * 5 + perturb + 1) & mask
+
+    def get(self, key):
+        i, _ = self._probe(key, hash(key) & 0xFFFFFFFF)
+        return None if i < 0 else self._slots[i] - 1
+
+    def add(self, key, row):
+        h = hash(key) & 0xFFFFFFFF
+        i, free = self._probe(key, h)
+        if i >= 0:
+            self._slots[i] = row + 1
+            return
+        if self._slots[free] == 0:
+            self._used += 1
+        self._slots[free] = row + 1
+        self._hashes[free] = h
+        self._count += 1
+        if self._used * 3 > len(self._slots) * 2:
+            self._rebuild()
+
+    def pop(self, key):
+        i, _ = self._probe(key, hash(key) & 0xFFFFFFFF)
+        if i < 0:
+            return None
+        row = self._slots[i] - 1
+        self._slots[i] = -1
+        self._count -= 1
+        return row
+
+    def reserve(self, count):
+        """Grow once so that count IDs fit without further rebuilds."""
+        if self._capacity_for(count) > len(self._slots):
+            self._rebuild(count)
+
+    @staticmethod
+    def _capacity_for(count):
+        capacity = 64
+        while capacity * 2 < count * 3:
+            capacity *= 2
+        return capacity
+
+    def _rebuild(self, count=None):
+        entries = [(h, entry) for h, entry in zip(self._hashes, self._slots) if entry > 0]
+        capacity = self._capacity_for(max(self._count, count or 0))
+        self._alloc(capacity)
+        self._used = len(entries)
+        slots, hashes, mask = self._slots, self._hashes, self._mask
+        for h, entry in entries:
+            i = h & mask
+            perturb = h
+            while slots[i] != 0:
+                perturb >>= 5
+                i = (i * 5 + perturb + 1) & mask
+            slots[i] = entry
+            hashes[i] = h
+
+    def nbytes(self):
+        return 8 * len(self._slots)
+
+
+class _CourseColumn:
+    """One column of the sparse course x student grade matrix, sorted by row."""
+
+    def __init__(self):
+        self.rows = array('I')
+        self.grades = array('d')
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, row, default=None):
+        i = bisect_left(self.rows, row)
+        if i < len(self.rows) and self.rows[i] == row:
+            return self.grades[i]
+        return default
+
+    def set(self, row, grade):
+        i = bisect_left(self.rows, row)
+        if i < len(self.rows) and self.rows[i] == row:
+            self.grades[i] = grade
+        else:
+            # Rows are appended in increasing order while loading, so this is usually an append
+            self.rows.insert(i, row)
+            self.grades.insert(i, grade)
+
+    def remove(self, row):
+        i = bisect_left(self.rows, row)
+        if i < len(self.rows) and self.rows[i] == row:
+            del self.rows[i]
+            del self.grades[i]
+            return True
+        return False
+
+    def nbytes(self):
+        return self.rows.itemsize * len(self.rows) + self.grades.itemsize * len(self.grades)
+
+
+class _RowGrades(dict):
+    """
+    The grades of a Roster row as a dict whose edits are written through to the roster.
+
+    It is a copy taken when ``StudentView.grades`` was read, so it does not
+    see later changes made through other views; its own changes (item
+    assignment, del, pop, update, clear, ...) are applied to both.
+    """
+    __slots__ = ('_view',)
+
+    def __init__(self, view):
+        super().__init__(view._roster.grades_for_row(view._live_row()))
+        self._view = view
+
+    def __setitem__(self, course, grade):
+        self._view.add_grade(course, grade)
+        super().__setitem__(course, grade)
+
+    def __delitem__(self, course):
+        super().__delitem__(course)
+        self._view._roster.remove_grade(self._view._live_row(), course)
+
+    def pop(self, course, *default):
+        if course not in self:
+            if default:
+                return default[0]
+            raise KeyError(course)
+        grade = self[course]
+        del self[course]
+        return grade
+
+    def popitem(self):
+        course, grade = super().popitem()
+        self._view._roster.remove_grade(self._view._live_row(), course)
+        return course, grade
+
+    def setdefault(self, course, default=None):
+        if course not in self:
+            self[course] = default
+        return self[course]
+
+    def update(self, *args, **kwargs):
+        for course, grade in dict(*args, **kwargs).items():
+            self[course] = grade
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        self._view.grades = {}
+        super().clear()
+
+    def __reduce__(self):
+        # Copies and pickles are plain dicts, detached from the roster
+        return dict, (dict(self),)
+
+
+class StudentView:
+    """
+    Lightweight Student stand-in that reads and writes through to a Roster row.
+
+    Views are created on access and hold nothing but the roster, the row
+    number and the row's generation. ``grades`` is a dict whose edits write
+    through to the roster. Rows of removed students are reused, so a view
+    whose student has been removed raises ValueError instead of reaching
+    whoever took the row over.
+    """
+    __slots__ = ('_roster', '_row', '_generation')
+
+    def __init__(self, roster, row):
+        self._roster = roster
+        self._row = row
+        self._generation = roster._generations[row]
+
+    def _live_row(self):
+        if self._roster._generations[self._row] != self._generation:
+            raise ValueError("This student has been removed from the roster.")
+        return self._row
+
+    @property
+    def student_id(self):
+        return self._roster._ids.get(self._live_row())
+
+    @property
+    def name(self):
+        return self._roster._names.get(self._live_row())
+
+    @name.setter
+    def name(self, value):
+        self._roster._names.set(self._live_row(), value)
+
+    @property
+    def gender(self):
+        return self._roster._gender_values[self._roster._genders[self._live_row()]]
+
+    @gender.setter
+    def gender(self, value):
+        self._roster._genders[self._live_row()] = self._roster._gender_code(value)
+
+    @property
+    def age(self):
+        return self._roster._ages[self._live_row()]
+
+    @age.setter
+    def age(self, value):
+        self._roster._ages[self._live_row()] = value
+
+    @property
+    def grades(self):
+        return _RowGrades(self)
+
+    @grades.setter
+    def grades(self, grades):
+        self._roster.set_grades_for_row(self._live_row(), grades)
+
+    def add_grade(self, course, grade):
+        self._roster.set_grade(self._live_row(), course, grade)
+
+    def total_grade(self):
+        return sum(self.grades.values())
+
+    def to_dict(self):
+        return {
+            'student_id': self.student_id,
+            'name': self.name,
+            'gender': self.gender,
+            'age': self.age,
+            'grades': dict(self.grades)
+        }
+
+    def to_student(self):
+        """Materialise a standalone Student with the same data."""
+        return Student.from_dict(self.to_dict())
+
+    def __eq__(self, other):
+        return (isinstance(other, StudentView) and other._roster is self._roster
+                and other._row == self._row and other._generation == self._generation)
+
+    def __hash__(self):
+        return hash((id(self._roster), self._row, self._generation))
+
+
+class Roster:
+    def __init__(self):
+        """
+        Columnar student store with the same surface as HashTable.
+
+        IDs and names live in packed UTF-8 string columns, genders as one-byte
+        codes, ages in a typed int array, and grades in a sparse
+        course x student matrix of (row, grade) arrays. The ID -> row map is
+        itself a pair of typed arrays, so no Python object is kept per
+        student; StudentView objects are created on access.
+
+        Rows of removed students go on a free list and are reused by the next
+        additions; each row's generation is bumped on removal so views of the
+        removed student are not mistaken for the new one.
+        """
+        self._ids = _StringColumn()
+        self._names = _StringColumn()
+        self._genders = array('B')
+        self._gender_values = []
+        self._gender_codes = {}
+        self._ages = array('i')
+        self._alive = bytearray()
+        self._generations = array('I')
+        self._free = array('I')
+        self._rows = _RowIndex(self._ids)
+        self._courses = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, student_id):
+        return self._rows.get(student_id) is not None
+
+    def __iter__(self):
+        alive = self._alive
+        for row in range(len(alive)):
+            if alive[row]:
+                yield StudentView(self, row)
+
+    def _gender_code(self, gender):
+        code = self._gender_codes.get(gender)
+        if code is None:
+            code = len(self._gender_values)
+            self._gender_values.append(gender)
+            self._gender_codes[gender] = code
+        return code
+
+    def add(self, student_id, name, gender, age, grades=None):
+        """
+        Add a student (or overwrite an existing one) and return its view.
+
+        Args:
+            student_id (str): Unique student identifier.
+            name (str): Student name.
+            gender (str): Student gender.
+            age (int): Student age.
+            grades (dict, optional): Course -> grade mapping.
+
+        Returns:
+            StudentView: View onto the stored row.
+        """
+        row = self._rows.get(student_id)
+        if row is None and self._free:
+            row = self._free.pop()
+            self._ids.set(row, student_id)
+            self._names.set(row, name)
+            self._genders[row] = self._gender_code(gender)
+            self._ages[row] = int(age)
+            self._alive[row] = 1
+            self._rows.add(student_id, row)
+        elif row is None:
+            row = len(self._ids)
+            self._ids.append(student_id)
+            self._names.append(name)
+            self._genders.append(self._gender_code(gender))
+            self._ages.append(int(age))
+            self._alive.append(1)
+            self._generations.append(0)
+            self._rows.add(student_id, row)
+        else:
+            self._names.set(row, name)
+            self._genders[row] = self._gender_code(gender)
+            self._ages[row] = int(age)
+        self.set_grades_for_row(row, grades or {})
+        return StudentView(self, row)
+
+    def add_student(self, student):
+        return self.add(student.student_id, student.name, student.gender, student.age, student.grades)
+
+    def get(self, student_id):
+        row = self._rows.get(student_id)
+        return None if row is None else StudentView(self, row)
+
+    def remove(self, student_id):
+        row = self._rows.pop(student_id)
+        if row is None:
+            return False
+        self._alive[row] = 0
+        self._generations[row] += 1
+        self._ids.clear(row)
+        self._names.clear(row)
+        self._free.append(row)
+        empty = [course for course, column in self._courses.items() if column.remove(row) and not column]
+        for course in empty:
+            del self._courses[course]
+        return True
+
+    def grades_for_row(self, row):
+        grades = {}
+        for course, column in self._courses.items():
+            grade = column.get(row)
+            if grade is not None:
+                grades[course] = grade
+        return grades
+
+    def set_grades_for_row(self, row, grades):
+        for course in [course for course in self._courses if course not in grades]:
+            self.remove_grade(row, course)
+        for course, grade in grades.items():
+            self.set_grade(row, course, grade)
+
+    def remove_grade(self, row, course):
+        column = self._courses.get(course)
+        if column is not None and column.remove(row) and not column:
+            del self._courses[course]
+
+    def set_grade(self, row, course, grade):
+        column = self._courses.get(course)
+        if column is None:
+            column = self._courses[course] = _CourseColumn()
+        column.set(row, grade)
+
+    def courses(self):
+        return sorted(course for course, column in self._courses.items() if len(column))
+
+    def course_grades(self, course):
+        """
+        Return the raw grade column for a course.
+
+        Returns:
+            tuple: (rows, grades) typed arrays, both empty if the course is unknown.
+        """
+        column = self._courses.get(course)
+        if column is None:
+            return array('I'), array('d')
+        return column.rows, column.grades
+
+    def find_by_name(self, name):
+        """Return views of every student with the given name (a scan of the name column)."""
+        names = self._names
+        alive = self._alive
+        return [StudentView(self, row) for row in range(len(alive)) if alive[row] and names.get(row) == name]
+
+    def search(self, text, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Find students by a partial ID or name, matching as HashTable.search() does.
+
+        A Roster keeps no per-student index, so this scans the ID and name
+        columns, stopping as soon as limit matches are found.
+        """
+        if limit is None:
+            limit = len(self)
+        words = name_words(text)
+        if not words or limit <= 0:
+            return []
+        prefix = text.strip().casefold()
+        ids, names, alive = self._ids, self._names, self._alive
+        id_rows, name_rows = [], []
+        for row in range(len(alive)):
+            if not alive[row]:
+                continue
+            if ids.get(row).casefold().startswith(prefix):
+                id_rows.append(row)
+                if len(id_rows) >= limit:
+                    break
+            elif len(id_rows) + len(name_rows) < limit:
+                candidate = name_words(names.get(row))
+                if all(any(w.startswith(word) for w in candidate) for word in words):
+                    name_rows.append(row)
+        return [StudentView(self, row) for row in (id_rows + name_rows)[:limit]]
+
+    def students_in_course(self, course):
+        """Return views of the students with a grade for course, in ascending grade order."""
+        rows, grades = self.course_grades(course)
+        return [StudentView(self, row) for _, row in sorted(zip(grades, rows))]
+
+    def grade_range(self, course, low=None, high=None, descending=False, limit=None):
+        """
+        Find the students whose grade for course lies in [low, high].
+
+        The course column already holds only the enrolled rows, so this scans
+        the course's grades rather than the whole roster.
+
+        Returns:
+            list: (StudentView, grade) pairs in ascending (or descending) grade order,
+                  at most limit of them.
+        """
+        rows, grades = self.course_grades(course)
+        matches = sorted(((grade, row) for row, grade in zip(rows, grades)
+                          if (low is None or grade >= low) and (high is None or grade <= high)),
+                         reverse=descending)
+        if limit is not None:
+            matches = matches[:limit]
+        return [(StudentView(self, row), grade) for grade, row in matches]
+
+    def course_statistics(self, course):
+        """Return the statistics for a course, computed from its grade column."""
+        rows, grades = self.course_grades(course)
+        return CourseAggregate.from_grades(zip(grades, rows)).statistics()
+
+    def nbytes(self):
+        """Approximate size of all column and index data."""
+        return (self._ids.nbytes() + self._names.nbytes() + len(self._genders)
+                + self._ages.itemsize * len(self._ages) + len(self._alive)
+                + self._generations.itemsize * len(self._generations) + self._free.itemsize * len(self._free)
+                + self._rows.nbytes()
+                + sum(column.nbytes() for column in self._courses.values()))
+
+    # HashTable-compatible surface so a Roster can stand in for the table
+
+    def insert(self, key, value):
+        self.add(key, value.name, value.gender, value.age, value.grades)
+        return True
+
+    def retrieve(self, key):
+        return self.get(key)
+
+    def delete(self, key):
+        return self.remove(key)
+
+    def get_all_students(self):
+        return list(self)
+
+    def iter_students(self):
+        return iter(self)
+
+    def get_all_students_dict(self):
+        return {view.student_id: view for view in self}
+
+    def add_grade(self, key, course, grade):
+        row = self._rows.get(key)
+        if row is None:
+            return False
+        self.set_grade(row, course, grade)
+        return True
+
+    def reserve(self, count):
+        self._rows.reserve(count)
+
+    def insert_many(self, items, unique=False, replace=True):
+        """
+        Insert many students; see HashTable.insert_many().
+
+        Duplicate IDs are found through the row index either way, so unique
+        only skips reporting them.
+        """
+        if not hasattr(items, '__len__'):
+            items = list(items)
+        self.reserve(len(self) + len(items))
+        conflicts = []
+        applied = 0
+        rows = self._rows
+        for key, value in items:
+            if not unique and rows.get(key) is not None:
+                conflicts.append(key)
+                if not replace:
+                    continue
+            self.add(key, value.name, value.gender, value.age, value.grades)
+            applied += 1
+        return BulkResult(applied, conflicts)
+
+    def delete_many(self, keys):
+        conflicts = []
+        applied = 0
+        for key in keys:
+            if self.remove(key):
+                applied += 1
+            else:
+                conflicts.append(key)
+        return BulkResult(applied, conflicts)
+
+    def update_many(self, updates):
+        conflicts = []
+        applied = 0
+        rows = self._rows
+        for key, grades in updates:
+            row = rows.get(key)
+            if row is None:
+                conflicts.append(key)
+                continue
+            for course, grade in grades.items():
+                self.set_grade(row, course, grade)
+            applied += 1
+        return BulkResult(applied, conflicts)
+
+    def clear(self):
+        self.__init__()
+
+    @contextmanager
+    def batch(self):
+        yield self
+
+    # A Roster does not track individual changes, so every save is a full one
+    persisted_path = None
+
+    def is_dirty(self):
+        return True
+
+    def mark_clean(self, path):
+        pass
+
+    def checkpoint(self):
+        return self, {}
+
+    def restore_changes(self, changes):
+        pass
+
+    def mark_persisted(self, path):
+        pass
+
+    @classmethod
+    def from_students(cls, students):
+        roster = cls()
+        for student in students:
+            roster.add_student(student)
+        return roster
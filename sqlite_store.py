@@ -0,0 +1,468 @@
+# sqlite_store.py
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from hash_table import BulkResult
+from indexes import DEFAULT_SEARCH_LIMIT, SCORE_RANGES, name_words
+from student import Student
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    key TEXT PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    age INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS grades (
+    key TEXT NOT NULL,
+    course TEXT NOT NULL,
+    grade REAL NOT NULL,
+    PRIMARY KEY (key, course)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS students_by_name ON students (name);
+CREATE INDEX IF NOT EXISTS grades_by_course ON grades (course, grade);
+"""
+
+# Statements are module constants so sqlite3's statement cache reuses their prepared form
+_UPSERT_STUDENT = "INSERT OR REPLACE INTO students (key, student_id, name, gender, age) VALUES (?, ?, ?, ?, ?)"
+_DELETE_STUDENT = "DELETE FROM students WHERE key = ?"
+_SELECT_STUDENT = "SELECT student_id, name, gender, age FROM students WHERE key = ?"
+_EXISTS_STUDENT = "SELECT 1 FROM students WHERE key = ?"
+_COUNT_STUDENTS = "SELECT COUNT(*) FROM students"
+_UPSERT_GRADE = "INSERT OR REPLACE INTO grades (key, course, grade) VALUES (?, ?, ?)"
+_DELETE_GRADES = "DELETE FROM grades WHERE key = ?"
+_SELECT_GRADES = "SELECT course, grade FROM grades WHERE key = ?"
+_SEARCH_KEYS_BY_ID = "SELECT key FROM students WHERE key LIKE ? ESCAPE '\\' ORDER BY key LIMIT ?"
+_SELECT_COURSES = "SELECT DISTINCT course FROM grades ORDER BY course"
+# Ties are ordered by key (the index holds it) so a longer LIMIT returns the shorter one's rows first
+_SELECT_GRADE_RANGE = ("SELECT key, grade FROM grades WHERE course = ? AND grade >= ? AND grade <= ? "
+                       "ORDER BY grade, key LIMIT ?")
+_SELECT_GRADE_RANGE_DESC = ("SELECT key, grade FROM grades WHERE course = ? AND grade >= ? AND grade <= ? "
+                            "ORDER BY grade DESC, key DESC LIMIT ?")
+_COURSE_TOTALS = "SELECT COUNT(*), SUM(grade) FROM grades WHERE course = ?"
+_COURSE_NTH_GRADE = "SELECT grade FROM grades WHERE course = ? ORDER BY grade LIMIT 1 OFFSET ?"
+_COURSE_MODE = "SELECT grade FROM grades WHERE course = ? GROUP BY grade ORDER BY COUNT(*) DESC, grade LIMIT 1"
+# Mirrors indexes.score_range()
+_COURSE_BUCKETS = """
+SELECT CASE
+    WHEN grade >= 90 AND grade <= 100 THEN '90-100'
+    WHEN grade >= 80 AND grade < 90 THEN '80-89'
+    WHEN grade >= 70 AND grade < 80 THEN '70-79'
+    WHEN grade >= 60 AND grade < 70 THEN '60-69'
+    ELSE 'Below 60'
+END AS bucket, COUNT(*)
+FROM grades WHERE course = ? GROUP BY bucket
+"""
+_SELECT_ALL = """
+SELECT s.key, s.student_id, s.name, s.gender, s.age, g.course, g.grade
+FROM students AS s LEFT JOIN grades AS g ON g.key = s.key
+ORDER BY s.key
+"""
+# The statements below return students as _SELECT_ALL does (one row per grade, a student's
+# rows together), so _group_students() builds them without a retrieve() per student
+_SELECT_BY_NAME = """
+SELECT s.key, s.student_id, s.name, s.gender, s.age, g.course, g.grade
+FROM students AS s LEFT JOIN grades AS g ON g.key = s.key
+WHERE s.name = ?
+ORDER BY s.key
+"""
+_SELECT_BY_KEYS = """
+SELECT s.key, s.student_id, s.name, s.gender, s.age, g.course, g.grade
+FROM students AS s LEFT JOIN grades AS g ON g.key = s.key
+WHERE s.key IN ({})
+ORDER BY s.key
+"""
+# Keys per _SELECT_BY_KEYS statement, below SQLite's historical limit of 999 parameters
+_KEYS_PER_SELECT = 500
+_SELECT_RANGE_STUDENTS = """
+SELECT s.key, s.student_id, s.name, s.gender, s.age, g.course, g.grade
+FROM ({}) AS r
+JOIN students AS s ON s.key = r.key
+LEFT JOIN grades AS g ON g.key = r.key
+ORDER BY r.grade {order}, r.key {order}
+"""
+_SELECT_GRADE_RANGE_STUDENTS = _SELECT_RANGE_STUDENTS.format(_SELECT_GRADE_RANGE, order='ASC')
+_SELECT_GRADE_RANGE_STUDENTS_DESC = _SELECT_RANGE_STUDENTS.format(_SELECT_GRADE_RANGE_DESC, order='DESC')
+
+
+def _like_prefix(text):
+    """A LIKE pattern matching strings that start with text."""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _group_students(rows):
+    """
+    Build students from joined student/grade rows.
+
+    Args:
+        rows (iterable): (key, student_id, name, gender, age, course, grade) tuples,
+                         each student's rows next to each other.
+
+    Yields:
+        tuple: (key, Student) in the order the rows came in.
+    """
+    current_key = None
+    student = None
+    for key, student_id, name, gender, age, course, grade in rows:
+        if key != current_key:
+            if student is not None:
+                yield current_key, student
+            current_key = key
+            student = Student(student_id, name, gender, age)
+        if course is not None:
+            student.grades[course] = grade
+    if student is not None:
+        yield current_key, student
+
+
+def _locked(method):
+    """Run a store method while holding the lock that serializes use of the connection."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class SQLiteStudentStore:
+    def __init__(self, db_path, batch_size=5000):
+        """
+        Persistent student store on SQLite with the same surface as HashTable.
+
+        Students and grades live in indexed tables, so point lookups are
+        served from the primary-key index and nothing has to fit in memory.
+        The database runs in WAL mode; writes are committed immediately unless
+        grouped with batch(). Students returned by retrieve() are detached
+        copies: change them through insert() or add_grade().
+
+        The one connection is shared by every thread (the GUI reads on the Tk
+        thread while tasks run on workers), so each call holds a lock while it
+        uses it. A batch() holds the lock per call only, not for the whole
+        with-block: other threads can still read meanwhile, and writes they
+        make then join the batch's transaction.
+
+        Args:
+            db_path (str): The database file (created if missing).
+            batch_size (int, optional): Rows fetched per round trip when streaming.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        # isolation_level=None: transactions are opened explicitly by _transaction()
+        self._conn = sqlite3.connect(db_path, isolation_level=None, cached_statements=64, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._batch_depth = 0
+        # The database is its own persistence, so there is never anything to save
+        self.persisted_path = None
+
+    @_locked
+    def close(self):
+        self._conn.close()
+
+    @contextmanager
+    def batch(self):
+        """Group every write inside the with-block into a single transaction."""
+        with self._transaction():
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            if self._batch_depth or self._conn.in_transaction:
+                owner = False
+            else:
+                self._conn.execute("BEGIN")
+                owner = True
+        if not owner:
+            yield
+            return
+        try:
+            yield
+        except BaseException:
+            with self._lock:
+                self._conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._conn.execute("COMMIT")
+
+    @_locked
+    def __len__(self):
+        return self._conn.execute(_COUNT_STUDENTS).fetchone()[0]
+
+    @_locked
+    def insert(self, key, value):
+        with self._transaction():
+            self._conn.execute(_UPSERT_STUDENT, (key, value.student_id, value.name, value.gender, int(value.age)))
+            self._conn.execute(_DELETE_GRADES, (key,))
+            grades = value.grades
+            if grades:
+                self._conn.executemany(_UPSERT_GRADE, [(key, course, grade) for course, grade in grades.items()])
+        return True
+
+    @_locked
+    def retrieve(self, key):
+        row = self._conn.execute(_SELECT_STUDENT, (key,)).fetchone()
+        if row is None:
+            return None
+        student = Student(*row)
+        student.grades = dict(self._conn.execute(_SELECT_GRADES, (key,)))
+        return student
+
+    @_locked
+    def delete(self, key):
+        with self._transaction():
+            deleted = self._conn.execute(_DELETE_STUDENT, (key,)).rowcount
+            self._conn.execute(_DELETE_GRADES, (key,))
+        return deleted > 0
+
+    @_locked
+    def add_grade(self, key, course, grade):
+        with self._transaction():
+            if self._conn.execute(_EXISTS_STUDENT, (key,)).fetchone() is None:
+                return False
+            self._conn.execute(_UPSERT_GRADE, (key, course, grade))
+        return True
+
+    def reserve(self, count):
+        """Accepted for compatibility with HashTable; the database sizes itself."""
+
+    @_locked
+    def insert_many(self, items, unique=False, replace=True):
+        """
+        Insert many students in one transaction; see HashTable.insert_many().
+
+        Rows are written with executemany() in chunks of batch_size. With
+        unique=True the existence check and the delete of replaced grades
+        are skipped.
+        """
+        conflicts = []
+        applied = 0
+        seen = set()
+        execute = self._conn.execute
+        with self._transaction():
+            chunk = []
+            for key, value in items:
+                if not unique:
+                    if key in seen:
+                        conflicts.append(key)
+                        if not replace:
+                            continue
+                        # Write the earlier row first so its grades are replaced, not merged
+                        applied += self._write_students(chunk, unique)
+                        chunk = []
+                    elif execute(_EXISTS_STUDENT, (key,)).fetchone() is not None:
+                        conflicts.append(key)
+                        if not replace:
+                            continue
+                    seen.add(key)
+                chunk.append((key, value))
+                if len(chunk) >= self.batch_size:
+                    applied += self._write_students(chunk, unique)
+                    chunk = []
+            applied += self._write_students(chunk, unique)
+        return BulkResult(applied, conflicts)
+
+    def _write_students(self, chunk, unique):
+        if not chunk:
+            return 0
+        conn = self._conn
+        conn.executemany(_UPSERT_STUDENT, [(key, value.student_id, value.name, value.gender, int(value.age))
+                                           for key, value in chunk])
+        if not unique:
+            conn.executemany(_DELETE_GRADES, [(key,) for key, _ in chunk])
+        conn.executemany(_UPSERT_GRADE, [(key, course, grade)
+                                         for key, value in chunk for course, grade in value.grades.items()])
+        return len(chunk)
+
+    @_locked
+    def delete_many(self, keys):
+        conflicts = []
+        applied = 0
+        execute = self._conn.execute
+        with self._transaction():
+            for key in keys:
+                if execute(_DELETE_STUDENT, (key,)).rowcount:
+                    execute(_DELETE_GRADES, (key,))
+                    applied += 1
+                else:
+                    conflicts.append(key)
+        return BulkResult(applied, conflicts)
+
+    @_locked
+    def update_many(self, updates):
+        conflicts = []
+        applied = 0
+        execute = self._conn.execute
+        with self._transaction():
+            for key, grades in updates:
+                if execute(_EXISTS_STUDENT, (key,)).fetchone() is None:
+                    conflicts.append(key)
+                    continue
+                self._conn.executemany(_UPSERT_GRADE, [(key, course, grade) for course, grade in grades.items()])
+                applied += 1
+        return BulkResult(applied, conflicts)
+
+    def index_built(self):
+        """SQLite maintains its indexes on every write, so they always exist."""
+        return True
+
+    @_locked
+    def find_by_name(self, name):
+        """Return every student stored with the given name (served by the students_by_name index)."""
+        return [student for _, student in _group_students(self._conn.execute(_SELECT_BY_NAME, (name,)))]
+
+    @_locked
+    def search(self, text, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Find students by a partial ID or name, matching as HashTable.search() does.
+
+        Runs as two LIMIT queries; the name query has to scan the students
+        table but stops at the first limit matches. LIKE folds ASCII case
+        only, so non-ASCII letters must be typed in the stored case.
+        """
+        if limit is None:
+            limit = len(self)
+        words = name_words(text)
+        if not words or limit <= 0:
+            return []
+        keys = [key for key, in self._conn.execute(_SEARCH_KEYS_BY_ID, (_like_prefix(text.strip()), limit))]
+        if len(keys) < limit:
+            # Each query word must start a word of the name: at its start or after a space
+            conditions = " AND ".join(["(name LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\')"] * len(words))
+            params = []
+            for word in words:
+                params += [_like_prefix(word), '% ' + _like_prefix(word)]
+            found = set(keys)
+            for key, in self._conn.execute(f"SELECT key FROM students WHERE {conditions} LIMIT ?",
+                                           params + [limit + len(keys)]):
+                if key not in found:
+                    keys.append(key)
+                    if len(keys) >= limit:
+                        break
+        return self._retrieve_many(keys)
+
+    def _retrieve_many(self, keys):
+        """Fetch the students stored under keys, in that order, with one joined query per chunk of keys."""
+        found = {}
+        for start in range(0, len(keys), _KEYS_PER_SELECT):
+            chunk = keys[start:start + _KEYS_PER_SELECT]
+            query = _SELECT_BY_KEYS.format(', '.join('?' * len(chunk)))
+            found.update(_group_students(self._conn.execute(query, chunk)))
+        return [found[key] for key in keys if key in found]
+
+    @_locked
+    def courses(self):
+        return [course for course, in self._conn.execute(_SELECT_COURSES)]
+
+    def students_in_course(self, course):
+        """Return the students with a grade for course, in ascending grade order."""
+        return [student for student, _ in self.grade_range(course)]
+
+    @_locked
+    def grade_range(self, course, low=None, high=None, descending=False, limit=None):
+        """
+        Find the students whose grade for course lies in [low, high] via the grades_by_course index.
+
+        Returns:
+            list: (Student, grade) pairs in ascending (or descending) grade order,
+                  at most limit of them.
+        """
+        low = float('-inf') if low is None else low
+        high = float('inf') if high is None else high
+        query = _SELECT_GRADE_RANGE_STUDENTS_DESC if descending else _SELECT_GRADE_RANGE_STUDENTS
+        # LIMIT -1 means no limit
+        rows = self._conn.execute(query, (course, low, high, -1 if limit is None else limit))
+        return [(student, student.grades[course]) for _, student in _group_students(rows)]
+
+    @_locked
+    def course_statistics(self, course):
+        """
+        Compute a course's statistics inside SQLite, walking only the grades_by_course index.
+
+        Returns:
+            dict: average, median, mode and score_ranges (as utils.grade_statistics),
+                  or {} if the course has no grades.
+        """
+        execute = self._conn.execute
+        count, total = execute(_COURSE_TOTALS, (course,)).fetchone()
+        if not count:
+            return {}
+        median = execute(_COURSE_NTH_GRADE, (course, count // 2)).fetchone()[0]
+        if count % 2 == 0:
+            median = (execute(_COURSE_NTH_GRADE, (course, count // 2 - 1)).fetchone()[0] + median) / 2
+        score_ranges = dict.fromkeys(SCORE_RANGES, 0)
+        score_ranges.update(execute(_COURSE_BUCKETS, (course,)))
+        return {
+            'average': total / count,
+            'median': median,
+            'mode': execute(_COURSE_MODE, (course,)).fetchone()[0],
+            'score_ranges': score_ranges
+        }
+
+    def iter_items(self):
+        """
+        Stream (key, Student) pairs in key order without loading the whole roster.
+
+        Yields:
+            tuple: (key, Student) for every stored student.
+        """
+        def rows():
+            with self._lock:
+                cursor = self._conn.execute(_SELECT_ALL)
+            while True:
+                # Locked per fetch rather than for the whole walk, which runs at the caller's pace
+                with self._lock:
+                    batch = cursor.fetchmany(self.batch_size)
+                if not batch:
+                    return
+                yield from batch
+        yield from _group_students(rows())
+
+    def iter_students(self):
+        for _, student in self.iter_items():
+            yield student
+
+    def get_all_students(self):
+        return list(self.iter_students())
+
+    def get_all_students_dict(self):
+        return dict(self.iter_items())
+
+    @_locked
+    def clear(self):
+        with self._transaction():
+            self._conn.execute("DELETE FROM grades")
+            self._conn.execute("DELETE FROM students")
+
+    # Change-tracking surface shared with HashTable; every write is already durable
+
+    def is_dirty(self):
+        return False
+
+    def changes(self):
+        return {}
+
+    def mark_dirty(self, key):
+        pass
+
+    def mark_clean(self, path):
+        pass
+
+    def checkpoint(self):
+        return self, {}
+
+    def restore_changes(self, changes):
+        pass
+
+    def mark_persisted(self, path):
+        pass
@@ -1,6 +1,9 @@
 # student.py
 
 class Student:
+    # No per-instance __dict__: large rosters hold hundreds of thousands of these
+    __slots__ = ('student_id', 'name', 'gender', 'age', 'grades')
+
     def __init__(self, student_id, name, gender, age):
         self.student_id = student_id
         self.name = name
@@ -0,0 +1,192 @@
+# tasks.py
+
+import queue
+import threading
+import time
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# How often the Tk thread drains finished work and progress updates (~60 fps)
+POLL_INTERVAL_MS = 16
+
+# Minimum seconds between progress updates forwarded for one task
+PROGRESS_INTERVAL = 0.05
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task when it notices it has been cancelled."""
+
+
+class TaskHandle:
+    """
+    A running background task as seen from both sides.
+
+    The task function receives its handle and calls report() as it makes
+    progress; report() also raises TaskCancelled once cancel() has been
+    called, so cancellation takes effect at the task's next progress point.
+    The GUI side keeps the handle to cancel the task or check on it.
+    """
+
+    def __init__(self, executor, name):
+        self.name = name
+        self._executor = executor
+        self._cancel = threading.Event()
+        self._last_report = 0.0
+        self.future = None
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def wait(self):
+        """
+        Block until the task function has returned or raised.
+
+        Its on_done/on_error callbacks still run later, on the Tk thread.
+        """
+        if self.future is not None:
+            futures.wait([self.future])
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise TaskCancelled(f"'{self.name}' was cancelled.")
+
+    def report(self, done, total=None):
+        """
+        Publish progress (throttled) and stop the task if it was cancelled.
+
+        Args:
+            done (int): Units of work finished so far.
+            total (int, optional): Total units of work, if known.
+        """
+        self.check_cancelled()
+        now = time.monotonic()
+        if now - self._last_report >= PROGRESS_INTERVAL or (total is not None and done >= total):
+            self._last_report = now
+            self._executor._post(self._on_progress, done, total)
+
+    def run_cpu(self, fn, *args):
+        """
+        Run a picklable function on the process pool and wait for its result.
+
+        Called from inside a thread task, so the wait blocks the worker thread,
+        never the Tk thread.
+        """
+        self.check_cancelled()
+        return self._executor.cpu_pool().submit(fn, *args).result()
+
+    # Set by TaskExecutor.submit()
+    _on_progress = None
+
+
+class TaskExecutor:
+    def __init__(self, root, io_workers=2, cpu_workers=None):
+        """
+        Run slow work off the Tk thread and deliver results back onto it.
+
+        Thread tasks (file I/O, table building) run on a small thread pool;
+        CPU-heavy pure functions can be handed to a process pool with
+        TaskHandle.run_cpu(). Worker threads never touch Tk: completions and
+        progress are queued and drained on the Tk thread by a root.after()
+        poll, so every callback runs where it may safely update widgets.
+
+        Args:
+            root (tk.Tk): The application's root window.
+            io_workers (int, optional): Threads in the I/O pool.
+            cpu_workers (int, optional): Processes in the CPU pool (default: one per core).
+        """
+        self.root = root
+        self._io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='sms-task')
+        self._cpu_pool = None
+        self._cpu_workers = cpu_workers
+        self._events = queue.Queue()
+        self._running = set()
+        self._polling = False
+
+    def cpu_pool(self):
+        # Created on first use: spawning processes costs more than most sessions ever need
+        if self._cpu_pool is None:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=self._cpu_workers)
+        return self._cpu_pool
+
+    def running(self):
+        """Return the handles of tasks that have not finished yet."""
+        return [handle for handle in self._running if not handle.done()]
+
+    def submit(self, name, fn, *args, on_done=None, on_error=None, on_progress=None, on_cancel=None):
+        """
+        Start fn(handle, *args) on the thread pool.
+
+        Args:
+            name (str): Shown in progress and error messages.
+            fn (callable): The task; its first argument is its TaskHandle.
+            on_done (callable, optional): on_done(result), called on the Tk thread.
+            on_error (callable, optional): on_error(exception), called on the Tk thread.
+            on_progress (callable, optional): on_progress(done, total), called on the Tk thread.
+            on_cancel (callable, optional): on_cancel(), called on the Tk thread if the task was cancelled.
+
+        Returns:
+            TaskHandle: Handle for cancelling or inspecting the task.
+        """
+        handle = TaskHandle(self, name)
+        handle._on_progress = on_progress
+        self._running.add(handle)
+
+        def finished(future):
+            # Runs on the worker thread; hand the outcome to the Tk thread
+            if future.cancelled():
+                self._post(self._finish, handle, on_cancel)
+                return
+            error = future.exception()
+            if isinstance(error, TaskCancelled):
+                self._post(self._finish, handle, on_cancel)
+            elif error is not None:
+                self._post(self._finish, handle, on_error, error)
+            else:
+                self._post(self._finish, handle, on_done, future.result())
+
+        handle.future = self._io_pool.submit(fn, handle, *args)
+        handle.future.add_done_callback(finished)
+        self._schedule_poll()
+        return handle
+
+    def _finish(self, handle, callback, *args):
+        self._running.discard(handle)
+        if callback is not None:
+            callback(*args)
+
+    def _post(self, callback, *args):
+        if callback is not None:
+            self._events.put((callback, args))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                callback, args = self._events.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        if self._running or not self._events.empty():
+            self._schedule_poll()
+
+    def shutdown(self, cancel=True):
+        """Stop accepting work; optionally cancel running tasks first."""
+        if cancel:
+            for handle in list(self._running):
+                handle.cancel()
+        self._io_pool.shutdown(wait=False, cancel_futures=cancel)
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=cancel)
@@ -0,0 +1,100 @@
+# tests/test_analytics.py
+
+import random
+
+import pytest
+
+import analytics
+from hash_table import HashTable
+from student import Student
+from utils import grade_statistics, grade_statistics_all, iter_student_rows, save_to_file
+
+
+def make_students(seed, count):
+    rng = random.Random(seed)
+    courses = [f"C{i}" for i in range(rng.randint(1, 12))]
+    # Few distinct grades, so ties for the mode and bucket edges come up; ints as well as floats
+    grades = [40, 59.5, 60, 60.0, 69.99, 70, 89.9, 90, 99.5, 100, 100.0]
+    students = []
+    for i in range(count):
+        student = Student(f"S{i:05d}", f"Student {i}", 'Male', 20)
+        student.grades = {course: rng.choice(grades) for course in rng.sample(courses, rng.randint(0, len(courses)))}
+        students.append(student)
+    return students, courses
+
+
+def assert_same_report(got, expected):
+    assert list(got) == list(expected)
+    for course in expected:
+        got_stats, expected_stats = dict(got[course]), dict(expected[course])
+        # NumPy sums pairwise, Python left to right; they may differ in the last bits
+        assert got_stats.pop('average') == pytest.approx(expected_stats.pop('average'))
+        got_percentiles = got_stats.pop('percentiles', {})
+        expected_percentiles = expected_stats.pop('percentiles', {})
+        assert list(got_percentiles) == list(expected_percentiles)
+        for p in expected_percentiles:
+            assert got_percentiles[p] == pytest.approx(expected_percentiles[p])
+        assert got_stats == expected_stats, course
+
+
+def fallback(monkeypatch):
+    monkeypatch.setattr(analytics, 'np', None)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_numpy_and_fallback_statistics_agree(seed, monkeypatch):
+    pytest.importorskip('numpy')
+    students, courses = make_students(seed, random.Random(seed).randint(0, 400))
+    wanted = courses[::2]
+
+    vectorized = analytics.statistics_by_course(students)
+    vectorized_some = analytics.statistics_by_course(students, wanted, percentiles=())
+    fallback(monkeypatch)
+    assert_same_report(vectorized, analytics.statistics_by_course(students))
+    assert_same_report(vectorized_some, analytics.statistics_by_course(students, wanted, percentiles=()))
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+@pytest.mark.parametrize('seed', range(10))
+def test_grade_statistics_all_matches_grade_statistics(seed, numpy, monkeypatch):
+    if numpy:
+        pytest.importorskip('numpy')
+    else:
+        fallback(monkeypatch)
+    students, courses = make_students(seed, 300)
+
+    report = grade_statistics_all(students)
+    expected = {}
+    for course in sorted(courses):
+        stats = grade_statistics(students, course)
+        if stats:
+            expected[course] = dict(stats, count=sum(stats['score_ranges'].values()))
+    assert_same_report(report, expected)
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_statistics_from_streamed_rows(tmp_path, numpy, monkeypatch):
+    if numpy:
+        pytest.importorskip('numpy')
+    else:
+        fallback(monkeypatch)
+    students, _ = make_students(1, 200)
+    table = HashTable()
+    for student in students:
+        table.insert(student.student_id, student)
+    file_path = str(tmp_path / 'roster.txt')
+    save_to_file(table, file_path)
+
+    rows = (row for batch in iter_student_rows(file_path) for row in batch)
+    assert_same_report(grade_statistics_all(rows), grade_statistics_all(students))
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_no_grades_gives_an_empty_report(numpy, monkeypatch):
+    if numpy:
+        pytest.importorskip('numpy')
+    else:
+        fallback(monkeypatch)
+    assert analytics.statistics_by_course([]) == {}
+    assert analytics.statistics_by_course([Student('S1', 'Name', 'Male', 20)]) == {}
+    assert analytics.statistics_by_course(make_students(2, 50)[0], ['Nope']) == {}
@@ -0,0 +1,51 @@
+# tests/test_cli.py
+
+import json
+import os
+
+import pytest
+
+import cli
+from hash_table import HashTable
+from student import Student
+from utils import save_to_file
+
+
+@pytest.fixture
+def roster(tmp_path):
+    table = HashTable()
+    for i in range(5):
+        student = Student(f"S{i}", f"Student {i}", 'Male', 20 + i)
+        student.grades = {'Math': 60.0 + i}
+        table.insert(student.student_id, student)
+    file_path = str(tmp_path / 'roster.txt')
+    save_to_file(table, file_path)
+    return file_path
+
+
+def test_stats_reads_the_roster(roster, capsys):
+    assert cli.main(['stats', '--file', roster]) == 0
+    assert json.loads(capsys.readouterr().out)['Math']['count'] == 5
+
+
+@pytest.mark.parametrize('command', [
+    ['stats'],
+    ['query'],
+    ['export', '-'],
+    ['export', 'out.smsb'],
+    ['bench', '--repeat', '1'],
+])
+@pytest.mark.parametrize('option', ['--file', '--db'])
+def test_read_only_commands_fail_on_a_missing_source(tmp_path, capsys, command, option):
+    missing = str(tmp_path / ('missing.db' if option == '--db' else 'missing.txt'))
+    assert cli.main(command[:1] + [option, missing] + command[1:]) == 1
+    assert 'not found' in capsys.readouterr().err
+    assert not os.path.exists(missing)
+
+
+def test_database_errors_are_reported(tmp_path, roster, capsys):
+    # A roster text file is not a SQLite database
+    assert cli.main(['stats', '--db', roster]) == 1
+    err = capsys.readouterr().err
+    assert err.startswith('sms stats: ')
+    assert 'Traceback' not in err
@@ -0,0 +1,131 @@
+# tests/test_concurrent_table.py
+
+import gc
+import threading
+
+from concurrent_table import ConcurrentHashTable
+from student import Student
+
+
+def make_table(count=200):
+    table = ConcurrentHashTable()
+    for i in range(count):
+        student = Student(f"S{i:04d}", f"Student {i}", 'Female' if i % 2 else 'Male', 18 + i % 10)
+        student.grades = {'Math': float(i % 101), 'CG': float((i * 7) % 101)}
+        table.insert(student.student_id, student)
+    return table
+
+
+def state(students):
+    return {s.student_id: (s.name, dict(s.grades)) for s in students}
+
+
+def mutate(table, round_):
+    """Edit every kind of way a writer can: grades in place, new courses, inserts and deletes."""
+    for i in range(0, 200, 3):
+        table.add_grade(f"S{i:04d}", 'Math', float((i + round_) % 101))
+        table.add_grade(f"S{i:04d}", f"New{round_}", 50.0)
+    table.insert(f"X{round_:04d}", Student(f"X{round_:04d}", "Late", 'Male', 20))
+    table.delete(f"S{(round_ * 11) % 200:04d}")
+
+
+def test_iter_students_is_consistent_while_the_table_changes():
+    table = make_table()
+    expected = state(table.get_all_students())
+
+    students = table.iter_students()
+    first = next(students)
+    gc.collect()
+    mutate(table, 1)
+    seen = state([first, *students])
+
+    assert seen == expected
+
+
+def test_get_all_students_and_dict_are_consistent_while_the_table_changes():
+    table = make_table()
+    expected = state(table.get_all_students())
+
+    students = table.get_all_students()
+    by_key = table.get_all_students_dict()
+    gc.collect()
+    mutate(table, 1)
+
+    assert state(students) == expected
+    assert state(by_key.values()) == expected
+
+
+def test_copy_on_write_stops_once_the_iterator_is_gone():
+    table = make_table()
+    students = table.iter_students()
+    next(students)
+    assert table._fresh is not None
+    del students
+    gc.collect()
+    assert table._fresh is None
+
+
+def test_iteration_in_one_thread_while_another_edits():
+    table = make_table()
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        round_ = 0
+        while not stop.is_set():
+            round_ += 1
+            mutate(table, round_)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(50):
+            # Taken together under the lock, so both see the same table
+            with table.batch():
+                students = table.iter_students()
+                expected = state(table.get_all_students())
+            try:
+                seen = {}
+                for student in students:
+                    seen[student.student_id] = (student.name, dict(student.grades))
+            except RuntimeError as e:
+                errors.append(e)
+                break
+            assert seen == expected
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors
+
+
+def test_search_index_is_built_outside_the_lock(monkeypatch):
+    import concurrent_table
+    from hash_table import HashTable
+
+    table = make_table()
+    build = concurrent_table.SearchIndex.build
+    blocked = []
+
+    def build_while_others_write(entries):
+        # Stands in for other threads running while the index is sorted
+        thread = threading.Thread(target=lambda: (
+            table.insert("S9000", Student("S9000", "Student Late", 'Male', 20)),
+            table.delete("S0005"),
+            table.insert("S0007", Student("S0007", "Renamed Person", 'Female', 21)),
+        ))
+        thread.start()
+        thread.join(timeout=5)
+        blocked.append(thread.is_alive())
+        return build(entries)
+
+    monkeypatch.setattr(concurrent_table.SearchIndex, 'build', build_while_others_write)
+    table.search('S00')
+    assert blocked == [False]
+
+    plain = HashTable()
+    for student in table.get_all_students():
+        plain.insert(student.student_id, student)
+    for text in ('S000', 'S9', 'student', 'renamed', 'student 5', ''):
+        # Name matches come in no particular order
+        got = sorted(s.student_id for s in table.search(text, None))
+        assert got == sorted(s.student_id for s in plain.search(text, None)), text
@@ -0,0 +1,209 @@
+# tests/test_persistence.py
+
+import os
+import shutil
+
+import pytest
+
+import binary_snapshot
+import utils
+from binary_snapshot import BinarySnapshot
+from hash_table import HashTable
+from student import Student
+from utils import (CorruptFileError, change_log_path, iter_students, load_from_file, save_changes,
+                   save_to_file, verify_snapshot)
+
+
+def make_table(count=50):
+    table = HashTable()
+    for i in range(count):
+        student = Student(f"S{i:04d}", f"Student, {i}", 'Female' if i % 2 else 'Male', 18 + i % 10)
+        student.grades = {'Math': float(i % 101)} if i % 3 else {}
+        table.insert(student.student_id, student)
+    return table
+
+
+def state(table):
+    return {s.student_id: (s.name, s.gender, s.age, dict(s.grades)) for s in table.get_all_students()}
+
+
+def mapped(file_path):
+    return [s for s in binary_snapshot._open_snapshots if s.file_path == file_path]
+
+
+def loaded(file_path):
+    table = HashTable()
+    load_from_file(table, file_path)
+    return table
+
+
+@pytest.mark.parametrize('name', ['roster.txt', 'roster.csv', 'roster.smsb'])
+def test_changes_round_trip_through_the_log(tmp_path, name):
+    file_path = str(tmp_path / name)
+    table = make_table()
+    save_to_file(table, file_path)
+    table.delete('S0003')
+    table.add_grade('S0004', 'Art', 77.5)
+    save_changes(table, file_path)
+
+    assert os.path.exists(change_log_path(file_path))
+    assert state(loaded(file_path)) == state(table)
+
+
+@pytest.mark.parametrize('name', ['roster.txt', 'roster.smsb'])
+def test_log_left_by_a_crash_after_the_snapshot_is_replaced_is_ignored(tmp_path, name):
+    file_path = str(tmp_path / name)
+    table = make_table()
+    save_to_file(table, file_path)
+    table.delete('S0003')
+    save_changes(table, file_path)
+    stale_log = change_log_path(file_path) + '.old'
+    shutil.copy(change_log_path(file_path), stale_log)
+
+    # Re-add the student and save in full; then put the old log back, as if
+    # the process died between installing the snapshot and removing the log
+    table.insert('S0003', Student('S0003', 'Back Again', 'Male', 30))
+    save_to_file(table, file_path)
+    os.replace(stale_log, change_log_path(file_path))
+    assert state(loaded(file_path)) == state(table)
+
+    # The next incremental save starts a fresh log instead of appending to the stale one
+    table.delete('S0010')
+    save_changes(table, file_path)
+    assert state(loaded(file_path)) == state(table)
+
+
+def test_log_without_a_base_record_is_still_replayed(tmp_path):
+    file_path = str(tmp_path / 'roster.txt')
+    table = make_table()
+    save_to_file(table, file_path)
+    table.delete('S0003')
+    save_changes(table, file_path)
+    log_path = change_log_path(file_path)
+    with open(log_path, encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(log_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[1:])
+
+    assert state(loaded(file_path)) == state(table)
+
+
+def test_text_snapshot_truncated_before_its_footer_fails_verification(tmp_path):
+    file_path = str(tmp_path / 'roster.txt')
+    save_to_file(make_table(), file_path)
+    assert verify_snapshot(file_path) is True
+
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    # Cut at a record boundary, so the remaining rows still parse
+    cut = data.rfind(b'\n', 0, len(data) // 2) + 1
+    with open(file_path, 'wb') as f:
+        f.write(data[:cut])
+
+    with pytest.raises(CorruptFileError):
+        verify_snapshot(file_path)
+    with pytest.raises(CorruptFileError):
+        loaded(file_path)
+
+
+def test_legacy_text_file_without_marker_or_footer_is_accepted(tmp_path):
+    file_path = str(tmp_path / 'roster.txt')
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        f.write('Student ID|Name|Gender|Age|Grades\r\n')
+        f.write('S1|Ann Lee|Female|20|"{""Math"": 90.0}"\r\n')
+        f.write('S2|Bob Stone|Male|21|{}\r\n')
+
+    assert verify_snapshot(file_path) is False
+    assert state(loaded(file_path)) == {
+        'S1': ('Ann Lee', 'Female', 20, {'Math': 90.0}),
+        'S2': ('Bob Stone', 'Male', 21, {}),
+    }
+
+
+@pytest.mark.parametrize('name', ['roster.txt', 'roster.csv'])
+def test_short_rows_load_with_their_missing_fields_empty(tmp_path, monkeypatch, name):
+    file_path = str(tmp_path / name)
+    delimiter = ',' if name.endswith('.csv') else '|'
+    lines = [
+        ['Student ID', 'Name', 'Gender', 'Age', 'Grades'],
+        ['S1', 'Ann Lee', 'Female', '20', '"{""Math"": 90.0}"'],
+        # Cut short, e.g. by a hand edit: no grades, then no age either
+        ['S2', 'Bob Stone', 'Male', '21'],
+        ['S3', 'Cy Young'],
+        ['S4', 'Di Ross', 'Female', '22', '{}'],
+    ]
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(delimiter.join(line) + '\r\n' for line in lines)
+    expected = {
+        'S1': ('Ann Lee', 'Female', 20, {'Math': 90.0}),
+        'S2': ('Bob Stone', 'Male', 21, {}),
+        'S3': ('Cy Young', '', 0, {}),
+        'S4': ('Di Ross', 'Female', 22, {}),
+    }
+
+    assert state(loaded(file_path)) == expected
+    assert {s.student_id: (s.name, s.gender, s.age, s.grades) for s in iter_students(file_path)} == expected
+    monkeypatch.setattr(utils, 'PARALLEL_LOAD_MIN_BYTES', 0)
+    parallel = HashTable()
+    utils.load_from_file_parallel(parallel, file_path, workers=2)
+    assert state(parallel) == expected
+
+
+def test_parallel_and_streaming_loaders_skip_the_marker(tmp_path, monkeypatch):
+    file_path = str(tmp_path / 'roster.csv')
+    table = make_table(500)
+    save_to_file(table, file_path)
+
+    monkeypatch.setattr(utils, 'PARALLEL_LOAD_MIN_BYTES', 0)
+    parallel = HashTable()
+    utils.load_from_file_parallel(parallel, file_path, workers=2)
+    assert state(parallel) == state(table)
+
+    streamed = {s.student_id for s in iter_students(file_path)}
+    assert streamed == set(state(table))
+
+
+def test_binary_snapshot_closes_its_map(tmp_path):
+    file_path = str(tmp_path / 'roster.smsb')
+    save_to_file(make_table(), file_path)
+
+    with BinarySnapshot(file_path) as snapshot:
+        assert sorted(s.student_id for s in snapshot) == sorted(state(make_table()))
+    assert snapshot.closed
+    snapshot.close()
+
+    list(iter_students(file_path))
+    verify_snapshot(file_path)
+    assert not mapped(file_path)
+
+
+def test_overwriting_a_mapped_snapshot_detaches_undecoded_students(tmp_path):
+    file_path = str(tmp_path / 'roster.smsb')
+    table = make_table()
+    save_to_file(table, file_path)
+    expected = state(table)
+
+    source = loaded(file_path)
+    # Kept aside without decoding them, e.g. by an undo history
+    lazy = source.get_all_students()
+    snapshot = lazy[0]._snapshot
+
+    table.delete('S0003')
+    save_to_file(table, file_path)
+
+    assert snapshot.closed is True
+    assert not mapped(file_path)
+    assert {s.student_id: (s.name, s.gender, s.age, dict(s.grades)) for s in lazy} == expected
+    assert state(loaded(file_path)) == state(table)
+
+
+def test_resaving_a_loaded_snapshot_to_its_own_file(tmp_path):
+    file_path = str(tmp_path / 'roster.smsb')
+    save_to_file(make_table(), file_path)
+    table = loaded(file_path)
+    table.add_grade('S0001', 'Art', 88.0)
+    expected = state(table)
+
+    save_to_file(table, file_path)
+    assert not mapped(file_path)
+    assert state(loaded(file_path)) == expected
@@ -0,0 +1,92 @@
+# tests/test_roster.py
+
+import copy
+import random
+
+import pytest
+
+import roster
+from roster import Roster
+from student import Student
+
+
+def make_student(i, grades=None):
+    student = Student(f"S{i:05d}", f"Student Number {i}", 'Female' if i % 2 else 'Male', 18 + i % 10)
+    student.grades = dict(grades or {})
+    return student
+
+
+def state(store):
+    return {view.student_id: (view.name, view.gender, view.age, dict(view.grades)) for view in store}
+
+
+def test_grade_edits_write_through_to_the_roster():
+    store = Roster()
+    view = store.add('S1', 'Ann Lee', 'Female', 20, {'Math': 90.0, 'Art': 70.0})
+
+    grades = view.grades
+    grades['Physics'] = 80.0
+    del grades['Art']
+    assert grades.pop('Math') == 90.0
+    assert grades.pop('Nope', None) is None
+    grades.update({'CG': 65.5}, DB=55.0)
+    grades.setdefault('CG', 0.0)
+    assert store.get('S1').grades == {'Physics': 80.0, 'CG': 65.5, 'DB': 55.0}
+    assert store.courses() == ['CG', 'DB', 'Physics']
+    assert [g for _, g in store.grade_range('Physics')] == [80.0]
+
+    grades.clear()
+    assert store.get('S1').grades == {}
+    assert store.courses() == []
+    assert type(copy.copy(view.grades)) is dict
+
+
+def test_removed_rows_are_reused_and_their_views_go_stale():
+    store = Roster()
+    for i in range(10):
+        store.add_student(make_student(i, {'Math': float(i)}))
+    old = store.get('S00003')
+    rows = len(store._ids)
+
+    assert store.remove('S00003')
+    fresh = store.add_student(make_student(99, {'Art': 50.0}))
+    assert len(store._ids) == rows
+    assert fresh._row == old._row
+    assert fresh != old
+    with pytest.raises(ValueError):
+        old.name
+    with pytest.raises(ValueError):
+        old.grades['Math'] = 1.0
+
+    assert store.get('S00099').grades == {'Art': 50.0}
+    assert 'S00003' not in store
+    assert ([s.student_id for s in store.students_in_course('Math')]
+            == [f"S{i:05d}" for i in range(10) if i != 3])
+
+
+def test_delete_insert_churn_keeps_the_columns_bounded(monkeypatch):
+    monkeypatch.setattr(roster, 'COMPACT_MIN_BYTES', 1024)
+    rng = random.Random(0)
+    store = Roster()
+    expected = {}
+    next_id = 0
+    for _ in range(200):
+        student = make_student(next_id, {rng.choice(['Math', 'Art']): float(rng.randint(0, 100))})
+        store.add_student(student)
+        expected[student.student_id] = (student.name, student.gender, student.age, student.grades)
+        next_id += 1
+    size = store.nbytes()
+
+    for _ in range(20):
+        for key in rng.sample(sorted(expected), 100):
+            store.remove(key)
+            del expected[key]
+        for _ in range(100):
+            student = make_student(next_id, {rng.choice(['Math', 'Art']): float(rng.randint(0, 100))})
+            store.add_student(student)
+            expected[student.student_id] = (student.name, student.gender, student.age, student.grades)
+            next_id += 1
+
+    assert len(store._ids) == 200
+    assert state(store) == expected
+    assert store.nbytes() < 2 * size
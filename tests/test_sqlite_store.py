@@ -0,0 +1,89 @@
+# tests/test_sqlite_store.py
+
+import threading
+
+import pytest
+
+from sqlite_store import SQLiteStudentStore
+from student import Student
+
+
+def make_student(i):
+    student = Student(f"S{i:04d}", f"Student {i % 7}", 'Male', 20)
+    student.grades = {'Math': float(i % 50), 'Art': float(i % 30)} if i % 4 else {}
+    return student
+
+
+@pytest.fixture
+def store():
+    store = SQLiteStudentStore(':memory:')
+    store.insert_many([(s.student_id, s) for s in map(make_student, range(300))])
+    yield store
+    store.close()
+
+
+def count_selects(store, fn):
+    statements = []
+    store._conn.set_trace_callback(statements.append)
+    try:
+        result = fn()
+    finally:
+        store._conn.set_trace_callback(None)
+    return result, sum(1 for statement in statements if statement.lstrip().upper().startswith('SELECT'))
+
+
+@pytest.mark.parametrize('query', [
+    lambda store: store.grade_range('Math', 10.0, 30.0),
+    lambda store: store.grade_range('Math', descending=True, limit=25),
+    lambda store: store.find_by_name('Student 3'),
+    lambda store: store.search('Student', limit=100),
+])
+def test_lookups_fetch_students_with_their_grades_in_one_query(store, query):
+    result, selects = count_selects(store, lambda: query(store))
+    assert result
+    # search() first finds the keys (by ID, then by name), then fetches the students once
+    assert selects <= 3
+    for item in result:
+        student = item[0] if isinstance(item, tuple) else item
+        assert student.grades == store.retrieve(student.student_id).grades
+
+
+def test_grade_range_keeps_its_order(store):
+    pairs = store.grade_range('Math', 10.0, 30.0)
+    assert [(g, s.student_id) for s, g in pairs] == sorted((g, s.student_id) for s, g in pairs)
+    top = store.grade_range('Math', descending=True, limit=10)
+    assert [(g, s.student_id) for s, g in top] == sorted(((g, s.student_id) for s, g in store.grade_range('Math')),
+                                                         reverse=True)[:10]
+
+
+def test_threads_can_share_the_store(tmp_path):
+    store = SQLiteStudentStore(str(tmp_path / 'roster.db'))
+    errors = []
+
+    def writer(offset):
+        try:
+            for i in range(offset, offset + 200):
+                store.insert(f"S{i:04d}", make_student(i))
+                store.add_grade(f"S{i:04d}", 'CG', 75.0)
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(100):
+                store.grade_range('CG', limit=5)
+                store.course_statistics('Math')
+                list(store.iter_students())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n * 200,)) for n in range(3)]
+    threads += [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(store) == 600
+    assert len(store.grade_range('CG')) == 600
+    store.close()
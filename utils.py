@@ -1,95 +1,851 @@
 # utils.py
 
 import os  # Ensure os is imported
+import gc
+import heapq
+import io
 import json
 import csv
+import mmap
+import uuid
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import analytics
+import metrics
 from hash_table import HashTable
+from indexes import SCORE_RANGES, score_range
 from student import Student
+from binary_snapshot import (BinarySnapshot, LazyStudent, SnapshotFormatError, detach_snapshots, encode_snapshot,
+                             read_checksum)
 
+# Column headers of the .txt/.csv roster format, in file order
+FILE_COLUMNS = ['Student ID', 'Name', 'Gender', 'Age', 'Grades']
 
-def save_to_file(hash_table, file_path):
+# One parsed roster line as produced by iter_student_rows()
+StudentRow = namedtuple('StudentRow', ['student_id', 'name', 'gender', 'age', 'grades'])
+
+# Rows parsed per batch when streaming a roster file
+DEFAULT_BATCH_SIZE = 10000
+
+# Snapshots are written in batches of rows through a large buffer. They start
+# with a '#sms-snapshot v1' marker line and end with a
+# '#sms-checksum crc32=<hex> rows=<n>' footer line; files without the marker
+# predate checksums and have no footer
+WRITE_BATCH_ROWS = 5000
+WRITE_BUFFER_BYTES = 1024 * 1024
+READ_CHUNK_BYTES = 1024 * 1024
+SNAPSHOT_MARKER = '#sms-snapshot v1'
+CHECKSUM_PREFIX = '#sms-checksum'
+
+# Files with this extension use the binary snapshot format (see binary_snapshot.py)
+BINARY_EXTENSION = '.smsb'
+
+# Incremental saves append to '<snapshot>.log'; the snapshot is rewritten once
+# the log exceeds COMPACT_RATIO of its size (and at least COMPACT_MIN_BYTES)
+CHANGE_LOG_SUFFIX = '.log'
+COMPACT_RATIO = 0.5
+COMPACT_MIN_BYTES = 64 * 1024
+
+# Text rosters at least this large are worth parsing in worker processes;
+# below it, starting the processes costs more than the parse
+PARALLEL_LOAD_MIN_BYTES = 8 * 1024 * 1024
+# Shards per worker process, so a slow shard does not leave the other workers idle
+SHARDS_PER_WORKER = 4
+
+
+class CorruptFileError(ValueError):
+    """Raised when a snapshot's checksum footer does not match its contents."""
+
+
+def _fsync_directory(directory):
+    """Make a rename durable on POSIX; elsewhere directories cannot be opened and this is a no-op."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(file_path, chunks):
+    """
+    Write byte chunks to a temporary file next to file_path, fsync it and rename it into place.
+
+    Readers see either the complete old file or the complete new one, never
+    a partially written snapshot. Binary snapshots still mapped from
+    file_path are detached from it first, so students not yet decoded from
+    them keep their contents (and Windows allows the rename).
+
+    Args:
+        file_path (str): The final destination.
+        chunks (iterable): Byte strings to write in order.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    tmp_path = f"{file_path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        with os.fdopen(fd, 'wb', buffering=WRITE_BUFFER_BYTES) as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        detach_snapshots(file_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def _csv_snapshot_chunks(students, delimiter):
+    """Encode students as CSV in large chunks, between the marker line and the checksum footer line."""
+    buffer = io.StringIO()
+    buffer.write(SNAPSHOT_MARKER + '\r\n')
+    writer = csv.writer(buffer, delimiter=delimiter)
+    writer.writerow(FILE_COLUMNS)
+    dumps = json.dumps
+    crc = 0
+    rows = 0
+    batch = []
+
+    def drain():
+        nonlocal crc
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        crc = zlib.crc32(data, crc)
+        return data
+
+    for student in students:
+        grades = student.grades
+        batch.append((student.student_id, student.name, student.gender, student.age,
+                      dumps(grades) if grades else '{}'))  # Serialize grades as JSON string
+        if len(batch) >= WRITE_BATCH_ROWS:
+            writer.writerows(batch)
+            rows += len(batch)
+            batch = []
+            yield drain()
+    writer.writerows(batch)
+    rows += len(batch)
+    yield drain()
+    yield f"{CHECKSUM_PREFIX} crc32={crc:08x} rows={rows}\r\n".encode('ascii')
+
+
+def _with_progress(items, progress, total, every=DEFAULT_BATCH_SIZE):
+    """Yield items, calling progress(done, total) every `every` items and once at the end."""
+    if progress is None:
+        yield from items
+        return
+    done = 0
+    for item in items:
+        yield item
+        done += 1
+        if done % every == 0:
+            progress(done, total)
+    progress(done, total)
+
+
+@metrics.timed('utils.save_to_file')
+def save_to_file(hash_table, file_path, progress=None):
     """
-    Save the hash table data to a CSV or TXT file.
-    Each student's data is saved on a single line.
+    Save the hash table data to a CSV, TXT or binary .smsb file.
+    In CSV/TXT files each student's data is saved on a single line.
+
+    The file is written atomically (temp file, fsync, rename) and carries
+    a checksum that load_from_file() verifies. It holds the table as of the
+    table's checkpoint(); on a ConcurrentHashTable edits made while it is
+    being written stay pending for the next save.
 
     Args:
         hash_table (HashTable): The hash table containing student data.
         file_path (str): The path to the file where data will be saved.
+        progress (callable, optional): Called as progress(students_written, total_students)
+                                       while writing. An exception it raises aborts the
+                                       save and leaves the existing file untouched.
     """
-    _, ext = os.path.splitext(file_path)
-    if ext.lower() in ['.txt', '.csv']:
-        # Determine delimiter based on extension
-        delimiter = ',' if ext.lower() == '.csv' else '|'
-
-        with open(file_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f, delimiter=delimiter)
-            # Write header
-            writer.writerow(['Student ID', 'Name', 'Gender', 'Age', 'Grades'])
-
-            for student in hash_table.get_all_students():
-                grades_json = json.dumps(student.grades)  # Serialize grades as JSON string
-                writer.writerow([student.student_id, student.name, student.gender, student.age, grades_json])
+    view, pending = hash_table.checkpoint()
+    try:
+        students = _with_progress(view.iter_students(), progress, len(view))
+        if _is_binary(file_path):
+            _atomic_write(file_path, encode_snapshot(students))
+        else:
+            # Determine delimiter based on extension
+            delimiter = _delimiter_for(file_path)
+            _atomic_write(file_path, _csv_snapshot_chunks(students, delimiter))
+        metrics.add_file_size('utils.save_to_file', file_path, written=True)
+
+        # The snapshot now holds everything, so any change log next to it is stale.
+        # Removing it is only tidying up: a log left behind by a crash right here
+        # names the checksum of the old snapshot, and _replay_change_log() skips it
+        log_path = change_log_path(file_path)
+        if os.path.exists(log_path):
+            os.remove(log_path)
+    except BaseException:
+        hash_table.restore_changes(pending)
+        raise
+    hash_table.mark_persisted(file_path)
+
+
+def _read_footer(f, file_path):
+    """
+    Parse the checksum footer of an open text snapshot.
+
+    Returns:
+        tuple: (expected CRC-32, size of the data it covers), or None if the file has no footer.
+
+    Raises:
+        CorruptFileError: If the footer is malformed.
+    """
+    size = f.seek(0, os.SEEK_END)
+    tail_start = max(0, size - 256)
+    f.seek(tail_start)
+    tail = f.read().rstrip(b'\r\n')
+    line_start = tail.rfind(b'\n') + 1
+    last_line = tail[line_start:]
+    if not last_line.startswith(CHECKSUM_PREFIX.encode('ascii')):
+        return None
+    fields = dict(part.split(b'=', 1) for part in last_line.split()[1:] if b'=' in part)
+    try:
+        expected = int(fields[b'crc32'], 16)
+    except (KeyError, ValueError):
+        raise CorruptFileError(f"'{file_path}' has a malformed checksum footer.")
+    return expected, tail_start + line_start
+
+
+@metrics.timed('utils.verify_snapshot')
+def verify_snapshot(file_path):
+    """
+    Check a snapshot's checksum footer against its contents.
+
+    Text files written before checksums were introduced have neither the
+    marker line nor a footer and are accepted as-is. A file that starts with
+    the marker but has no footer was cut short and fails. Binary snapshots
+    always carry a checksum.
+
+    Args:
+        file_path (str): The snapshot file.
+
+    Returns:
+        bool: True if the footer matched, False if the file is a legacy file without one.
+
+    Raises:
+        CorruptFileError: If the footer is missing, malformed or does not match.
+    """
+    metrics.add_file_size('utils.verify_snapshot', file_path)
+    if _is_binary(file_path):
+        with _open_binary_snapshot(file_path):
+            return True
+
+    with open(file_path, 'rb') as f:
+        footer = _read_footer(f, file_path)
+        if footer is None:
+            f.seek(0)
+            if f.read(len(SNAPSHOT_MARKER)) == SNAPSHOT_MARKER.encode('ascii'):
+                raise CorruptFileError(f"'{file_path}' has no checksum footer; the file is incomplete.")
+            return False
+
+        expected, data_size = footer
+        f.seek(0)
+        crc = 0
+        remaining = data_size
+        while remaining:
+            chunk = f.read(min(READ_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            remaining -= len(chunk)
+
+    if remaining or crc != expected:
+        raise CorruptFileError(f"'{file_path}' failed its checksum; the file is damaged or incomplete.")
+    return True
+
+
+def _snapshot_checksum(file_path):
+    """
+    Return the checksum a snapshot records for itself as a hex string, without verifying it.
+
+    Change logs are tied to their snapshot by it. Legacy text files have none
+    and give None.
+    """
+    if _is_binary(file_path):
+        try:
+            crc = read_checksum(file_path)
+        except SnapshotFormatError as e:
+            raise CorruptFileError(str(e)) from e
     else:
-        raise ValueError("Unsupported file extension. Please use .txt or .csv.")
+        with open(file_path, 'rb') as f:
+            footer = _read_footer(f, file_path)
+        if footer is None:
+            return None
+        crc = footer[0]
+    return f"{crc:08x}"
+
+
+def _log_matches(log_path, checksum):
+    """
+    Tell whether the change log at log_path was written against the snapshot with this checksum.
+
+    Each log starts with a {'op': 'base', 'crc32': ...} record naming its
+    snapshot. Logs from before that record existed start straight with a
+    change and are taken to match. A missing, empty or torn log does not.
+    """
+    try:
+        with open(log_path, 'r', encoding='utf-8') as f:
+            first = f.readline()
+    except FileNotFoundError:
+        return False
+    try:
+        record = json.loads(first)
+    except ValueError:
+        return False
+    return record['op'] != 'base' or record['crc32'] == checksum
+
+
+def change_log_path(file_path):
+    """Return the path of the append-only change log kept next to a snapshot file."""
+    return file_path + CHANGE_LOG_SUFFIX
+
+
+@metrics.timed('utils.save_changes')
+def save_changes(hash_table, file_path='students.txt', progress=None):
+    """
+    Persist only what changed since the table was last loaded from or saved to file_path.
+
+    Changed and deleted students are appended to the change log next to the
+    snapshot; the log is tied to the snapshot's checksum, and a log left
+    over from an older snapshot is started afresh. Once the log grows past COMPACT_RATIO of the snapshot size it
+    is compacted by rewriting the snapshot. A full snapshot is also written
+    when the table does not currently correspond to file_path (for example
+    after loading a different file).
+
+    Args:
+        hash_table (HashTable): The hash table containing student data.
+        file_path (str, optional): The snapshot file. Defaults to 'students.txt'.
+        progress (callable, optional): Passed to save_to_file() when a full snapshot is written.
+
+    Returns:
+        int: The number of student records written; 0 when nothing was dirty.
+    """
+    if not hash_table.is_dirty():
+        return 0
+
+    if hash_table.persisted_path != os.path.abspath(file_path) or not os.path.exists(file_path):
+        save_to_file(hash_table, file_path, progress)
+        return len(hash_table)
+
+    view, changes = hash_table.checkpoint()
+    if not changes:
+        hash_table.mark_persisted(file_path)
+        return 0
+    try:
+        lines = []
+        for key, present in changes.items():
+            student = view.retrieve(key) if present else None
+            if student is not None:
+                lines.append(json.dumps({'op': 'put', 'key': key, 'student': student.to_dict()}))
+            else:
+                lines.append(json.dumps({'op': 'delete', 'key': key}))
+
+        log_path = change_log_path(file_path)
+        mode = 'ab'
+        checksum = _snapshot_checksum(file_path)
+        if not _log_matches(log_path, checksum):
+            lines.insert(0, json.dumps({'op': 'base', 'crc32': checksum}))
+            mode = 'wb'
+        with open(log_path, mode) as f:
+            written = f.write(('\n'.join(lines) + '\n').encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        hash_table.restore_changes(changes)
+        raise
+    hash_table.mark_persisted(file_path)
+    metrics.add_bytes('utils.save_changes', written=written)
+
+    if os.path.getsize(log_path) > max(COMPACT_MIN_BYTES, COMPACT_RATIO * os.path.getsize(file_path)):
+        save_to_file(hash_table, file_path, progress)
+    return len(lines)
+
+
+def _replay_change_log(hash_table, file_path):
+    """
+    Apply the change log recorded after the snapshot at file_path, if any.
+
+    A log written against a different snapshot is ignored: it is left over
+    from a crash after save_to_file() replaced the snapshot, which already
+    holds its changes.
+    """
+    log_path = change_log_path(file_path)
+    if not _log_matches(log_path, _snapshot_checksum(file_path)):
+        return
+    metrics.add_file_size('utils.load_from_file', log_path)
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn final line from an interrupted append; everything before it is intact
+                break
+            if record['op'] == 'base':
+                continue
+            if record['op'] == 'put':
+                hash_table.insert(record['key'], Student.from_dict(record['student']))
+            else:
+                hash_table.delete(record['key'])
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Suspend the cyclic garbage collector while bulk-creating objects.
+
+    A load allocates one or two long-lived objects per student; letting the
+    collector repeatedly traverse the growing heap meanwhile costs more than
+    the load itself. Nothing allocated during a load forms cycles.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _is_binary(file_path):
+    return os.path.splitext(file_path)[1].lower() == BINARY_EXTENSION
+
+
+def _delimiter_for(file_path):
+    """Return the CSV delimiter for a roster file, or raise for unsupported extensions."""
+    _, ext = os.path.splitext(file_path)
+    if ext.lower() not in ['.txt', '.csv']:
+        raise ValueError("Unsupported file extension. Please use .txt, .csv or .smsb.")
+    return ',' if ext.lower() == '.csv' else '|'
+
+
+def _open_binary_snapshot(file_path):
+    try:
+        return BinarySnapshot(file_path)
+    except SnapshotFormatError as e:
+        raise CorruptFileError(str(e)) from e
+
+
+def _pad_row(row, width):
+    """
+    Fill the missing trailing cells of a short row with empty strings.
+
+    Matches csv.DictReader, which the loaders used to read rows with: a row
+    cut short (e.g. a hand-edited file) loads with its missing fields empty,
+    so no age (0) and no grades, rather than failing the whole load.
+    """
+    return row + [''] * (width - len(row))
+
+
+def iter_student_rows(file_path, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Stream a CSV, TXT or .smsb roster as batches of parsed rows.
+
+    Only one batch is held in memory at a time, so arbitrarily large files
+    can be filtered, projected or aggregated in constant memory. The grades
+    cell is only JSON-decoded when it holds something other than '{}'.
+    The checksum footer is skipped, not checked; call verify_snapshot()
+    first when integrity matters.
+
+    Args:
+        file_path (str): The path to the roster file.
+        batch_size (int, optional): Rows per yielded batch.
+        progress (callable, optional): Called as progress(done, total) after each batch,
+                                       in records for .smsb files and bytes for text files.
+
+    Yields:
+        list: Up to batch_size StudentRow tuples.
+    """
+    if _is_binary(file_path):
+        with _open_binary_snapshot(file_path) as snapshot:
+            total = len(snapshot)
+            for start in range(0, total, batch_size):
+                end = min(start + batch_size, total)
+                yield [StudentRow(student.student_id, student.name, student.gender, student.age, student.grades)
+                       for student in map(snapshot.decode, range(start, end))]
+                if progress is not None:
+                    progress(end, total)
+        return
+
+    delimiter = _delimiter_for(file_path)
+    make_row = StudentRow._make
+    loads = json.loads
+
+    total = os.path.getsize(file_path)
+    with open(file_path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header == [SNAPSHOT_MARKER]:
+            header = next(reader, None)
+        if header is None:
+            return
+        columns = [header.index(column) for column in FILE_COLUMNS]
+        i_id, i_name, i_gender, i_age, i_grades = columns
+        width = max(columns) + 1
+
+        batch = []
+        for row in reader:
+            if not row or (len(row) == 1 and row[0].startswith(CHECKSUM_PREFIX)):
+                continue
+            if len(row) < width:
+                row = _pad_row(row, width)
+            age = row[i_age]
+            grades_json = row[i_grades]
+            batch.append(make_row((
+                row[i_id],
+                row[i_name],
+                row[i_gender],
+                int(age) if age else 0,
+                loads(grades_json) if grades_json and grades_json != '{}' else {}
+            )))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+                if progress is not None:
+                    # Bytes handed to the text decoder so far; exact enough for a progress bar
+                    progress(f.buffer.tell(), total)
+        if batch:
+            yield batch
+        if progress is not None:
+            progress(total, total)
+
 
+def iter_students(file_path, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Stream Student objects from a CSV, TXT or .smsb roster one at a time.
+
+    Args:
+        file_path (str): The path to the roster file.
+        batch_size (int, optional): Rows parsed per read-ahead batch.
+        progress (callable, optional): Passed on to iter_student_rows().
+
+    Yields:
+        Student: One student per data row.
+    """
+    for batch in iter_student_rows(file_path, batch_size, progress):
+        for student_id, name, gender, age, grades in batch:
+            student = Student(student_id, name, gender, age)
+            student.grades = grades
+            yield student
+
+
+def filter_rows(batches, predicate):
+    """
+    Keep only the rows for which predicate(row) is true, batch by batch.
+
+    Args:
+        batches (iterable): Batches from iter_student_rows().
+        predicate (callable): Called with each StudentRow.
+
+    Yields:
+        list: Non-empty filtered batches.
+    """
+    for batch in batches:
+        kept = [row for row in batch if predicate(row)]
+        if kept:
+            yield kept
+
+
+def project_rows(batches, *fields):
+    """
+    Reduce each row to the named fields.
+
+    Args:
+        batches (iterable): Batches from iter_student_rows() or filter_rows().
+        *fields (str): StudentRow field names, e.g. 'student_id', 'age'.
 
-def load_from_file(hash_table, file_path=None):
+    Yields:
+        list: Batches of tuples holding only the requested fields.
     """
-    Load data into the hash table from a CSV or TXT file.
-    Each student's data should be on a single line.
+    indexes = [StudentRow._fields.index(field) for field in fields]
+    for batch in batches:
+        yield [tuple(row[i] for i in indexes) for row in batch]
+
+
+def aggregate_rows(batches, reducer, initial):
+    """
+    Fold every row into an accumulator without materialising the roster.
+
+    Args:
+        batches (iterable): Batches of rows.
+        reducer (callable): reducer(accumulator, row) -> new accumulator.
+        initial: The starting accumulator.
+
+    Returns:
+        The final accumulator.
+    """
+    accumulator = initial
+    for batch in batches:
+        for row in batch:
+            accumulator = reducer(accumulator, row)
+    return accumulator
+
+
+@metrics.timed('utils.load_from_file')
+def load_from_file(hash_table, file_path=None, progress=None):
+    """
+    Load data into the hash table from a CSV, TXT or binary .smsb file.
+    In CSV/TXT files each student's data should be on a single line.
+
+    Binary snapshots are memory-mapped and only their student IDs are
+    decoded up front; each record becomes a LazyStudent that decodes
+    itself on first access. The mapping is released once every record has
+    been decoded, or copied into memory if the file is overwritten first.
 
     Args:
         hash_table (HashTable): The hash table where data will be loaded.
         file_path (str, optional): The path to the file from which data will be loaded.
                                    If None, it defaults to 'students.txt'.
+        progress (callable, optional): Called as progress(done, total) while loading
+                                       (records for .smsb, bytes for text files). An
+                                       exception it raises aborts the load.
     """
     if not file_path:
         file_path = 'students.txt'  # Default file
 
-    _, ext = os.path.splitext(file_path)
-    if ext.lower() in ['.txt', '.csv']:
-        # Determine delimiter based on extension
-        delimiter = ',' if ext.lower() == '.csv' else '|'
+    binary = _is_binary(file_path)
+    if not binary:
+        _delimiter_for(file_path)
 
-        if not os.path.exists(file_path):
-            # If the file does not exist, initialize an empty hash table
-            hash_table.clear()
-            return
+    if not os.path.exists(file_path):
+        # If the file does not exist, initialize an empty hash table
+        hash_table.clear()
+        hash_table.mark_clean(file_path)
+        return
 
-        with open(file_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f, delimiter=delimiter)
-            hash_table.clear()
-            for row in reader:
-                student_id = row['Student ID']
-                name = row['Name']
-                gender = row['Gender']
-                age = int(row['Age']) if row['Age'] else 0
-                grades_json = row['Grades']
-                grades = json.loads(grades_json) if grades_json else {}
-
-                student = Student(student_id, name, gender, age)
-                student.grades = grades
-                hash_table.insert(student_id, student)
+    if binary:
+        snapshot = _open_binary_snapshot(file_path)
     else:
-        raise ValueError("Unsupported file extension. Please use .txt or .csv.")
+        # Check the whole file before touching the table so a damaged snapshot never half-loads
+        verify_snapshot(file_path)
+
+    with _gc_paused(), hash_table.batch():
+        hash_table.clear()
+        if binary:
+            student_ids = snapshot.student_ids()
+            # A snapshot is written from a table, so its IDs are unique and need no duplicate checks
+            hash_table.insert_many(
+                [(student_id, LazyStudent(snapshot, index))
+                 for index, student_id in _with_progress(enumerate(student_ids), progress, len(student_ids))],
+                unique=True)
+        else:
+            hash_table.insert_many((student.student_id, student)
+                                   for student in iter_students(file_path, progress=progress))
+            metrics.add_file_size('utils.load_from_file', file_path)
+        _replay_change_log(hash_table, file_path)
+    hash_table.mark_clean(file_path)
+
+
+def _record_boundary(mm, start, quotes, counted):
+    """
+    Find the first record boundary at or after start in a memory-mapped CSV.
+
+    A newline ends a record only outside a quoted field, i.e. when the
+    number of '"' characters before it is even; a doubled quote inside a
+    field adds two, so parity alone tells them apart. quotes is the count in
+    mm[:counted] and is carried forward between calls.
+
+    Returns:
+        tuple: (offset just past the newline or len(mm), quotes, counted).
+    """
+    position = start
+    while True:
+        newline = mm.find(b'\n', position)
+        if newline < 0:
+            return len(mm), quotes, counted
+        while counted < newline:
+            step = min(newline, counted + READ_CHUNK_BYTES)
+            quotes += mm[counted:step].count(b'"')
+            counted = step
+        if quotes % 2 == 0:
+            return newline + 1, quotes, counted
+        position = newline + 1
+
+
+def _shard_offsets(file_path, shards):
+    """
+    Split a CSV/TXT roster into byte ranges that each hold whole records.
+
+    Returns:
+        tuple: (header bytes, [start, ..., end] offsets of up to `shards` ranges after the header).
+    """
+    size = os.path.getsize(file_path)
+    if not size:
+        return b'', [0, 0]
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_start = 0
+        header_end, quotes, counted = _record_boundary(mm, 0, 0, 0)
+        if mm[:header_end].rstrip(b'\r\n') == SNAPSHOT_MARKER.encode('ascii'):
+            header_start = header_end
+            header_end, quotes, counted = _record_boundary(mm, header_start, quotes, counted)
+        offsets = [header_end]
+        step = max(1, (size - header_end) // shards)
+        for target in range(header_end + step, size, step):
+            if target <= offsets[-1]:
+                continue
+            boundary, quotes, counted = _record_boundary(mm, target, quotes, counted)
+            if boundary >= size:
+                break
+            offsets.append(boundary)
+        offsets.append(size)
+        return mm[header_start:header_end], offsets
+
+
+def _parse_shard(file_path, start, stop, delimiter, columns):
+    """
+    Parse the records in bytes [start, stop) of a roster file.
+
+    Runs in a worker process, so it takes and returns only plain picklable values.
+
+    Returns:
+        list: (student_id, name, gender, age, grades) tuples in file order.
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        # Shards start and end on newlines, so they never split a UTF-8 sequence
+        text = f.read(stop - start).decode('utf-8')
+    i_id, i_name, i_gender, i_age, i_grades = columns
+    width = max(columns) + 1
+    loads = json.loads
+    rows = []
+    for row in csv.reader(io.StringIO(text, newline=''), delimiter=delimiter):
+        if not row or (len(row) == 1 and row[0].startswith(CHECKSUM_PREFIX)):
+            continue
+        if len(row) < width:
+            row = _pad_row(row, width)
+        age = row[i_age]
+        grades_json = row[i_grades]
+        rows.append((
+            row[i_id],
+            row[i_name],
+            row[i_gender],
+            int(age) if age else 0,
+            loads(grades_json) if grades_json and grades_json != '{}' else {}
+        ))
+    return rows
 
 
-def sort_grades(students, course, order='Ascending'):
+@metrics.timed('utils.load_from_file_parallel')
+def load_from_file_parallel(hash_table, file_path=None, workers=None, executor=None, progress=None):
+    """
+    Load a CSV or TXT roster by parsing shards of it in worker processes.
+
+    The file is split into byte ranges that start on record boundaries
+    (newlines outside quoted fields, so grades JSON with embedded commas or
+    quotes and names with line breaks stay whole). Each range is CSV-split
+    and JSON-decoded in a process pool, and the parsed rows are merged into
+    the table in file order inside one batch(), so duplicate IDs resolve the
+    same way as in load_from_file().
+
+    Binary .smsb snapshots and files smaller than PARALLEL_LOAD_MIN_BYTES
+    are handed to load_from_file(), which is faster for them.
+
+    Args:
+        hash_table (HashTable): The hash table where data will be loaded.
+        file_path (str, optional): The path to the roster file. Defaults to 'students.txt'.
+        workers (int, optional): Worker processes to start when no executor is given
+                                 (default: one per core).
+        executor (concurrent.futures.Executor, optional): An existing process pool to parse on.
+        progress (callable, optional): Called as progress(bytes_parsed, total_bytes) as shards
+                                       are merged. An exception it raises aborts the load.
+    """
+    if not file_path:
+        file_path = 'students.txt'
+    if (_is_binary(file_path) or not os.path.exists(file_path)
+            or os.path.getsize(file_path) < PARALLEL_LOAD_MIN_BYTES):
+        load_from_file(hash_table, file_path, progress)
+        return
+
+    delimiter = _delimiter_for(file_path)
+    verify_snapshot(file_path)
+    header, offsets = _shard_offsets(file_path, (workers or os.cpu_count() or 1) * SHARDS_PER_WORKER)
+    header = next(csv.reader(io.StringIO(header.decode('utf-8'), newline=''), delimiter=delimiter), None)
+    if header is None:
+        load_from_file(hash_table, file_path, progress)
+        return
+    columns = tuple(header.index(column) for column in FILE_COLUMNS)
+    metrics.add_file_size('utils.load_from_file_parallel', file_path)
+
+    own_pool = executor is None
+    if own_pool:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    futures = [executor.submit(_parse_shard, file_path, start, stop, delimiter, columns)
+               for start, stop in zip(offsets, offsets[1:])]
+    total = offsets[-1]
+    try:
+        with _gc_paused(), hash_table.batch():
+            hash_table.clear()
+            for future, stop in zip(futures, offsets[1:]):
+                students = []
+                for student_id, name, gender, age, grades in future.result():
+                    student = Student(student_id, name, gender, age)
+                    student.grades = grades
+                    students.append((student_id, student))
+                hash_table.insert_many(students)
+                if progress is not None:
+                    progress(stop, total)
+            _replay_change_log(hash_table, file_path)
+    finally:
+        for future in futures:
+            future.cancel()
+        if own_pool:
+            executor.shutdown(cancel_futures=True)
+    hash_table.mark_clean(file_path)
+
+
+@metrics.timed('utils.sort_grades')
+def sort_grades(students, course, order='Ascending', limit=None, offset=0, tie_break=False):
     """
     Sort students based on their grade in a specific course.
 
+    With a limit only the first offset + limit students of the ordering are
+    selected, using a heap (O(n log k)) instead of sorting everyone.
+
     Args:
-        students (list): List of Student objects.
+        students (iterable): Student objects.
         course (str): The course name to sort by.
         order (str, optional): 'Ascending' or 'Descending'. Defaults to 'Ascending'.
+        limit (int, optional): Return at most this many students. None returns all.
+        offset (int, optional): Skip this many students of the ordering first (for paging).
+        tie_break (bool, optional): Order equal grades by student ID. Otherwise they
+                                    keep their input order.
 
     Returns:
         list: Sorted list of Student objects.
     """
     reverse = True if order == 'Descending' else False
-    return sorted(students, key=lambda s: s.grades.get(course, 0), reverse=reverse)
+    if tie_break:
+        # Negating the grade keeps IDs ascending within equal grades in either order
+        sign = -1 if reverse else 1
+        key = lambda s: (sign * s.grades.get(course, 0), s.student_id)
+        reverse = False
+    else:
+        key = lambda s: s.grades.get(course, 0)
+
+    if limit is None:
+        ranked = sorted(students, key=key, reverse=reverse)
+    else:
+        # nsmallest/nlargest are stable, exactly like sorted(...)[:k]
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        ranked = select(offset + limit, students, key=key)
+    return ranked[offset:] if offset else ranked
 
 
+@metrics.timed('utils.grade_statistics')
 def grade_statistics(students, course):
     """
     Calculate statistics for grades in a specific course.
@@ -100,42 +856,96 @@ def grade_statistics(students, course):
 
     Returns:
         dict: A dictionary containing average, median, mode, and grade distribution.
+              When several grades are equally frequent the mode is the lowest of them
+              (it used to be whichever came first in student order), so every store
+              and the running course aggregates report the same mode.
     """
     grades = [s.grades[course] for s in students if course in s.grades]
     if not grades:
         return {}
+    return summarize_grades(grades)
+
+
+@metrics.timed('utils.grade_statistics_all')
+def grade_statistics_all(students, courses=None):
+    """
+    Calculate grade_statistics() for every course in a single pass over the students.
+
+    Runs on analytics.statistics_by_course(), which is vectorized when NumPy
+    is installed and falls back to summarize_grades() otherwise.
+
+    Args:
+        students (iterable): Student objects (a table's iter_students() works).
+        courses (iterable, optional): Courses to report. Defaults to every course seen.
+
+    Returns:
+        dict: course -> statistics dict (as grade_statistics, plus the number of grades
+              as 'count'), sorted by course name.
+    """
+    return analytics.statistics_by_course(students, courses, percentiles=())
 
+
+@metrics.timed('utils.collect_course_grades')
+def collect_course_grades(students, courses=None):
+    """
+    Gather every course's grades in a single pass over the students.
+
+    Args:
+        students (iterable): Student objects.
+        courses (iterable, optional): Courses to collect. Defaults to every course seen.
+
+    Returns:
+        dict: course -> list of grades.
+    """
+    wanted = None if courses is None else set(courses)
+    columns = {}
+    for student in students:
+        for course, grade in student.grades.items():
+            if wanted is None or course in wanted:
+                columns.setdefault(course, []).append(grade)
+    return columns
+
+
+@metrics.timed('utils.summarize_courses')
+def summarize_courses(columns):
+    """
+    Summarize collected grades per course. A plain function of plain data,
+    so it can run in a worker process.
+
+    Args:
+        columns (dict): course -> list of grades, as from collect_course_grades().
+
+    Returns:
+        dict: course -> statistics dict (as grade_statistics), sorted by course name.
+    """
+    return {course: summarize_grades(columns[course]) for course in sorted(columns) if columns[course]}
+
+
+def summarize_grades(grades):
+    """
+    Calculate the grade_statistics() figures for a non-empty sequence of grades.
+
+    Args:
+        grades (sequence): The grades of one course.
+
+    Returns:
+        dict: A dictionary containing average, median, mode, and grade distribution.
+    """
     average = sum(grades) / len(grades)
     sorted_grades = sorted(grades)
     n = len(grades)
     median = sorted_grades[n // 2] if n % 2 != 0 else (sorted_grades[n // 2 - 1] + sorted_grades[n // 2]) / 2
 
-    # Calculate mode
+    # Calculate mode (ties go to the lowest grade, so the result does not depend on student order)
     frequency = {}
     for grade in grades:
         frequency[grade] = frequency.get(grade, 0) + 1
-    mode = max(frequency, key=frequency.get)
+    mode = min(frequency, key=lambda grade: (-frequency[grade], grade))
 
     # Grade distribution
-    score_ranges = {
-        "90-100": 0,
-        "80-89": 0,
-        "70-79": 0,
-        "60-69": 0,
-        "Below 60": 0
-    }
-
+    score_ranges = dict.fromkeys(SCORE_RANGES, 0)
     for grade in grades:
-        if 90 <= grade <= 100:
-            score_ranges["90-100"] += 1
-        elif 80 <= grade < 90:
-            score_ranges["80-89"] += 1
-        elif 70 <= grade < 80:
-            score_ranges["70-79"] += 1
-        elif 60 <= grade < 70:
-            score_ranges["60-69"] += 1
-        else:
-            score_ranges["Below 60"] += 1
+        score_ranges[score_range(grade)] += 1
 
     return {
         'average': average,
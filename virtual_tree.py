@@ -0,0 +1,221 @@
+# virtual_tree.py
+
+import tkinter as tk
+import ttkbootstrap as ttk
+
+import metrics
+from query import Query
+
+# Columns of the student table: (column id, heading, width, anchor)
+STUDENT_COLUMNS = (
+    ("ID", "Student ID", 100, 'center'),
+    ("Name", "Name", 200, 'w'),
+    ("Gender", "Gender", 100, 'center'),
+    ("Age", "Age", 50, 'center'),
+    ("Grades", "Grades", 300, 'w'),
+    ("Total", "Total Grades", 100, 'center'),
+)
+
+# Sort key for each column; Grades sorts by its displayed text
+_SORT_KEYS = {
+    "ID": lambda s: s.student_id,
+    "Name": lambda s: s.name.lower(),
+    "Gender": lambda s: s.gender,
+    "Age": lambda s: s.age,
+    "Grades": lambda s: format_grades(s.grades),
+    "Total": lambda s: s.total_grade(),
+}
+
+# Formatted rows kept on either side of the visible window, so small scrolls reuse them
+ROW_BUFFER = 50
+
+
+def format_grades(grades):
+    return "; ".join([f"{course}: {grade}" for course, grade in grades.items()])
+
+
+class _LazySequence:
+    """A list filled from an iterator only as far as it has been indexed."""
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self._items = []
+
+    def slice(self, start, stop):
+        items = self._items
+        while len(items) < stop:
+            try:
+                items.append(next(self._iterator))
+            except StopIteration:
+                break
+        return items[start:stop]
+
+
+class StudentRowSource:
+    def __init__(self, store, sort_column=None, descending=False, filter_text=''):
+        """
+        Supply display rows for a VirtualTreeview from a student store.
+
+        Without a sort or filter, rows are pulled from the store's
+        iter_students() only as far as the user scrolls, so opening the view
+        costs the same for any roster size. A filter is answered by the
+        store's search index; sorting needs every matching student once, and
+        is only done when the user asks for it.
+
+        Args:
+            store: HashTable, Roster or SQLiteStudentStore.
+            sort_column (str, optional): Column id from STUDENT_COLUMNS to sort by.
+            descending (bool, optional): Reverse the sort order.
+            filter_text (str, optional): Keep only students whose ID starts with this text, or
+                                         whose name has words starting with each of its words
+                                         (case-insensitive, as HashTable.search()).
+        """
+        self.store = store
+        self.sort_column = sort_column
+        self.descending = descending
+        self.filter_text = filter_text.strip()
+        query = Query(store)
+        if self.filter_text:
+            query = query.where(search=self.filter_text)
+        if sort_column is not None:
+            query = query.order_by(_SORT_KEYS[sort_column], descending=descending)
+        if self.filter_text or sort_column is not None:
+            self._students = query.all()
+            self._count = len(self._students)
+        else:
+            self._students = _LazySequence(iter(query))
+            self._count = query.count()
+        self._cache_start = 0
+        self._cache = []
+
+    def __len__(self):
+        return self._count
+
+    def _slice(self, start, stop):
+        if isinstance(self._students, list):
+            return self._students[start:stop]
+        return self._students.slice(start, stop)
+
+    def rows(self, start, stop):
+        """
+        Return the display tuples for rows [start, stop).
+
+        Rows are formatted for the requested window plus ROW_BUFFER on each
+        side; later requests inside that range are served from the cache.
+        """
+        cache_stop = self._cache_start + len(self._cache)
+        if start < self._cache_start or stop > cache_stop:
+            self._cache_start = max(0, start - ROW_BUFFER)
+            self._cache = [self._format(student) for student in self._slice(self._cache_start, stop + ROW_BUFFER)]
+        offset = start - self._cache_start
+        return self._cache[offset:offset + stop - start]
+
+    @staticmethod
+    def _format(student):
+        return (
+            student.student_id,
+            student.name,
+            student.gender,
+            student.age,
+            format_grades(student.grades),
+            student.total_grade()
+        )
+
+
+class VirtualTreeview(ttk.Frame):
+    def __init__(self, master, columns=STUDENT_COLUMNS, **kwargs):
+        """
+        A Treeview that only ever holds the rows currently on screen.
+
+        The scrollbar is driven by the row source's length rather than the
+        tree's contents; scrolling replaces the values of the few existing
+        items instead of inserting and deleting rows.
+
+        Args:
+            master: Parent widget.
+            columns (tuple, optional): (column id, heading, width, anchor) entries.
+        """
+        super().__init__(master, **kwargs)
+        self.source = None
+        self.offset = 0
+        self.visible_rows = 20
+        self._sort_callback = None
+
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in columns], show='headings',
+                                 height=10, selectmode='browse')
+        for column, heading, width, anchor in columns:
+            self.tree.heading(column, text=heading, command=lambda c=column: self._on_heading(c))
+            self.tree.column(column, width=width, anchor=anchor)
+        self.tree.pack(fill='both', expand=True)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<Prior>', lambda e: self.scroll(-self.visible_rows))
+        self.tree.bind('<Next>', lambda e: self.scroll(self.visible_rows))
+        self.tree.bind('<Home>', lambda e: self.scroll_to(0))
+        self.tree.bind('<End>', lambda e: self.scroll_to(len(self.source or ())))
+
+    def on_sort(self, callback):
+        """Call callback(column_id) when a column heading is clicked."""
+        self._sort_callback = callback
+
+    def set_source(self, source):
+        """Show rows from source (anything with __len__ and rows(start, stop)), scrolled to the top."""
+        self.source = source
+        self.offset = 0
+        self.refresh()
+
+    def scroll(self, rows):
+        self.scroll_to(self.offset + rows)
+
+    def scroll_to(self, offset):
+        total = len(self.source) if self.source is not None else 0
+        offset = max(0, min(offset, total - self.visible_rows))
+        if offset != self.offset:
+            # Items are reused for other students, so a selection would jump to the wrong row
+            self.tree.selection_remove(self.tree.selection())
+            self.offset = offset
+        self.refresh()
+
+    @metrics.timed('gui.tree_refresh')
+    def refresh(self):
+        """Redraw the visible window from the source."""
+        total = len(self.source) if self.source is not None else 0
+        rows = self.source.rows(self.offset, self.offset + self.visible_rows) if total else []
+        items = self.tree.get_children()
+        for i, values in enumerate(rows):
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert("", tk.END, iid=f"row{i}", values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(rows)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_scrollbar(self, action, value, units=None):
+        if self.source is None:
+            return
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self.source)))
+        elif action == 'scroll':
+            step = self.visible_rows if units == 'pages' else 1
+            self.scroll(int(value) * step)
+
+    def _on_heading(self, column):
+        if self._sort_callback is not None:
+            self._sort_callback(column)
+
+    def _on_resize(self, event):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        # Leave room for the heading row
+        rows = max(1, (event.height - row_height) // row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.scroll_to(self.offset)